@@ -0,0 +1,53 @@
+# benchmarks/_common.py
+import os
+import random
+import sys
+
+# Make the package and the generated protobuf module importable from a checkout
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "src"))
+
+DBC_PATH = os.path.join(ROOT, "src", "telemetry.dbc")
+
+
+def build_log_frame(payload, rssi=-80.0, snr=9.5):
+    """
+    Build a framed LOG packet as it arrives from the device.
+
+    Args:
+        payload: The CAN payload (4-byte ID followed by data).
+        rssi: RSSI value to report.
+        snr: SNR value to report.
+
+    Returns:
+        The packet wrapped in start/end markers.
+    """
+    import packet_pb2
+    from lora_tool.constants import START_MARKER, END_MARKER
+
+    packet = packet_pb2.Packet()
+    packet.type = packet_pb2.PacketType.LOG
+    packet.log.rssi_avg = rssi
+    packet.log.snr = snr
+    packet.log.payload = payload
+    return START_MARKER + packet.SerializeToString() + END_MARKER
+
+
+def format_rate(count, seconds):
+    """Return a human-readable rate string."""
+    if seconds <= 0:
+        return "n/a"
+    return f"{count / seconds:,.0f}/s"
+
+
+def synthetic_payloads(decoder, count, seed=0):
+    """Return random payloads spread evenly over the messages in the DBC."""
+    rng = random.Random(seed)
+    messages = list(decoder.plans.values())
+    payloads = []
+    for i in range(count):
+        message = messages[i % len(messages)]
+        data = bytes(rng.randrange(256) for _ in range(message.length))
+        payloads.append(message.frame_id.to_bytes(4, "big") + data)
+    return payloads
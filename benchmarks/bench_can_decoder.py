@@ -0,0 +1,75 @@
+# benchmarks/bench_can_decoder.py
+"""Decode synthetic frames for every message in telemetry.dbc with CANDecoder."""
+import argparse
+import logging
+import time
+
+import _common
+from lora_tool.can_decoder import CANDecoder
+
+
+def legacy_decode(decoder, payload):
+    """The lookup and formatting CANDecoder.decode_payload used before decode plans."""
+    can_id = int.from_bytes(payload[:4], byteorder="big")
+    data = payload[4:]
+    result = {"can_id": can_id, "data": data.hex(), "signals": {}}
+
+    message = None
+    for msg in decoder.db.messages:
+        if msg.frame_id == can_id:
+            message = msg
+            break
+    if not message:
+        result["message_name"] = f"Unknown (0x{can_id:X})"
+        return result
+
+    result["message_name"] = message.name
+    decoded = decoder.db.decode_message(can_id, data)
+    for signal_name, signal_value in decoded.items():
+        if hasattr(signal_value, "name") and hasattr(signal_value, "value"):
+            signal_value = f"{signal_value.value} ({signal_value.name})"
+        elif isinstance(signal_value, float):
+            signal_value = round(signal_value, 2)
+        for signal in message.signals:
+            if signal.name == signal_name:
+                if signal.unit:
+                    if not isinstance(signal_value, str) or signal.unit not in signal_value:
+                        signal_value = f"{signal_value} {signal.unit}"
+                break
+        result["signals"][signal_name] = signal_value
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--count", type=int, default=100_000, help="Frames to decode")
+    args = parser.parse_args()
+
+    # Keep per-frame log output out of the measurement
+    logging.getLogger("lora_tool.can_decoder").setLevel(logging.WARNING)
+
+    decoder = CANDecoder(_common.DBC_PATH)
+    payloads = _common.synthetic_payloads(decoder, args.count)
+
+    for payload in payloads[: len(decoder.db.messages)]:
+        # The legacy output predates the DBC version tag
+        result = dict(decoder.decode_payload(payload))
+        result.pop("dbc_version", None)
+        assert result == legacy_decode(decoder, payload)
+
+    results = {}
+    for label, decode in (
+        ("legacy", lambda payload: legacy_decode(decoder, payload)),
+        ("plans", decoder.decode_payload),
+    ):
+        start = time.perf_counter()
+        for payload in payloads:
+            decode(payload)
+        results[label] = time.perf_counter() - start
+        print(f"{label:>8}: {_common.format_rate(len(payloads), results[label])}")
+
+    print(f" speedup: {results['legacy'] / results['plans']:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+# benchmarks/bench_decode_batch.py
+"""Compare CANDecoder.decode_batch against per-frame decode_payload."""
+import argparse
+import logging
+import time
+
+import numpy as np
+
+import _common
+from lora_tool.can_decoder import CANDecoder
+
+
+def check(decoder, payloads, batch):
+    """Verify the batch columns against cantools for every decoded frame."""
+    for name, group in batch["messages"].items():
+        message = decoder.db.get_message_by_name(name)
+        for row, i in enumerate(group["index"][:50]):
+            expected = message.decode(payloads[i][4:], decode_choices=False)
+            for signal_name, value in expected.items():
+                actual = group["signals"][signal_name][row]
+                assert np.isclose(actual, value), (name, signal_name, actual, value)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--count", type=int, default=200_000, help="Frames to decode")
+    args = parser.parse_args()
+
+    logging.getLogger("lora_tool.can_decoder").setLevel(logging.WARNING)
+
+    decoder = CANDecoder(_common.DBC_PATH)
+    payloads = _common.synthetic_payloads(decoder, args.count)
+
+    start = time.perf_counter()
+    for payload in payloads:
+        decoder.decode_payload(payload)
+    per_frame = time.perf_counter() - start
+
+    start = time.perf_counter()
+    batch = decoder.decode_batch(payloads)
+    batched = time.perf_counter() - start
+
+    check(decoder, payloads, batch)
+    print(f"messages: {len(batch['messages'])}, frames: {len(payloads)}")
+    print(f"per-frame: {_common.format_rate(len(payloads), per_frame)}")
+    print(f"  batched: {_common.format_rate(len(payloads), batched)}")
+    print(f"  speedup: {per_frame / batched:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
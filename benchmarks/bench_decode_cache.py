@@ -0,0 +1,128 @@
+# benchmarks/bench_decode_cache.py
+"""Decode recorded or synthetic telemetry with different decode result cache sizes."""
+import argparse
+import logging
+import random
+import time
+
+import _common
+import packet_pb2
+from lora_tool.can_decoder import CANDecoder
+from lora_tool.framer import PacketFramer
+from lora_tool.raw_capture import RawCaptureReader
+
+# Chance that a message's data changes between transmissions, cycled over
+# the DBC messages: fault and status words sit still, measurements move
+CHANGE_RATES = (0.001, 0.01, 0.05, 0.2, 1.0)
+
+
+def capture_payloads(path):
+    """Return the LOG payloads of a raw capture, in order."""
+    framer = PacketFramer()
+    payloads = []
+    with RawCaptureReader(path) as reader:
+        for _, data in reader:
+            framer.feed(data)
+            for frame in framer.frames():
+                packet = packet_pb2.Packet()
+                try:
+                    packet.ParseFromString(frame)
+                except Exception:
+                    continue
+                if packet.type == packet_pb2.PacketType.LOG:
+                    payloads.append(bytes(packet.log.payload))
+    return payloads
+
+
+def telemetry_payloads(decoder, count, seed=0):
+    """
+    Return payloads that repeat the way vehicle telemetry does.
+
+    Messages are sent round robin; each keeps its data until it changes
+    with the rate assigned from CHANGE_RATES. A change moves one of the two
+    low bytes a little around its starting level, like a noisy reading, so
+    earlier payloads come back as well as repeating back to back.
+    """
+    rng = random.Random(seed)
+    plans = list(decoder.plans.values())
+    levels = [bytes(rng.randrange(256) for _ in range(p.length)) for p in plans]
+    current = [bytearray(level) for level in levels]
+    payloads = []
+    for i in range(count):
+        index = i % len(plans)
+        data = current[index]
+        if rng.random() < CHANGE_RATES[index % len(CHANGE_RATES)]:
+            position = rng.randrange(min(2, len(data)))
+            data[position] = (levels[index][position] + rng.randrange(-2, 3)) % 256
+        payloads.append(plans[index].frame_id.to_bytes(4, "big") + bytes(data))
+    return payloads
+
+
+def run(payloads, lru_size):
+    decoder = CANDecoder(_common.DBC_PATH, lru_size=lru_size)
+    start = time.perf_counter()
+    for payload in payloads:
+        decoder.decode_payload(payload, typed=True)
+    elapsed = time.perf_counter() - start
+    return elapsed, decoder.cache_stats()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--capture", help="Raw capture to take payloads from")
+    parser.add_argument("--count", type=int, default=200_000, help="Synthetic frames")
+    parser.add_argument(
+        "--sizes",
+        default="0,16,64,256,1024,4096,16384",
+        help="Comma-separated cache sizes to try",
+    )
+    args = parser.parse_args()
+
+    logging.getLogger("lora_tool.can_decoder").setLevel(logging.ERROR)
+    if args.capture:
+        payloads = capture_payloads(args.capture)
+        source = args.capture
+    else:
+        payloads = telemetry_payloads(CANDecoder(_common.DBC_PATH), args.count)
+        source = "synthetic telemetry"
+    print(f"{source}: {len(payloads)} frames, {len(set(payloads))} distinct")
+
+    sizes = [int(size) for size in args.sizes.split(",")]
+    baseline = None
+    results = []
+    print(f"{'size':>7} {'hit ratio':>9} {'evictions':>10} {'us/frame':>9} {'rate':>12}")
+    for size in sizes:
+        elapsed, stats = run(payloads, size)
+        if baseline is None:
+            baseline = elapsed
+        results.append((size, stats["hit_ratio"] or 0.0, elapsed))
+        print(
+            f"{size:>7} {stats['hit_ratio'] or 0:>9.3f} {stats['evictions']:>10} "
+            f"{elapsed / len(payloads) * 1e6:>9.2f} "
+            f"{_common.format_rate(len(payloads), elapsed):>12}"
+        )
+
+    # Smallest size that gets within a point of the best hit ratio
+    best = max(ratio for _, ratio, _ in results)
+    for size, ratio, elapsed in results:
+        if size and ratio >= best - 0.01:
+            print(
+                f"suggested lru_size: {size} "
+                f"({baseline / elapsed:.1f}x the uncached decode rate)"
+            )
+            break
+
+    # Cost of a pure hit
+    decoder = CANDecoder(_common.DBC_PATH, lru_size=16)
+    payload = payloads[0]
+    decoder.decode_payload(payload, typed=True)
+    repeats = 200_000
+    start = time.perf_counter()
+    for _ in range(repeats):
+        decoder.decode_payload(payload, typed=True)
+    hit_us = (time.perf_counter() - start) / repeats * 1e6
+    print(f"cached frame: {hit_us:.2f} us")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+# benchmarks/bench_delta.py
+"""Compare the bytes sent to clients with full messages and with change-only (delta) emission."""
+import argparse
+import json
+import logging
+import time
+
+import _common
+from bench_decode_cache import capture_payloads, telemetry_payloads
+from lora_tool.can_decoder import CANDecoder
+from lora_tool.delta import Deadbands, DeltaEncoder
+
+
+def queued_messages(decoder, payloads):
+    """Decode payloads into messages shaped like the ones the gateway queues."""
+    messages = []
+    for index, payload in enumerate(payloads):
+        can_data = decoder.decode_payload(payload, typed=True)
+        messages.append(
+            {
+                "device": "ttyUSB0",
+                "rssi": -80.0,
+                "snr": 9.5,
+                "crc_error": False,
+                "general_error": False,
+                "can_id": can_data.get("can_id"),
+                "message_name": can_data.get("message_name", "Unknown"),
+                "signals": can_data.get("signals", {}),
+                "raw_data": can_data.get("data"),
+                "dbc_version": can_data.get("dbc_version"),
+                "timestamp": 1700000000.0 + index * 0.001,
+            }
+        )
+    return messages
+
+
+def sent_bytes(batches):
+    return sum(len(json.dumps({"messages": batch})) for batch in batches)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--capture", help="Raw capture to take payloads from")
+    parser.add_argument("--count", type=int, default=100_000, help="Synthetic frames")
+    parser.add_argument("--batch", type=int, default=50, help="Messages per event")
+    parser.add_argument(
+        "--deadband", type=float, default=0.0, help="Deadband applied to every signal"
+    )
+    parser.add_argument(
+        "--keyframe", type=float, default=10.0, help="Seconds between keyframes"
+    )
+    parser.add_argument(
+        "--rate", type=float, default=1000.0, help="Messages per second replayed"
+    )
+    args = parser.parse_args()
+
+    logging.getLogger("lora_tool.can_decoder").setLevel(logging.ERROR)
+    decoder = CANDecoder(_common.DBC_PATH)
+    if args.capture:
+        payloads = capture_payloads(args.capture)
+    else:
+        payloads = telemetry_payloads(decoder, args.count)
+    messages = queued_messages(decoder, payloads)
+    batches = [
+        messages[i : i + args.batch] for i in range(0, len(messages), args.batch)
+    ]
+
+    overrides = {}
+    if args.deadband:
+        overrides = {
+            name: args.deadband
+            for plan in decoder.plans.values()
+            for name in plan.signals
+        }
+    encoder = DeltaEncoder(Deadbands(decoder, overrides), args.keyframe)
+
+    # Replay at the given message rate so keyframes fall where they would
+    encoded = []
+    start = time.perf_counter()
+    for index, batch in enumerate(batches):
+        now = index * args.batch / args.rate
+        encoded.append(encoder.encode(batch, now)[0])
+    elapsed = time.perf_counter() - start
+
+    full = sent_bytes(batches)
+    delta = sent_bytes(encoded)
+    stats = encoder.stats()
+    print(f"{len(messages)} messages in events of {args.batch}")
+    print(f"full:  {full / len(messages):8.1f} bytes/message")
+    print(
+        f"delta: {delta / len(messages):8.1f} bytes/message "
+        f"({full / delta:.1f}x less, {stats['skipped_ratio']:.1%} of signals left out)"
+    )
+    print(f"encode: {elapsed / len(messages) * 1e6:.2f} us/message")
+
+
+if __name__ == "__main__":
+    main()
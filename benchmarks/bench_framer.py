@@ -0,0 +1,82 @@
+# benchmarks/bench_framer.py
+"""Compare PacketFramer against the original slice-and-rescan framing loop."""
+import argparse
+import time
+
+import _common
+from lora_tool.constants import START_MARKER, END_MARKER
+from lora_tool.framer import PacketFramer
+
+BACKLOG_SIZES = {"1KB": 1024, "64KB": 64 * 1024, "4MB": 4 * 1024 * 1024}
+
+
+def legacy_frames(buffer, deadline):
+    """The framing loop LoRaDevice.process_packet used before PacketFramer."""
+    count = 0
+    while START_MARKER in buffer and END_MARKER in buffer:
+        if time.perf_counter() > deadline:
+            return count, False
+        start_idx = buffer.find(START_MARKER) + len(START_MARKER)
+        end_idx = buffer.find(END_MARKER)
+
+        if start_idx > end_idx:
+            buffer = buffer[end_idx + len(END_MARKER) :]
+            continue
+
+        message = buffer[start_idx:end_idx]
+        buffer = buffer[end_idx + len(END_MARKER) :]
+        count += len(message) > 0
+    return count, True
+
+
+def framer_frames(buffer):
+    framer = PacketFramer()
+    framer.feed(buffer)
+    count = 0
+    for frame in framer.frames():
+        count += len(frame) > 0
+    return count
+
+
+def build_backlog(size):
+    frame = _common.build_log_frame(bytes.fromhex("0cf11e05") + bytes(range(8)))
+    return frame * max(1, size // len(frame))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--time-limit",
+        type=float,
+        default=10.0,
+        help="Seconds allowed for the legacy loop per backlog size",
+    )
+    args = parser.parse_args()
+
+    print(f"{'backlog':>8} {'frames':>8} {'legacy':>16} {'framer':>16} {'speedup':>9}")
+    for label, size in BACKLOG_SIZES.items():
+        backlog = build_backlog(size)
+
+        start = time.perf_counter()
+        legacy_count, finished = legacy_frames(
+            backlog, start + args.time_limit
+        )
+        legacy_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        count = framer_frames(backlog)
+        framer_time = time.perf_counter() - start
+
+        legacy_rate = legacy_count / legacy_time if legacy_time else 0
+        framer_rate = count / framer_time if framer_time else 0
+        note = "" if finished else " (time limit)"
+        print(
+            f"{label:>8} {count:>8} "
+            f"{_common.format_rate(legacy_count, legacy_time):>16} "
+            f"{_common.format_rate(count, framer_time):>16} "
+            f"{framer_rate / legacy_rate if legacy_rate else 0:>8.1f}x{note}"
+        )
+
+
+if __name__ == "__main__":
+    main()
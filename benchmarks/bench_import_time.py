@@ -0,0 +1,102 @@
+# benchmarks/bench_import_time.py
+"""Report import time of the entry points with -X importtime and check it against a budget."""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+import _common
+
+# Dependencies that must not be imported until they are used
+DEFERRED = ("pandas", "pyarrow", "numpy", "cantools", "serial", "can")
+
+
+def import_profile(module):
+    """
+    Import a module in a fresh interpreter with -X importtime.
+
+    Returns:
+        Tuple of (wall seconds, {module: (self us, cumulative us, depth)}).
+    """
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(
+        [os.path.join(_common.ROOT, "src"), _common.ROOT, env.get("PYTHONPATH", "")]
+    )
+    start = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        env=env,
+        check=True,
+        capture_output=True,
+        text=True,
+    )
+    elapsed = time.perf_counter() - start
+
+    modules = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:") :].split("|")
+        depth = (len(name) - len(name.lstrip())) // 2
+        modules[name.strip()] = (int(self_us), int(cumulative_us), depth)
+    return elapsed, modules
+
+
+def report(module, runs, top):
+    """Print the import profile of a module and return (median ms, deferred hits)."""
+    # Warm up the bytecode and DBC plan caches first
+    import_profile(module)
+    samples = [import_profile(module) for _ in range(runs)]
+    wall_ms = statistics.median(elapsed for elapsed, _ in samples) * 1000
+    import_ms = statistics.median(modules[module][1] for _, modules in samples) / 1000
+    modules = samples[-1][1]
+
+    print(f"{module}: import {import_ms:.1f} ms, process {wall_ms:.1f} ms")
+    children = [
+        (cumulative, name)
+        for name, (_, cumulative, depth) in modules.items()
+        if depth == 1 or (depth == 0 and name != module)
+    ]
+    for cumulative, name in sorted(children, reverse=True)[:top]:
+        print(f"  {cumulative / 1000:8.1f} ms  {name}")
+
+    loaded = [name for name in DEFERRED if name in modules]
+    if loaded:
+        print(f"  imported too early: {', '.join(loaded)}")
+    return wall_ms, loaded
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "modules",
+        nargs="*",
+        default=["lora_tool.webapp", "lora_tool"],
+        help="Modules to import (default the web app and the package)",
+    )
+    parser.add_argument("--runs", type=int, default=5, help="Runs per module")
+    parser.add_argument("--top", type=int, default=10, help="Imports listed per module")
+    parser.add_argument(
+        "--budget",
+        type=float,
+        default=1000.0,
+        help="Maximum process start time in ms, including the interpreter",
+    )
+    args = parser.parse_args()
+
+    failed = False
+    for module in args.modules:
+        wall_ms, loaded = report(module, args.runs, args.top)
+        if wall_ms > args.budget:
+            print(f"  over budget: {wall_ms:.1f} ms > {args.budget:.0f} ms")
+            failed = True
+        if loaded:
+            failed = True
+        print()
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+# benchmarks/bench_log_parser.py
+"""Compare the LOG fast path with protobuf parsing: identical output, time per packet."""
+import argparse
+import random
+import statistics
+import time
+
+import _common
+import packet_pb2
+from google.protobuf.internal import api_implementation
+from lora_tool.constants import START_MARKER, END_MARKER
+from lora_tool.framer import PacketFramer
+from lora_tool.log_parser import FAST_PATH, parse_log_packet
+
+
+def mixed_stream(count, seed=0):
+    """
+    Return a serial stream shaped like receiver traffic.
+
+    Mostly ordinary LOG packets, with CRC and general errors, zero SNR,
+    a LOG with a GPS position and a few other packet types mixed in so the
+    fallback is exercised too.
+    """
+    rng = random.Random(seed)
+    stream = bytearray()
+    for index in range(count):
+        packet = packet_pb2.Packet()
+        roll = rng.random()
+        if roll < 0.005:
+            packet.type = packet_pb2.PacketType.GPS
+            packet.gps.latitude = rng.uniform(-90, 90)
+            packet.gps.longitude = rng.uniform(-180, 180)
+            packet.gps.satellites = rng.randrange(12)
+        elif roll < 0.01:
+            packet.type = packet_pb2.PacketType.ACK
+            packet.ack = True
+        else:
+            packet.type = packet_pb2.PacketType.LOG
+            log = packet.log
+            log.rssi_avg = rng.uniform(-120.0, -40.0)
+            log.snr = 0.0 if roll < 0.02 else rng.uniform(-5.0, 12.0)
+            log.crc_error = roll > 0.97
+            log.general_error = roll > 0.995
+            if index % 1000 == 0:
+                log.gps.latitude = 45.0
+            log.payload = rng.randbytes(4) + rng.randbytes(rng.choice((0, 2, 8, 64)))
+        stream += START_MARKER + packet.SerializeToString() + END_MARKER
+    return bytes(stream)
+
+
+def protobuf_packet(frame):
+    packet = packet_pb2.Packet()
+    packet.ParseFromString(frame)
+    return packet
+
+
+def fast_packet(frame):
+    return parse_log_packet(frame) or protobuf_packet(frame)
+
+
+def fields(packet):
+    """What the receive path reads from a packet."""
+    if packet.type != packet_pb2.PacketType.LOG:
+        return (packet.type, packet.SerializeToString())
+    log = packet.log
+    return (
+        packet.type,
+        log.crc_error,
+        log.general_error,
+        log.rssi_avg,
+        log.snr,
+        bytes(log.payload),
+        log.gps.latitude,
+    )
+
+
+def run(stream, parse):
+    """Frame and parse the stream, reading the fields the gateway reads."""
+    framer = PacketFramer()
+    framer.feed(stream)
+    LOG = packet_pb2.PacketType.LOG
+    start = time.perf_counter()
+    count = 0
+    for frame in framer.frames():
+        packet = parse(frame)
+        if packet.type == LOG:
+            log = packet.log
+            log.payload, log.rssi_avg, log.snr, log.crc_error, log.general_error
+        count += 1
+    return time.perf_counter() - start, count
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--count", type=int, default=100_000, help="Packets")
+    parser.add_argument("--runs", type=int, default=7, help="Runs per parser")
+    args = parser.parse_args()
+
+    stream = mixed_stream(args.count)
+    framer = PacketFramer()
+    framer.feed(stream)
+    fast = mismatches = 0
+    for frame in framer.frames():
+        if parse_log_packet(frame) is not None:
+            fast += 1
+        if fields(fast_packet(frame)) != fields(protobuf_packet(frame)):
+            mismatches += 1
+    print(
+        f"protobuf backend: {api_implementation.Type()}, "
+        f"fast path {'enabled' if FAST_PATH else 'disabled'} in parse_packet()"
+    )
+    print(f"{args.count} packets, {fast / args.count:.1%} on the fast path")
+    print(f"mismatched packets: {mismatches}")
+
+    # Alternate the parsers so drifting machine load hits both alike
+    times = {"protobuf": [], "fast path": []}
+    for _ in range(args.runs):
+        for name, parse in (("protobuf", protobuf_packet), ("fast path", fast_packet)):
+            times[name].append(run(stream, parse)[0])
+    baseline = statistics.median(times["protobuf"])
+    for name, samples in times.items():
+        elapsed = statistics.median(samples)
+        print(
+            f"{name:<10} {elapsed / args.count * 1e6:6.2f} us/packet "
+            f"{_common.format_rate(args.count, elapsed):>14} "
+            f"{baseline / elapsed:4.1f}x"
+        )
+    if mismatches:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
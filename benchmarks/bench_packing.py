@@ -0,0 +1,78 @@
+# benchmarks/bench_packing.py
+"""CAN frames per second over the air with one frame per LoRa packet and with packed payloads."""
+import argparse
+import time
+
+import _common
+from lora_tool.airtime import time_on_air
+from lora_tool.can_decoder import CANDecoder
+from lora_tool.can_packing import HEADER, MAX_PAYLOAD, pack_payloads, record_size
+
+# (spreading factor, bandwidth kHz) pairs to compare
+SETTINGS = ((7, 500.0), (7, 125.0), (9, 125.0), (10, 250.0), (12, 125.0))
+
+
+def frames_per_second(frames_per_packet, payload_length, sf, bw, turnaround):
+    """Frame rate when packets are sent back to back."""
+    packet_time = time_on_air(payload_length, sf, bw) + turnaround
+    return frames_per_packet / packet_time
+
+
+def decode_cost(decoder, packed, repeats):
+    """Host time to decode the frames of packed payloads, per frame."""
+    frames = 0
+    start = time.perf_counter()
+    for _ in range(repeats):
+        for payload in packed:
+            frames += len(decoder.decode_frames(payload, typed=True))
+    return (time.perf_counter() - start) / frames
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--dlc", type=int, default=8, help="CAN data bytes per frame")
+    parser.add_argument(
+        "--no-time-deltas", action="store_true", help="Leave per-frame time deltas out"
+    )
+    parser.add_argument(
+        "--turnaround",
+        type=float,
+        default=0.0,
+        help="Fixed cost per packet besides airtime, in ms (radio setup, serial, ACK)",
+    )
+    args = parser.parse_args()
+
+    time_deltas = not args.no_time_deltas
+    single_length = 4 + args.dlc
+    per_packet = (MAX_PAYLOAD - HEADER.size) // record_size(args.dlc, time_deltas)
+    packed_length = HEADER.size + per_packet * record_size(args.dlc, time_deltas)
+    turnaround = args.turnaround / 1000
+    print(
+        f"single: {single_length} bytes/packet; packed: {per_packet} frames in "
+        f"{packed_length} bytes; turnaround {args.turnaround:g} ms"
+    )
+    print(f"{'SF':>3} {'BW':>6} {'single fps':>11} {'packed fps':>11} {'gain':>6}")
+    for sf, bw in SETTINGS:
+        single = frames_per_second(1, single_length, sf, bw, turnaround)
+        packed = frames_per_second(per_packet, packed_length, sf, bw, turnaround)
+        print(
+            f"{sf:>3} {bw:>6g} {single:>11.1f} {packed:>11.1f} "
+            f"{packed / single:>5.1f}x"
+        )
+
+    # The receiving side has to split and decode more frames per packet
+    decoder = CANDecoder(_common.DBC_PATH)
+    payloads = _common.synthetic_payloads(decoder, 4000)
+    frames = [(int.from_bytes(p[:4], "big"), p[4:]) for p in payloads]
+    timestamps = [i * 0.001 for i in range(len(frames))] if time_deltas else None
+    packed = pack_payloads(frames, timestamps)
+    single_cost = decode_cost(decoder, payloads, 5)
+    packed_cost = decode_cost(decoder, packed, 5)
+    print(
+        f"host decode: {single_cost * 1e6:.2f} us/frame single, "
+        f"{packed_cost * 1e6:.2f} us/frame packed"
+    )
+
+
+if __name__ == "__main__":
+    main()
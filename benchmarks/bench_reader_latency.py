@@ -0,0 +1,99 @@
+# benchmarks/bench_reader_latency.py
+"""Measure bytes-on-wire to callback latency against a pty-backed fake device (Linux/macOS)."""
+import argparse
+import os
+import struct
+import threading
+import time
+
+import _common
+import serial
+from lora_tool.lora_device import LoRaDevice
+from lora_tool.packet_reader import PacketReader, percentile
+
+CAN_ID = bytes.fromhex("0cf11e05")
+
+
+def fake_device(master_fd, count, interval, stop_event):
+    """Write LOG frames stamped with their send time to the pty master."""
+    for _ in range(count):
+        if stop_event.is_set():
+            return
+        payload = CAN_ID + struct.pack("<d", time.perf_counter())
+        os.write(master_fd, _common.build_log_frame(payload))
+        time.sleep(interval)
+
+
+def legacy_receive(device, callback, stop_event):
+    """The polling loop receive_data_thread used before PacketReader."""
+    while not stop_event.is_set():
+        if device.ser.in_waiting > 0:
+            start_time = time.time()
+            while time.time() - start_time < 1.0:
+                device.process_packet(callback)
+                time.sleep(0.01)
+        time.sleep(0.1)
+
+
+def run(mode, count, interval):
+    master_fd, slave_fd = os.openpty()
+    ser = serial.Serial(os.ttyname(slave_fd), timeout=1)
+    device = LoRaDevice(ser)
+    latencies = []
+    stop_event = threading.Event()
+
+    def callback(packet):
+        sent = struct.unpack("<d", packet.log.payload[4:12])[0]
+        latencies.append(time.perf_counter() - sent)
+        if len(latencies) >= count:
+            stop_event.set()
+        return False
+
+    if mode == "legacy":
+        receiver = threading.Thread(
+            target=legacy_receive, args=(device, callback, stop_event), daemon=True
+        )
+    else:
+        receiver = threading.Thread(
+            target=PacketReader(device, callback, stop_event).run, daemon=True
+        )
+    receiver.start()
+
+    writer = threading.Thread(
+        target=fake_device, args=(master_fd, count, interval, stop_event), daemon=True
+    )
+    cpu_start = time.process_time()
+    writer.start()
+    stop_event.wait(count * interval + 5)
+    stop_event.set()
+    writer.join()
+    receiver.join()
+    cpu_time = time.process_time() - cpu_start
+
+    ser.close()
+    os.close(master_fd)
+    os.close(slave_fd)
+    return latencies, cpu_time
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--count", type=int, default=200, help="Packets to send")
+    parser.add_argument(
+        "--interval", type=float, default=0.02, help="Seconds between packets"
+    )
+    args = parser.parse_args()
+
+    print(f"{'mode':>8} {'received':>9} {'p50 ms':>8} {'p99 ms':>8} {'cpu s':>7}")
+    for mode in ("legacy", "reader"):
+        latencies, cpu_time = run(mode, args.count, args.interval)
+        p50 = percentile(latencies, 0.5) or 0
+        p99 = percentile(latencies, 0.99) or 0
+        print(
+            f"{mode:>8} {len(latencies):>9} {p50 * 1000:>8.2f} "
+            f"{p99 * 1000:>8.2f} {cpu_time:>7.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,222 @@
+# benchmarks/bench_receive_path.py
+"""End-to-end receive path benchmark: framing and parse, CAN decode, queueing and JSON."""
+import argparse
+import json
+import platform
+import resource
+import subprocess
+import sys
+import time
+
+import _common
+import packet_pb2
+from flask.json.provider import DefaultJSONProvider
+from flask import Flask
+from lora_tool.can_decoder import CANDecoder
+from lora_tool.gateway import DeviceSession
+from lora_tool.message_buffer import MessageRing
+from lora_tool.packet_reader import percentile
+from lora_tool.transport import open_transport
+
+STAGES = ("parse", "decode", "queue", "end_to_end", "json")
+
+
+def peak_rss_mb():
+    """Return the peak resident set size of this process in megabytes."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak / (1024 * 1024 if sys.platform == "darwin" else 1024)
+
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            cwd=_common.ROOT,
+        ).stdout.strip()
+    except OSError:
+        return None
+
+
+class StageTimer:
+    """
+    Time every frame as it passes through LoRaDevice and DeviceSession.
+
+    Stands in for the session's decoder, to note when decoding finishes,
+    and is registered as a sink, which the session calls once the message
+    is queued. Each frame is timed from the end of the previous one (or
+    from the read that delivered it), so a frame is not charged for the
+    frames ahead of it in the same read.
+    """
+
+    def __init__(self, decoder):
+        self.decoder = decoder
+        self.samples = {stage: [] for stage in STAGES}
+        self.mark = self.parsed = self.decoded = 0.0
+
+    def __getattr__(self, name):
+        return getattr(self.decoder, name)
+
+    def decode_payload(self, payload, typed=False):
+        result = self.decoder.decode_payload(payload, typed=typed)
+        self.decoded = time.perf_counter()
+        return result
+
+    def add_message(self, message):
+        queued = time.perf_counter()
+        self.samples["parse"].append(self.parsed - self.mark)
+        self.samples["decode"].append(self.decoded - self.parsed)
+        self.samples["queue"].append(queued - self.decoded)
+        self.samples["end_to_end"].append(queued - self.mark)
+        # The next frame of a packed payload starts here
+        self.mark = self.parsed = queued
+
+
+def run(url, rate, duration, poll_interval, decoder):
+    """
+    Drive the receive pipeline on this thread and time every frame.
+
+    Bytes are read from the transport and handed to LoRaDevice.handle_data,
+    and LOG packets to DeviceSession.handle_log_packet, as the device's I/O
+    thread would.
+
+    Returns:
+        Tuple of (frame count, elapsed seconds, samples per stage).
+    """
+    transport = open_transport(url, decoder=decoder)
+    if getattr(transport, "simulator", None):
+        transport.simulator.rate = rate
+    ring = MessageRing(capacity=10000)
+    timer = StageTimer(decoder)
+    session = DeviceSession("bench", url, transport, timer, ring, sinks=(timer,))
+    device = session.device
+    device.change_state(packet_pb2.State.RECEIVER)
+
+    json_provider = DefaultJSONProvider(Flask(__name__))
+    samples = timer.samples
+    clock = time.perf_counter
+    transport.timeout = 0.05
+
+    def on_packet(packet):
+        timer.parsed = clock()
+        if packet.type == packet_pb2.PacketType.LOG:
+            session.handle_log_packet(packet)
+        timer.mark = clock()
+        return False
+
+    last_seq = 0
+    start = clock()
+    next_poll = start + poll_interval
+    while clock() - start < duration:
+        data = transport.read(transport.in_waiting or 1)
+        timer.mark = clock()
+        device.handle_data(data, on_packet)
+
+        # Serialize /api/messages the way a polling client would see it
+        if clock() >= next_poll:
+            next_poll += poll_interval
+            before = clock()
+            messages, last_seq, missed = ring.since(last_seq)
+            json_provider.dumps({"messages": messages, "last_seq": last_seq})
+            samples["json"].append(clock() - before)
+
+    elapsed = clock() - start
+    device.change_state(packet_pb2.State.STANDBY)
+    transport.close()
+    return len(samples["end_to_end"]), elapsed, samples
+
+
+def summarize(packets, elapsed, samples):
+    stages = {}
+    for stage, values in samples.items():
+        stages[stage] = {
+            "count": len(values),
+            "p50_us": round((percentile(values, 0.5) or 0) * 1e6, 2),
+            "p99_us": round((percentile(values, 0.99) or 0) * 1e6, 2),
+        }
+    return {
+        "packets": packets,
+        "elapsed_s": round(elapsed, 3),
+        "packets_per_s": round(packets / elapsed, 1) if elapsed else 0,
+        "peak_rss_mb": round(peak_rss_mb(), 1),
+        "stages": stages,
+    }
+
+
+def compare(previous, current):
+    """Print the change of every metric against an earlier result file."""
+
+    def change(old, new):
+        return f"{(new - old) / old * 100:+.1f}%" if old else "n/a"
+
+    print(f"\ncompared with {previous.get('revision') or 'previous run'}:")
+    old, new = previous["results"], current["results"]
+    print(f"  packets/s   {change(old['packets_per_s'], new['packets_per_s'])}")
+    print(f"  peak RSS    {change(old['peak_rss_mb'], new['peak_rss_mb'])}")
+    for stage in STAGES:
+        if stage in old["stages"]:
+            print(
+                f"  {stage:<11} p50 "
+                f"{change(old['stages'][stage]['p50_us'], new['stages'][stage]['p50_us'])}"
+                f"  p99 "
+                f"{change(old['stages'][stage]['p99_us'], new['stages'][stage]['p99_us'])}"
+            )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--url", default="sim://", help="Transport URL to read from")
+    parser.add_argument("--rate", type=float, default=5000, help="Simulator packets/s")
+    parser.add_argument("--duration", type=float, default=5.0, help="Seconds to run")
+    parser.add_argument(
+        "--poll-interval", type=float, default=0.5, help="Seconds between JSON polls"
+    )
+    parser.add_argument("--output", help="Write results to this JSON file")
+    parser.add_argument("--compare", help="Earlier JSON result to compare against")
+    args = parser.parse_args()
+
+    import logging
+
+    logging.getLogger("lora_tool.can_decoder").setLevel(logging.WARNING)
+    decoder = CANDecoder(_common.DBC_PATH)
+
+    packets, elapsed, samples = run(
+        args.url, args.rate, args.duration, args.poll_interval, decoder
+    )
+    report = {
+        "revision": git_revision(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "config": {
+            "url": args.url,
+            "rate": args.rate,
+            "duration": args.duration,
+            "poll_interval": args.poll_interval,
+        },
+        "results": summarize(packets, elapsed, samples),
+    }
+
+    results = report["results"]
+    print(
+        f"{results['packets']} packets in {results['elapsed_s']}s "
+        f"({results['packets_per_s']:,.0f}/s), peak RSS {results['peak_rss_mb']} MB"
+    )
+    print(f"{'stage':<11} {'count':>8} {'p50 us':>10} {'p99 us':>10}")
+    for stage, values in results["stages"].items():
+        print(
+            f"{stage:<11} {values['count']:>8} {values['p50_us']:>10} "
+            f"{values['p99_us']:>10}"
+        )
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    if args.compare:
+        with open(args.compare) as f:
+            compare(json.load(f), report)
+
+
+if __name__ == "__main__":
+    main()
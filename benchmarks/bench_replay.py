@@ -0,0 +1,84 @@
+# benchmarks/bench_replay.py
+"""Replay a raw capture through LoRaDevice and CANDecoder and report throughput."""
+import argparse
+import logging
+import os
+import random
+import tempfile
+import threading
+import time
+
+import _common
+import packet_pb2
+from lora_tool.can_decoder import CANDecoder
+from lora_tool.lora_device import LoRaDevice
+from lora_tool.packet_reader import PacketReader
+from lora_tool.raw_capture import RawCaptureWriter, ReplaySerial
+
+
+def synthetic_capture(path, decoder, count, rate):
+    """Write a capture of LOG packets split into serial-sized chunks."""
+    rng = random.Random(0)
+    stream = b"".join(
+        _common.build_log_frame(payload)
+        for payload in _common.synthetic_payloads(decoder, count)
+    )
+    writer = RawCaptureWriter(path)
+    timestamp = time.time()
+    offset = 0
+    while offset < len(stream):
+        size = rng.randrange(16, 512)
+        writer.write(stream[offset : offset + size], timestamp)
+        timestamp += size / (len(stream) / count) / rate
+        offset += size
+    writer.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--capture", help="Capture file to replay (default synthetic)")
+    parser.add_argument("--count", type=int, default=50_000, help="Synthetic packets")
+    parser.add_argument(
+        "--speed", type=float, default=0, help="Replay speed, 0 for as fast as possible"
+    )
+    args = parser.parse_args()
+
+    logging.getLogger("lora_tool.can_decoder").setLevel(logging.WARNING)
+    decoder = CANDecoder(_common.DBC_PATH)
+
+    path = args.capture
+    if path is None:
+        path = os.path.join(tempfile.mkdtemp(), "synthetic.lcap")
+        synthetic_capture(path, decoder, args.count, rate=1000)
+
+    source = ReplaySerial(path, speed=args.speed, timeout=0.05)
+    device = LoRaDevice(source)
+    decoded = 0
+
+    def callback(packet):
+        nonlocal decoded
+        if packet.type == packet_pb2.PacketType.LOG:
+            decoder.decode_payload(packet.log.payload)
+            decoded += 1
+        return False
+
+    reader = PacketReader(device, callback, read_timeout=None)
+    thread = threading.Thread(target=reader.run, daemon=True)
+    start = time.perf_counter()
+    thread.start()
+    while not source.finished:
+        time.sleep(0.01)
+    reader.stop_event.set()
+    thread.join()
+    elapsed = time.perf_counter() - start
+
+    stats = reader.stats()
+    print(f"capture: {path} ({source.reader.count} records)")
+    print(f"packets: {decoded} in {elapsed:.2f}s")
+    print(f"   rate: {_common.format_rate(decoded, elapsed)}")
+    print(f"  bytes: {_common.format_rate(stats['bytes_read'], elapsed)}")
+    source.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+# benchmarks/bench_startup.py
+"""Measure cold start to the first decoded frame and the first web request, with and without the DBC plan cache."""
+import argparse
+import hashlib
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import _common
+from lora_tool.can_decoder import cache_path_for
+
+# Child process: construct the decoder and decode one frame
+DECODER_CHILD = """
+import sys, time
+from lora_tool.can_decoder import CANDecoder
+decoder = CANDecoder(sys.argv[2], cache_dir=sys.argv[3])
+plan = next(iter(decoder.plans.values()))
+decoder.decode_payload(plan.frame_id.to_bytes(4, "big") + bytes(plan.length))
+print(time.time() - float(sys.argv[1]))
+"""
+
+# Child process: import the web app and serve one request
+WEBAPP_CHILD = """
+import sys, time
+import lora_tool.webapp as webapp
+webapp.app.test_client().get("/api/schema")
+print(time.time() - float(sys.argv[1]))
+"""
+
+
+def synthetic_dbc(path, messages, signals=8):
+    """Write a DBC with the given number of 8-byte messages."""
+    lines = ['VERSION ""', "", "NS_ :", "", "BS_:", "", "BU_: ECU", ""]
+    values = []
+    for index in range(messages):
+        frame_id = 0x100 + index
+        lines.append(f"BO_ {frame_id} Message_{index}: 8 ECU")
+        width = 64 // signals
+        for signal in range(signals):
+            lines.append(
+                f" SG_ Signal_{index}_{signal} : {signal * width}|{width}@1+ "
+                f'(0.1,-40) [-40|215] "unit" ECU'
+            )
+        values.append(f'VAL_ {frame_id} Signal_{index}_0 0 "Off" 1 "On" 2 "Fault" ;')
+        lines.append("")
+    with open(path, "w") as f:
+        f.write("\n".join(lines + values) + "\n")
+
+
+def run_child(code, *args):
+    """Run a child interpreter and return the seconds it reports."""
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(
+        [os.path.join(_common.ROOT, "src"), _common.ROOT, env.get("PYTHONPATH", "")]
+    )
+    output = subprocess.run(
+        [sys.executable, "-c", code, str(time.time()), *args],
+        env=env,
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stdout
+    return float(output.split()[-1])
+
+
+def clear_cache(path):
+    if os.path.exists(path):
+        os.remove(path)
+
+
+def measure(label, runs, code, args, cache_path):
+    """Report median start times with a cold and a warm plan cache."""
+    cold = []
+    for _ in range(runs):
+        clear_cache(cache_path)
+        cold.append(run_child(code, *args))
+    warm = [run_child(code, *args) for _ in range(runs)]
+    cold_ms = statistics.median(cold) * 1000
+    warm_ms = statistics.median(warm) * 1000
+    print(
+        f"{label:<28} no cache {cold_ms:8.1f} ms   cached {warm_ms:8.1f} ms   "
+        f"speedup {cold_ms / warm_ms:4.1f}x"
+    )
+
+
+def dbc_cache_path(dbc_path, cache_dir=None):
+    with open(dbc_path, "rb") as f:
+        digest = hashlib.sha256(f.read()).hexdigest()
+    return cache_path_for(dbc_path, digest, cache_dir)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--runs", type=int, default=5, help="Runs per measurement")
+    parser.add_argument(
+        "--messages",
+        type=int,
+        default=1000,
+        help="Messages in the synthetic large DBC",
+    )
+    args = parser.parse_args()
+
+    temp_dir = tempfile.mkdtemp()
+    cache_dir = os.path.join(temp_dir, "cache")
+    large_dbc = os.path.join(temp_dir, "large.dbc")
+    synthetic_dbc(large_dbc, args.messages)
+
+    print("time from process start, median of", args.runs, "runs")
+    for label, dbc_path in (
+        ("first decode, telemetry.dbc", _common.DBC_PATH),
+        (f"first decode, {args.messages} messages", large_dbc),
+    ):
+        measure(
+            label,
+            args.runs,
+            DECODER_CHILD,
+            (dbc_path, cache_dir),
+            dbc_cache_path(dbc_path, cache_dir),
+        )
+    measure(
+        "first request, webapp",
+        args.runs,
+        WEBAPP_CHILD,
+        (),
+        dbc_cache_path(_common.DBC_PATH),
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,303 @@
+# lora_tool/airtime.py
+import math
+import threading
+import time
+import logging
+from collections import deque
+from concurrent.futures import Future
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger("lora_tool.airtime")
+
+# Radio settings assumed until the device has reported its own
+DEFAULT_SETTINGS = {
+    "Spreading Factor": 7,
+    "Bandwidth": 500.0,
+    "Coding Rate": 5,
+    "Preamble": 8,
+    "CRC Enabled": True,
+}
+
+# Seconds to wait for the device to acknowledge a transmission
+ACK_TIMEOUT = 5.0
+
+
+def time_on_air(
+    payload_length,
+    spreading_factor=7,
+    bandwidth=125.0,
+    coding_rate=5,
+    preamble=8,
+    crc=True,
+    explicit_header=True,
+    low_data_rate=None,
+):
+    """
+    Compute the time on air of a LoRa frame (Semtech AN1200.13).
+
+    Args:
+        payload_length: Payload size in bytes.
+        spreading_factor: Spreading factor (6-12).
+        bandwidth: Bandwidth in kHz.
+        coding_rate: Coding rate denominator (5-8 for 4/5-4/8).
+        preamble: Number of programmed preamble symbols.
+        crc: Whether the payload CRC is enabled.
+        explicit_header: Whether the frame carries an explicit header.
+        low_data_rate: Low data rate optimization; by default enabled when
+            a symbol lasts longer than 16 ms, as the radio requires.
+
+    Returns:
+        Time on air in seconds.
+    """
+    symbol_time = (2**spreading_factor) / (bandwidth * 1000.0)
+    if low_data_rate is None:
+        low_data_rate = symbol_time > 0.016
+
+    # Coding rate 4/5 is CR 1 in the datasheet formula
+    cr = coding_rate - 4 if coding_rate > 4 else coding_rate
+    numerator = (
+        8 * payload_length
+        - 4 * spreading_factor
+        + 28
+        + 16 * int(crc)
+        - 20 * int(not explicit_header)
+    )
+    denominator = 4 * (spreading_factor - 2 * int(low_data_rate))
+    payload_symbols = 8 + max(math.ceil(numerator / denominator) * (cr + 4), 0)
+
+    preamble_time = (preamble + 4.25) * symbol_time
+    return preamble_time + payload_symbols * symbol_time
+
+
+def settings_time_on_air(settings, payload_length):
+    """
+    Compute the time on air of a frame using LoRaDevice.lora_settings.
+
+    Args:
+        settings: Settings dictionary as reported by the device.
+        payload_length: Payload size in bytes.
+
+    Returns:
+        Time on air in seconds.
+    """
+    merged = dict(DEFAULT_SETTINGS, **(settings or {}))
+    return time_on_air(
+        payload_length,
+        spreading_factor=int(merged["Spreading Factor"]),
+        bandwidth=float(merged["Bandwidth"]),
+        coding_rate=int(merged["Coding Rate"]),
+        preamble=int(merged["Preamble"]),
+        crc=bool(merged["CRC Enabled"]),
+    )
+
+
+class TransmitScheduler:
+    def __init__(
+        self,
+        device,
+        duty_cycle=None,
+        duty_cycle_window=3600.0,
+        guard_time=0.0,
+        ack_timeout=ACK_TIMEOUT,
+    ):
+        """
+        Queue transmissions and send them as fast as the radio allows.
+
+        Each frame is held back until the device has acknowledged the
+        previous one and it has finished transmitting, using the time on air
+        for the device's current settings, and, if a duty cycle is set,
+        until enough airtime is left in the sliding window. Callers get a
+        Future back immediately.
+
+        Args:
+            device: The LoRaDevice to transmit through.
+            duty_cycle: Maximum fraction of time on air (e.g. 0.01), or None.
+            duty_cycle_window: Window the duty cycle is measured over, in seconds.
+            guard_time: Extra gap between frames, in seconds.
+            ack_timeout: Seconds to wait for the device's ACK of each frame.
+        """
+        self.device = device
+        self.duty_cycle = duty_cycle
+        self.duty_cycle_window = duty_cycle_window
+        self.guard_time = guard_time
+        self.ack_timeout = ack_timeout
+
+        self.queue = deque()
+        self.condition = threading.Condition()
+        self.stop_event = threading.Event()
+        self.thread = None
+
+        self.sent = 0
+        self.failed = 0
+        self.bytes_sent = 0
+        self.airtime_total = 0.0
+        # (monotonic send time, airtime) of frames inside the duty cycle window
+        self.history = deque()
+        # (monotonic send time, bytes) of recent frames, for throughput
+        self.recent = deque(maxlen=1000)
+        self._ready_at = 0.0
+
+    def submit(self, payload):
+        """
+        Queue a payload for transmission.
+
+        Args:
+            payload: The bytes to transmit.
+
+        Returns:
+            A Future resolved with the send time, ACK time and time on air
+            once the device has acknowledged the frame. It fails with
+            TimeoutError if no ACK arrives within ack_timeout.
+        """
+        future = Future()
+        with self.condition:
+            self.queue.append((payload, future, time.time()))
+            self.condition.notify()
+        if self.thread is None or not self.thread.is_alive():
+            self.start()
+        return future
+
+    def _duty_cycle_ready(self, now, airtime):
+        """Return the earliest time the duty cycle budget has room for airtime."""
+        window = self.duty_cycle_window
+        while self.history and self.history[0][0] <= now - window:
+            self.history.popleft()
+        if not self.duty_cycle:
+            return now
+
+        budget = self.duty_cycle * window
+        used = sum(spent for _, spent in self.history)
+        ready = now
+        for sent_at, spent in self.history:
+            if used + airtime <= budget:
+                break
+            # Wait for this frame to leave the window
+            used -= spent
+            ready = sent_at + window
+        return ready
+
+    def _next(self):
+        """Wait for a queued payload; None once stopped."""
+        with self.condition:
+            while not self.queue:
+                if self.stop_event.is_set():
+                    return None
+                self.condition.wait(0.5)
+            return self.queue.popleft()
+
+    def run(self):
+        """Send queued payloads until stopped."""
+        while True:
+            item = self._next()
+            if item is None:
+                return
+            payload, future, queued_at = item
+            if not future.set_running_or_notify_cancel():
+                continue
+
+            airtime = settings_time_on_air(self.device.lora_settings, len(payload))
+            ready = max(
+                self._ready_at, self._duty_cycle_ready(time.monotonic(), airtime)
+            )
+            delay = ready - time.monotonic()
+            if delay > 0 and self.stop_event.wait(delay):
+                future.set_exception(RuntimeError("Transmitter stopped"))
+                return
+
+            sent_at = time.time()
+            try:
+                ack = self.device.transmit_now(payload)
+            except Exception as e:
+                logger.error(f"Error transmitting: {e}")
+                future.set_exception(e)
+                continue
+
+            # The next frame waits for this one's ACK, so the device never
+            # has more than one transmission queued
+            now = time.monotonic()
+            self._ready_at = now + airtime + self.guard_time
+            # The radio may have sent the frame even if the ACK was lost
+            self.history.append((now, airtime))
+            response = self.device.wait_response(ack, self.ack_timeout)
+            if response is None or not response.ack:
+                self.failed += 1
+                if response is None:
+                    error = TimeoutError("Transmission not acknowledged")
+                else:
+                    error = RuntimeError("Transmission rejected by the device")
+                logger.warning(str(error))
+                future.set_exception(error)
+                continue
+
+            self.recent.append((now, len(payload)))
+            self.sent += 1
+            self.bytes_sent += len(payload)
+            self.airtime_total += airtime
+            future.set_result(
+                {
+                    "queued_at": queued_at,
+                    "sent_at": sent_at,
+                    "acked_at": time.time(),
+                    "airtime": airtime,
+                }
+            )
+
+    def start(self):
+        """Run the scheduler in a background daemon thread."""
+        self.stop_event.clear()
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def stop(self, timeout=1.0):
+        """
+        Stop the scheduler and cancel transmissions still queued.
+
+        Args:
+            timeout: Maximum time to wait for the thread, in seconds.
+        """
+        self.stop_event.set()
+        with self.condition:
+            pending, self.queue = list(self.queue), deque()
+            self.condition.notify()
+        for _, future, _ in pending:
+            future.cancel()
+        if self.thread and self.thread is not threading.current_thread():
+            self.thread.join(timeout)
+
+    def stats(self, payload_length=12):
+        """
+        Return transmit counters and throughput.
+
+        Args:
+            payload_length: Frame size used for the theoretical maximum rate.
+
+        Returns:
+            Dictionary with queue, send and failure counts, achieved packets
+            and bytes per second over recent frames, and the highest rate the
+            current settings and duty cycle allow.
+        """
+        airtime = settings_time_on_air(self.device.lora_settings, payload_length)
+        max_rate = 1.0 / (airtime + self.guard_time)
+        if self.duty_cycle:
+            max_rate = min(max_rate, self.duty_cycle / airtime)
+
+        recent = list(self.recent)
+        packets_per_s = bytes_per_s = None
+        if len(recent) > 1:
+            elapsed = recent[-1][0] - recent[0][0]
+            if elapsed > 0:
+                packets_per_s = round((len(recent) - 1) / elapsed, 2)
+                bytes_per_s = round(sum(size for _, size in recent[1:]) / elapsed, 1)
+
+        return {
+            "queued": len(self.queue),
+            "sent": self.sent,
+            "failed": self.failed,
+            "bytes_sent": self.bytes_sent,
+            "airtime_s": round(self.airtime_total, 3),
+            "packets_per_s": packets_per_s,
+            "bytes_per_s": bytes_per_s,
+            "max_packets_per_s": round(max_rate, 2),
+            "duty_cycle": self.duty_cycle,
+        }
@@ -0,0 +1,174 @@
+# lora_tool/batch_decoder.py
+import logging
+import numpy as np
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger("lora_tool.batch_decoder")
+
+# Payload layout: 4-byte big-endian CAN ID followed by up to 8 data bytes
+ID_SIZE = 4
+DATA_SIZE = 8
+ROW_SIZE = ID_SIZE + DATA_SIZE
+
+
+def _payload_matrix(payloads):
+    """
+    Pack payloads into an (N, 12) uint8 matrix, zero-padding short frames.
+
+    Returns:
+        Tuple of (matrix, data_lengths).
+    """
+    lengths = np.fromiter(map(len, payloads), dtype=np.int64, count=len(payloads))
+    # A trailing zero byte stands in for the padding of short frames
+    flat = np.frombuffer(b"".join(payloads) + b"\0", dtype=np.uint8)
+    if len(payloads) and lengths.min() == ROW_SIZE and lengths.max() == ROW_SIZE:
+        matrix = flat[:-1].reshape(len(payloads), ROW_SIZE)
+    else:
+        columns = np.arange(ROW_SIZE)
+        starts = np.cumsum(lengths) - lengths
+        positions = starts[:, None] + columns
+        positions[columns >= lengths[:, None]] = len(flat) - 1
+        matrix = flat[positions]
+    return matrix, np.minimum(lengths, ROW_SIZE) - ID_SIZE
+
+
+def _extract(signal, little_words, big_words):
+    """
+    Extract one signal for every row of a frame group.
+
+    Args:
+        signal: The SignalPlan describing the bit layout.
+        little_words: Data bytes of each row read as a little-endian uint64.
+        big_words: Data bytes of each row read as a big-endian uint64.
+
+    Returns:
+        NumPy array of physical values.
+    """
+    length = signal.length
+    if signal.byte_order == "little_endian":
+        raw = little_words >> np.uint64(signal.start)
+    else:
+        # DBC big-endian start bits name the MSB in sawtooth numbering
+        msb = 8 * (signal.start // 8) + 7 - signal.start % 8
+        raw = big_words >> np.uint64(DATA_SIZE * 8 - msb - length)
+    if length < 64:
+        raw = raw & np.uint64((1 << length) - 1)
+
+    if signal.is_float:
+        if length == 32:
+            values = raw.astype(np.uint32).view(np.float32).astype(np.float64)
+        else:
+            values = raw.view(np.float64)
+    elif signal.is_signed:
+        if length < 64:
+            sign = np.int64(1 << (length - 1))
+            values = (raw.astype(np.int64) ^ sign) - sign
+        else:
+            values = raw.view(np.int64)
+    else:
+        values = raw.astype(np.int64)
+
+    if signal.scale == 1 and signal.offset == 0:
+        return values
+    if isinstance(signal.scale, int) and isinstance(signal.offset, int):
+        return values * signal.scale + signal.offset
+    return values * float(signal.scale) + float(signal.offset)
+
+
+def _decode_fallback(plan, payloads, index):
+    """Decode a frame group one frame at a time (multiplexed messages)."""
+    columns = {name: np.full(len(index), np.nan) for name in plan.signals}
+    for row, i in enumerate(index):
+        decoded = plan.message.decode(
+            bytes(payloads[i][ID_SIZE:]), decode_choices=False
+        )
+        for name, value in decoded.items():
+            columns[name][row] = value
+    return columns
+
+
+def decode_batch(plans, payloads):
+    """
+    Decode many payloads at once, one vectorized pass per CAN ID.
+
+    Frames are grouped by CAN ID and every signal of a group is extracted
+    for all of its frames with NumPy shifts and masks, using the start bit,
+    length, byte order, sign, scale and offset from the decode plan.
+    Enumerated signals are scaled like any other and not mapped to their
+    names, as cantools does with decode_choices=False.
+
+    Args:
+        plans: Mapping of frame ID to DecodePlan.
+        payloads: Sequence of payloads (4-byte CAN ID followed by data).
+
+    Returns:
+        Dictionary with:
+            messages: message name -> {"can_id", "index", "signals"}, where
+                index holds the positions of the frames in payloads and
+                signals maps each signal name to an array of values.
+            unknown: positions of frames whose CAN ID is not in the DBC.
+            errors: positions of frames that could not be decoded.
+    """
+    result = {
+        "messages": {},
+        "unknown": np.empty(0, dtype=np.int64),
+        "errors": np.empty(0, dtype=np.int64),
+    }
+    if not len(payloads):
+        return result
+
+    matrix, data_lengths = _payload_matrix(payloads)
+    can_ids = matrix[:, :ID_SIZE].copy().view(">u4").ravel()
+    data = matrix[:, ID_SIZE:].copy()
+    little_words = data.view("<u8").ravel()
+    big_words = data.view(">u8").ravel()
+
+    unknown = []
+    errors = [np.flatnonzero(data_lengths < 0)]
+
+    # Sort once so every CAN ID owns a contiguous run of positions
+    candidates = np.flatnonzero(data_lengths >= 0)
+    order = candidates[np.argsort(can_ids[candidates], kind="stable")]
+    group_ids, starts = np.unique(can_ids[order], return_index=True)
+    bounds = np.append(starts, len(order))
+    for group, can_id in enumerate(group_ids.tolist()):
+        index = order[bounds[group] : bounds[group + 1]]
+        plan = plans.get(can_id)
+        if plan is None:
+            unknown.append(index)
+            continue
+
+        # Frames shorter than the message definition cannot be decoded
+        short = data_lengths[index] < plan.length
+        if short.any():
+            errors.append(index[short])
+            index = index[~short]
+            if not len(index):
+                continue
+
+        try:
+            if plan.multiplexed:
+                signals = _decode_fallback(plan, payloads, index)
+            else:
+                group_little = little_words[index]
+                group_big = big_words[index]
+                signals = {
+                    name: _extract(signal, group_little, group_big)
+                    for name, signal in plan.signals.items()
+                }
+        except Exception as e:
+            logger.error(f"Error batch decoding {plan.name} (ID: 0x{can_id:X}): {e}")
+            errors.append(index)
+            continue
+
+        result["messages"][plan.name] = {
+            "can_id": can_id,
+            "index": index,
+            "signals": signals,
+        }
+
+    if unknown:
+        result["unknown"] = np.sort(np.concatenate(unknown))
+    result["errors"] = np.sort(np.concatenate(errors))
+    return result
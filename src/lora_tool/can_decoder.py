@@ -1,28 +1,725 @@
 # lora_tool/can_decoder.py
+import os
+import sys
+import json
 import struct
+import hashlib
 import logging
+import argparse
+import tempfile
+import threading
 import traceback
-import cantools
+import subprocess
+from collections import OrderedDict
+from lora_tool.metrics import DECODED, DECODE_ERRORS, UNKNOWN_IDS
+from lora_tool.can_packing import is_packed, unpack_payload
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger("lora_tool.can_decoder")
 
+# Bumped whenever the layout of the compiled plan cache changes
+CACHE_FORMAT = 3
+
+# Fields of a SignalPlan that are stored in the plan cache
+SIGNAL_FIELDS = (
+    "name",
+    "unit",
+    "scale",
+    "offset",
+    "minimum",
+    "maximum",
+    "choices",
+    "start",
+    "length",
+    "byte_order",
+    "is_signed",
+    "is_float",
+    "deadband",
+)
+
+# Signal attribute giving the change below which delta clients are not
+# sent a new value
+DEADBAND_ATTRIBUTE = "Deadband"
+
+
+def default_cache_dir():
+    """
+    Return the directory compiled plans are cached in by default.
+
+    $LORA_TOOL_CACHE_DIR if set, otherwise lora_tool/dbc in the user cache
+    directory ($XDG_CACHE_HOME, by default ~/.cache), so nothing is
+    written next to a DBC inside the installed package.
+    """
+    override = os.environ.get("LORA_TOOL_CACHE_DIR")
+    if override:
+        return override
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(
+        os.path.expanduser("~"), ".cache"
+    )
+    return os.path.join(base, "lora_tool", "dbc")
+
+
+def cache_path_for(dbc_path, digest, cache_dir=None):
+    """
+    Return where the compiled plans of a DBC are cached.
+
+    Args:
+        dbc_path: Path of the DBC file.
+        digest: SHA-256 hex digest of the DBC contents.
+        cache_dir: Cache directory (default from default_cache_dir()).
+
+    Returns:
+        Path of the cache file for this exact DBC content. The name also
+        carries a hash of the DBC's location, so DBCs with the same file
+        name in different folders do not replace each other's cache.
+    """
+    if cache_dir is None:
+        cache_dir = default_cache_dir()
+    dbc_path = os.path.abspath(dbc_path)
+    location = hashlib.sha256(dbc_path.encode()).hexdigest()[:8]
+    name = os.path.basename(dbc_path)
+    return os.path.join(cache_dir, f"{name}.{location}.{digest[:16]}.jsonl")
+
+
+class SignalPlan:
+    """Decode and display rules for one signal, resolved at DBC load time."""
+
+    __slots__ = (
+        "name",
+        "unit",
+        "scale",
+        "offset",
+        "minimum",
+        "maximum",
+        "choices",
+        "start",
+        "length",
+        "byte_order",
+        "is_signed",
+        "is_float",
+        "deadband",
+        "shift",
+        "mask",
+        "is_integer",
+        "choice_text",
+    )
+
+    def __init__(self, fields):
+        """
+        Args:
+            fields: Dictionary with the SIGNAL_FIELDS, from from_signal() or
+                the plan cache.
+        """
+        self.name = fields["name"]
+        self.unit = fields["unit"] or ""
+        self.scale = fields["scale"]
+        self.offset = fields["offset"]
+        self.minimum = fields["minimum"]
+        self.maximum = fields["maximum"]
+        self.choices = (
+            {int(value): str(name) for value, name in fields["choices"].items()}
+            if fields["choices"]
+            else None
+        )
+        self.start = fields["start"]
+        self.length = fields["length"]
+        self.byte_order = fields["byte_order"]
+        self.is_signed = fields["is_signed"]
+        self.is_float = fields["is_float"]
+        self.deadband = fields["deadband"]
+        # Bit position of the signal's LSB in the data read as one integer
+        if self.byte_order == "little_endian":
+            self.shift = self.start
+        else:
+            # DBC big-endian start bits name the MSB in sawtooth numbering
+            msb = 8 * (self.start // 8) + 7 - self.start % 8
+            self.shift = -(msb + self.length)
+        self.mask = (1 << self.length) - 1
+        # Whether decoding yields integers (no or integer scaling)
+        self.is_integer = not self.is_float and (
+            (self.scale == 1 and self.offset == 0)
+            or (isinstance(self.scale, int) and isinstance(self.offset, int))
+        )
+
+        # Display strings for enumerated values, e.g. "1 (Fault) V"
+        self.choice_text = {}
+        for value, name in (self.choices or {}).items():
+            text = f"{value} ({name})"
+            if self.unit and self.unit not in text:
+                text = f"{text} {self.unit}"
+            self.choice_text[value] = text
+
+    @classmethod
+    def from_signal(cls, signal):
+        """Build the plan for a cantools signal."""
+        attributes = signal.dbc.attributes if signal.dbc else {}
+        deadband = attributes.get(DEADBAND_ATTRIBUTE)
+        return cls(
+            {
+                "name": signal.name,
+                "unit": signal.unit,
+                "scale": signal.scale,
+                "offset": signal.offset,
+                "minimum": signal.minimum,
+                "maximum": signal.maximum,
+                "choices": signal.choices,
+                "start": signal.start,
+                "length": signal.length,
+                "byte_order": signal.byte_order,
+                "is_signed": signal.is_signed,
+                "is_float": signal.is_float,
+                "deadband": deadband.value if deadband else None,
+            }
+        )
+
+    def to_dict(self):
+        """Return the fields stored in the plan cache."""
+        fields = {name: getattr(self, name) for name in SIGNAL_FIELDS}
+        if self.choices:
+            # JSON object keys are strings
+            fields["choices"] = {
+                str(value): name for value, name in self.choices.items()
+            }
+        return fields
+
+    def extract(self, little, big, bits):
+        """
+        Extract the raw value from a frame's data.
+
+        Args:
+            little: The data bytes read as one little-endian integer.
+            big: The data bytes read as one big-endian integer.
+            bits: Number of data bits.
+
+        Returns:
+            The raw integer, or the float for float signals.
+        """
+        if self.shift >= 0:
+            raw = (little >> self.shift) & self.mask
+        else:
+            raw = (big >> (bits + self.shift)) & self.mask
+        if self.is_float:
+            if self.length == 32:
+                return struct.unpack("<f", raw.to_bytes(4, "little"))[0]
+            return struct.unpack("<d", raw.to_bytes(8, "little"))[0]
+        if self.is_signed and raw >> (self.length - 1):
+            raw -= 1 << self.length
+        return raw
+
+    def scaled(self, raw):
+        """Apply the signal's scale and offset to a raw value."""
+        if self.scale == 1 and self.offset == 0:
+            return raw
+        return raw * self.scale + self.offset
+
+    def schema(self):
+        """Return the unit, scaling, range and choices for the schema endpoint."""
+        return {
+            "unit": self.unit,
+            "scale": self.scale,
+            "offset": self.offset,
+            "minimum": self.minimum,
+            "maximum": self.maximum,
+            "deadband": self.deadband,
+            # JSON object keys are strings
+            "choices": (
+                {str(value): name for value, name in self.choices.items()}
+                if self.choices
+                else None
+            ),
+        }
+
+    def format(self, value):
+        """Return the display value for a decoded signal value."""
+        if not isinstance(value, (int, float)):
+            # NamedSignalValue from cantools
+            return self.choice_text[value.value]
+        # Round floating point values
+        if isinstance(value, float):
+            value = round(value, 2)
+        if self.unit:
+            return f"{value} {self.unit}"
+        return value
+
+
+class DecodePlan:
+    """Everything needed to decode one frame ID, resolved at DBC load time."""
+
+    __slots__ = (
+        "frame_id",
+        "name",
+        "length",
+        "multiplexed",
+        "signals",
+        "loader",
+        "_message",
+    )
+
+    def __init__(self, frame_id, name, length, multiplexed, signals, loader=None):
+        """
+        Args:
+            frame_id: The CAN ID.
+            name: The message name.
+            length: Data length in bytes.
+            multiplexed: Whether the message is multiplexed; those are
+                decoded by cantools.
+            signals: Dictionary of signal name to SignalPlan.
+            loader: Called with the frame ID to look up the cantools message
+                when it is first needed.
+        """
+        self.frame_id = frame_id
+        self.name = name
+        self.length = length
+        self.multiplexed = multiplexed
+        self.signals = signals
+        self.loader = loader
+        self._message = None
+
+    @classmethod
+    def from_message(cls, message):
+        """Build the plan for a cantools message."""
+        plan = cls(
+            message.frame_id,
+            message.name,
+            message.length,
+            message.is_multiplexed(),
+            {signal.name: SignalPlan.from_signal(signal) for signal in message.signals},
+        )
+        plan._message = message
+        return plan
+
+    @classmethod
+    def from_dict(cls, fields, loader=None):
+        """Build a plan from its plan cache entry."""
+        return cls(
+            fields["frame_id"],
+            fields["name"],
+            fields["length"],
+            fields["multiplexed"],
+            {signal["name"]: SignalPlan(signal) for signal in fields["signals"]},
+            loader,
+        )
+
+    def to_dict(self):
+        """Return the plan cache entry for this message."""
+        return {
+            "frame_id": self.frame_id,
+            "name": self.name,
+            "length": self.length,
+            "multiplexed": self.multiplexed,
+            "signals": [signal.to_dict() for signal in self.signals.values()],
+        }
+
+    @property
+    def message(self):
+        """The cantools message, loading the DBC if it was not parsed yet."""
+        if self._message is None:
+            self._message = self.loader(self.frame_id)
+        return self._message
+
+    def decode(self, data, typed=False):
+        """
+        Decode a frame's data.
+
+        Args:
+            data: The data bytes.
+            typed: Return numbers (choices as their values, not names) instead
+                of display strings.
+
+        Returns:
+            Dictionary of signal name to value.
+        """
+        if self.multiplexed:
+            if typed:
+                return self.message.decode(data, decode_choices=False)
+            decoded = self.message.decode(data)
+            signals = self.signals
+            return {
+                name: signals[name].format(value) for name, value in decoded.items()
+            }
+
+        if len(data) < self.length:
+            raise ValueError(
+                f"Wrong data size: {len(data)} instead of {self.length} bytes"
+            )
+        data = data[: self.length]
+        little = int.from_bytes(data, "little")
+        big = int.from_bytes(data, "big")
+        bits = 8 * self.length
+
+        result = {}
+        for name, signal in self.signals.items():
+            raw = signal.extract(little, big, bits)
+            if typed:
+                result[name] = signal.scaled(raw)
+            elif signal.choices is not None and raw in signal.choice_text:
+                result[name] = signal.choice_text[raw]
+            else:
+                result[name] = signal.format(signal.scaled(raw))
+        return result
+
+
+class DecodeTables:
+    """
+    The decode plans compiled from one version of a DBC.
+
+    A reload builds new tables and replaces the decoder's reference in one
+    assignment, so a frame is always decoded entirely by one version. The
+    decode results cached for this version go with them.
+    """
+
+    __slots__ = (
+        "dbc_path",
+        "dbc_hash",
+        "version",
+        "plans",
+        "from_cache",
+        "_db",
+        "results",
+    )
+
+    def __init__(self, dbc_path, dbc_hash, version):
+        self.dbc_path = dbc_path
+        self.dbc_hash = dbc_hash
+        self.version = version
+        self.plans = {}
+        self.from_cache = False
+        self._db = None
+        # payload -> decode result, least recently used first; one cache
+        # for display results and one for typed results
+        self.results = (OrderedDict(), OrderedDict())
+
+    @property
+    def db(self):
+        """The cantools database, parsed on first use."""
+        if self._db is None:
+            import cantools
+
+            self._db = cantools.database.load_file(self.dbc_path)
+        return self._db
+
+    def message(self, frame_id):
+        """Return the cantools message for a frame ID."""
+        return self.db.get_message_by_frame_id(frame_id)
+
 
 class CANDecoder:
-    def __init__(self, dbc_path):
-        """Initialize the CAN decoder with a DBC file."""
+    def __init__(self, dbc_path, cache_dir=None, lru_size=1024):
+        """
+        Initialize the CAN decoder with a DBC file.
+
+        The decode plans compiled from a DBC are cached as JSON keyed by the
+        SHA-256 of its contents. When the cache matches, the plans are loaded
+        from it and the DBC is only parsed with cantools if a multiplexed
+        message or the db attribute needs it.
+
+        Args:
+            dbc_path: Path of the DBC file.
+            cache_dir: Directory for the plan cache (default from
+                default_cache_dir()), or False to always parse the DBC.
+                If the directory cannot be written, the cache is disabled.
+            lru_size: Number of decode results kept, per output mode, for
+                frames that repeat byte for byte; 0 disables the cache.
+        """
+        self.dbc_path = dbc_path
+        self.cache_dir = cache_dir
+        self.lru_size = lru_size
+        self.lru_hits = 0
+        self.lru_misses = 0
+        self.lru_evictions = 0
+        # IDs already reported, so a stream of bad frames logs once per ID
+        self.reported_ids = set()
+        # Current DecodeTables, or None if the DBC could not be loaded
+        self.tables = None
+        self._last_version = 0
+        self.reload_lock = threading.Lock()
+        # Called with the new DecodeTables after every reload
+        self.reload_callbacks = []
+        self.reload_error = None
+
+        self.stop_event = threading.Event()
+        self.watch_thread = None
         try:
-            self.db = cantools.database.load_file(dbc_path)
-            self.message_by_id = {msg.frame_id: msg for msg in self.db.messages}
+            self.tables = self._compile()
             logger.info(f"Successfully loaded DBC file: {dbc_path}")
-            logger.info(f"Found {len(self.db.messages)} messages in DBC file")
+            logger.info(f"Found {len(self.tables.plans)} messages in DBC file")
         except Exception as e:
             logger.error(f"Error loading DBC file: {e}")
-            self.db = None
-            self.message_by_id = {}
+            self.reload_error = str(e)
+
+    @property
+    def loaded(self):
+        """Whether a DBC version has been loaded."""
+        return self.tables is not None
+
+    @property
+    def plans(self):
+        """Decode plans of the current DBC version, keyed by frame ID."""
+        tables = self.tables
+        return tables.plans if tables else {}
+
+    @property
+    def db(self):
+        """The cantools database of the current DBC version."""
+        tables = self.tables
+        return tables.db if tables else None
+
+    @property
+    def version(self):
+        """Number of the current DBC version, counting loads from 1."""
+        tables = self.tables
+        return tables.version if tables else 0
 
-    def decode_payload(self, payload):
+    @property
+    def dbc_hash(self):
+        """SHA-256 of the current DBC version."""
+        tables = self.tables
+        return tables.dbc_hash if tables else None
+
+    @property
+    def from_cache(self):
+        """Whether the current plans were loaded from the plan cache."""
+        tables = self.tables
+        return tables.from_cache if tables else False
+
+    def _compile(self, dbc_hash=None):
+        """
+        Build the decode tables of the DBC file as it is now.
+
+        Args:
+            dbc_hash: SHA-256 of the contents, if already computed.
+
+        Returns:
+            New DecodeTables; raises if the DBC cannot be parsed.
+        """
+        if dbc_hash is None:
+            with open(self.dbc_path, "rb") as f:
+                dbc_hash = hashlib.sha256(f.read()).hexdigest()
+        tables = DecodeTables(self.dbc_path, dbc_hash, self._last_version + 1)
+
+        cache_path = None
+        if self.cache_dir is not False:
+            cache_path = cache_path_for(self.dbc_path, dbc_hash, self.cache_dir)
+            tables.plans = self._load_cache(cache_path, tables)
+        if tables.plans:
+            tables.from_cache = True
+        else:
+            tables.plans = {
+                message.frame_id: DecodePlan.from_message(message)
+                for message in tables.db.messages
+            }
+            if cache_path:
+                self._save_cache(cache_path, tables)
+        self._last_version = tables.version
+        return tables
+
+    def _load_cache(self, cache_path, tables):
+        """Return the plans from the cache, or {} if there is no valid cache."""
+        plans = {}
+        try:
+            with open(cache_path) as f:
+                header = json.loads(f.readline())
+                if (
+                    header.get("format") != CACHE_FORMAT
+                    or header.get("sha256") != tables.dbc_hash
+                ):
+                    return {}
+                # One message per line, so a reload parsing a large cache
+                # never holds the GIL for long
+                for line in f:
+                    plan = DecodePlan.from_dict(json.loads(line), tables.message)
+                    plans[plan.frame_id] = plan
+        except (FileNotFoundError, NotADirectoryError):
+            return {}
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable DBC cache {cache_path}: {e}")
+            return {}
+        logger.info(f"Loaded decode plans from {cache_path}")
+        return plans
+
+    def _save_cache(self, cache_path, tables):
+        """Write the plans to the cache, replacing caches of older DBC versions."""
+        header = {"format": CACHE_FORMAT, "sha256": tables.dbc_hash}
+        cache_dir = os.path.dirname(cache_path)
+        try:
+            os.makedirs(cache_dir, exist_ok=True)
+            # Write and rename so a concurrent start never reads half a file
+            fd, temp_path = tempfile.mkstemp(dir=cache_dir, suffix=".tmp")
+            with os.fdopen(fd, "w") as f:
+                f.write(json.dumps(header) + "\n")
+                for plan in tables.plans.values():
+                    f.write(json.dumps(plan.to_dict()) + "\n")
+            os.replace(temp_path, cache_path)
+        except Exception as e:
+            # Read-only install or home: parse the DBC in-process from now on
+            logger.warning(f"Could not write DBC cache {cache_path}: {e}")
+            self.cache_dir = False
+            return
+
+        current = os.path.basename(cache_path)
+        # "<dbc name>.<location>." followed by the content digest
+        prefix = current.rsplit(".", 2)[0] + "."
+        for name in os.listdir(cache_dir):
+            if name.startswith(prefix) and name != current:
+                try:
+                    os.remove(os.path.join(cache_dir, name))
+                except OSError:
+                    pass
+
+    def _compile_in_child(self):
+        """
+        Compile the DBC into the plan cache in a separate process.
+
+        Parsing a large DBC with cantools creates enough objects for
+        garbage collection to pause every thread for tens of milliseconds;
+        in a child process it cannot stall the receive threads, which then
+        only read the finished cache.
+        """
+        # The child imports lora_tool from wherever this process found it
+        env = dict(os.environ)
+        env["PYTHONPATH"] = os.pathsep.join(path for path in sys.path if path)
+        command = [sys.executable, "-m", "lora_tool.can_decoder", self.dbc_path]
+        if self.cache_dir:
+            command += ["--cache-dir", self.cache_dir]
+        result = subprocess.run(command, env=env, capture_output=True, text=True)
+        if result.returncode != 0:
+            lines = result.stderr.strip().splitlines()
+            raise ValueError(lines[-1] if lines else "DBC compiler failed")
+
+    def reload(self, force=False):
+        """
+        Rebuild the decode tables from the DBC file and swap them in.
+
+        Decoding continues on the old tables while the new ones are built.
+        With the plan cache enabled, the DBC is compiled in a child process
+        and only the cache is read here. If the DBC cannot be parsed, for
+        example while it is half saved, the old tables stay in use.
+
+        Args:
+            force: Rebuild even if the DBC contents did not change.
+
+        Returns:
+            True if new tables were swapped in.
+        """
+        with self.reload_lock:
+            try:
+                with open(self.dbc_path, "rb") as f:
+                    dbc_hash = hashlib.sha256(f.read()).hexdigest()
+                if not force and dbc_hash == self.dbc_hash:
+                    return False
+                if self.cache_dir is not False:
+                    self._compile_in_child()
+                # Hashed again in case the file changed while it compiled
+                tables = self._compile()
+            except Exception as e:
+                if self.reload_error != str(e):
+                    logger.error(f"Error reloading DBC file: {e}")
+                self.reload_error = str(e)
+                return False
+
+            old = self.tables
+            self.tables = tables
+            self.reload_error = None
+            # Let IDs that are now known, or now fail, be reported again
+            self.reported_ids = set()
+            added = set(tables.plans) - set(old.plans if old else ())
+            logger.info(
+                f"Reloaded DBC file {self.dbc_path} as version {tables.version}: "
+                f"{len(tables.plans)} messages, {len(added)} new"
+            )
+
+        for callback in list(self.reload_callbacks):
+            try:
+                callback(tables)
+            except Exception as e:
+                logger.error(f"Error in DBC reload callback: {e}")
+        return True
+
+    def _stat(self):
+        try:
+            stat = os.stat(self.dbc_path)
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def _watch(self, interval):
+        seen = self._stat()
+        while not self.stop_event.wait(interval):
+            current = self._stat()
+            if current is None or current == seen:
+                continue
+            # Retried on the next change if the file was caught half written
+            seen = current
+            self.reload()
+
+    def start_watching(self, interval=1.0):
+        """
+        Reload the DBC in the background whenever the file changes.
+
+        Args:
+            interval: Seconds between checks of the file's size and
+                modification time.
+        """
+        if self.watch_thread and self.watch_thread.is_alive():
+            return
+        self.stop_event.clear()
+        self.watch_thread = threading.Thread(
+            target=self._watch, args=(interval,), daemon=True
+        )
+        self.watch_thread.start()
+
+    def stop_watching(self):
+        """Stop the background file watcher."""
+        self.stop_event.set()
+        if self.watch_thread and self.watch_thread is not threading.current_thread():
+            self.watch_thread.join(1.0)
+        self.watch_thread = None
+
+    def schema(self, tables=None):
+        """
+        Describe every message and signal in the DBC.
+
+        Clients fetch this once and format typed decode results themselves.
+
+        Args:
+            tables: The DecodeTables to describe (default the current ones).
+
+        Returns:
+            Dictionary mapping message name to its CAN ID, length and the
+            unit, scale, offset, range and choices of each signal.
+        """
+        return {
+            plan.name: {
+                "can_id": plan.frame_id,
+                "length": plan.length,
+                "signals": {
+                    name: signal.schema() for name, signal in plan.signals.items()
+                },
+            }
+            for plan in (tables.plans if tables else self.plans).values()
+        }
+
+    def cache_stats(self):
+        """
+        Return the decode result cache counters.
+
+        Returns:
+            Dictionary with the capacity, current size, hits, misses,
+            evictions and hit ratio.
+        """
+        tables = self.tables
+        lookups = self.lru_hits + self.lru_misses
+        return {
+            "size": self.lru_size,
+            "entries": sum(map(len, tables.results)) if tables else 0,
+            "hits": self.lru_hits,
+            "misses": self.lru_misses,
+            "evictions": self.lru_evictions,
+            "hit_ratio": round(self.lru_hits / lookups, 4) if lookups else None,
+        }
+
+    def decode_payload(self, payload, typed=False):
         """
         Decode a CAN message from a payload.
 
@@ -30,11 +727,91 @@ class CANDecoder:
         - First 4 bytes: CAN ID
         - Remaining bytes: CAN data (up to 8 bytes)
 
-        Returns a dictionary with the decoded information.
+        Frames that repeat byte for byte are answered from a bounded LRU
+        cache of earlier results. Results are shared between callers, so
+        they must not be modified.
+
+        Args:
+            payload: The payload bytes.
+            typed: Return signals as numbers (choices as their values,
+                floats unrounded) instead of display strings; units and
+                choice names are available from schema().
+
+        Returns a dictionary with the decoded information, including the
+        dbc_version it was decoded with.
+        """
+        # Read the tables once so a reload cannot swap them mid-frame
+        tables = self.tables
+        if tables is None or not self.lru_size:
+            return self._decode(tables, payload, typed)[0]
+
+        # No lock: each OrderedDict call is atomic, and a result evicted by
+        # another thread between the calls below only misses one refresh
+        results = tables.results[typed]
+        key = payload if type(payload) is bytes else bytes(payload)
+        result = results.get(key)
+        if result is not None:
+            try:
+                results.move_to_end(key)
+            except KeyError:
+                pass
+            self.lru_hits += 1
+            DECODED.inc()
+            return result
+
+        self.lru_misses += 1
+        result, cacheable = self._decode(tables, payload, typed)
+        if cacheable:
+            results[key] = result
+            if len(results) > self.lru_size:
+                try:
+                    results.popitem(last=False)
+                    self.lru_evictions += 1
+                except KeyError:
+                    pass
+        return result
+
+    def decode_frames(self, payload, typed=False):
+        """
+        Decode every CAN frame in a LoRa payload.
+
+        Handles both single-frame payloads and packed multi-frame payloads
+        (see lora_tool.can_packing).
+
+        Args:
+            payload: The payload bytes.
+            typed: As for decode_payload().
+
+        Returns:
+            List of decode results as from decode_payload(). Results of
+            packed frames also carry "time_offset", the frame's time relative
+            to the newest frame in the payload in seconds (None if the
+            sender left time deltas out).
+        """
+        if not is_packed(payload):
+            return [self.decode_payload(payload, typed)]
+        try:
+            frames = unpack_payload(payload)
+        except ValueError as e:
+            return [{"error": f"Invalid packed payload: {e}"}]
+        # Cached results are shared, so add the offset to a copy
+        return [
+            dict(self.decode_payload(frame, typed), time_offset=offset)
+            for frame, offset in frames
+        ]
+
+    def _decode(self, tables, payload, typed):
+        """
+        Decode a payload with the given tables.
+
+        Returns:
+            Tuple of (result, whether the result may be cached); unknown IDs
+            and decode errors are not cached so they are counted and
+            reported as they arrive.
         """
         if len(payload) < 4:
             logger.warning("Payload too short to decode CAN message")
-            return {"error": "Payload too short"}
+            return {"error": "Payload too short"}, False
 
         # Extract CAN ID (first 4 bytes)
         can_id = int.from_bytes(payload[:4], byteorder="big")
@@ -43,72 +820,85 @@ class CANDecoder:
         data = payload[4:]
 
         result = {"can_id": can_id, "data": data.hex(), "signals": {}}
+        cacheable = False
 
-        # Find the message in the DBC file by ID
-        if self.db:
-            message = None
-            for msg in self.db.messages:
-                if msg.frame_id == can_id:
-                    message = msg
-                    break
+        # Look up the precompiled plan for this ID
+        if tables is not None:
+            result["dbc_version"] = tables.version
+            plan = tables.plans.get(can_id)
 
-            if message:
-                result["message_name"] = message.name
-                logger.info(f"Decoding message: {message.name} (ID: 0x{can_id:X})")
+            if plan:
+                result["message_name"] = plan.name
 
                 # Decode the message
                 try:
-                    # Try to decode the message
-                    decoded = self.db.decode_message(can_id, data)
-
-                    # Process each signal to format it nicely
-                    for signal_name, signal_value in decoded.items():
-                        # Convert NamedSignalValue to primitive type
-                        if hasattr(signal_value, "name") and hasattr(
-                            signal_value, "value"
-                        ):
-                            # This is a NamedSignalValue, extract the name and value
-                            value_name = signal_value.name
-                            value = signal_value.value
-                            signal_value = f"{value} ({value_name})"
-                            logger.debug(
-                                f"Converted NamedSignalValue: {signal_name}={value}({value_name})"
-                            )
-                        # Round floating point values
-                        elif isinstance(signal_value, float):
-                            signal_value = round(signal_value, 2)
-
-                        # Get the signal definition to find the unit
-                        for signal in message.signals:
-                            if signal.name == signal_name:
-                                if signal.unit:
-                                    # Only add unit if not already in the signal value
-                                    if (
-                                        not isinstance(signal_value, str)
-                                        or signal.unit not in signal_value
-                                    ):
-                                        signal_value = f"{signal_value} {signal.unit}"
-                                break
-
-                        result["signals"][signal_name] = signal_value
+                    result["signals"] = plan.decode(data, typed)
+                    DECODED.inc()
+                    cacheable = True
                 except Exception as e:
                     error_msg = f"Error decoding message: {str(e)}"
-                    logger.error(error_msg)
-                    logger.error(traceback.format_exc())
+                    DECODE_ERRORS.inc(f"0x{can_id:X}")
                     result["decode_error"] = error_msg
+                    report = can_id not in self.reported_ids
+                    if report:
+                        self.reported_ids.add(can_id)
+                        logger.error(error_msg)
+                        logger.error(traceback.format_exc())
 
                     # Even though decoding failed, let's try to generate a human-readable
                     # representation of the raw data for debugging
                     try:
                         hex_data = " ".join(f"{b:02X}" for b in data)
                         result["raw_hex"] = hex_data
-                        logger.info(
-                            f"Raw data for failed message (ID: 0x{can_id:X}): {hex_data}"
-                        )
+                        if report:
+                            logger.info(
+                                f"Raw data for failed message (ID: 0x{can_id:X}): "
+                                f"{hex_data}"
+                            )
                     except:
                         pass
             else:
                 result["message_name"] = f"Unknown (0x{can_id:X})"
-                logger.warning(f"Unknown message ID: 0x{can_id:X}")
+                UNKNOWN_IDS.inc(f"0x{can_id:X}")
+                if can_id not in self.reported_ids:
+                    self.reported_ids.add(can_id)
+                    logger.warning(f"Unknown message ID: 0x{can_id:X}")
 
-        return result
+        return result, cacheable
+
+    def decode_batch(self, payloads):
+        """
+        Decode many payloads at once into columnar arrays.
+
+        This is the fast path for large backlogs and file replay. See
+        lora_tool.batch_decoder.decode_batch for the result layout.
+
+        Args:
+            payloads: Sequence of payloads (4-byte CAN ID followed by data).
+
+        Returns:
+            Dictionary of per-message signal columns plus the positions of
+            unknown and undecodable frames.
+        """
+        from lora_tool.batch_decoder import decode_batch
+
+        return decode_batch(self.plans, payloads)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Compile a DBC file into the decode plan cache"
+    )
+    parser.add_argument("dbc_path", help="DBC file to compile")
+    parser.add_argument(
+        "--cache-dir", help="Cache directory (default ~/.cache/lora_tool/dbc)"
+    )
+    args = parser.parse_args()
+
+    decoder = CANDecoder(args.dbc_path, cache_dir=args.cache_dir)
+    if not decoder.loaded:
+        sys.exit(decoder.reload_error)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,164 @@
+# lora_tool/can_packing.py
+import struct
+
+# First byte of a packed payload. A single-frame payload starts with the
+# big-endian CAN ID, whose top byte is at most 0x9F (29-bit ID plus the
+# extended flag in bit 31), so the two formats cannot be confused.
+MAGIC = 0xA5
+
+# Records carry the age of the frame relative to the newest one
+FLAG_TIME_DELTAS = 0x01
+
+# Largest LoRa payload (Transmission.payload / Log.payload in packet.options)
+MAX_PAYLOAD = 255
+
+# Units of the time delta field, in seconds
+TIME_DELTA_UNIT = 0.0001
+_MAX_TIME_DELTA = 0xFFFF
+
+# Magic, flags, record count
+HEADER = struct.Struct(">BBB")
+# CAN ID (with the extended flag in bit 31, as in single-frame payloads), DLC
+_RECORD = struct.Struct(">IB")
+_TIME_DELTA = struct.Struct(">H")
+
+
+def is_packed(payload):
+    """Return True if a LoRa payload uses the packed multi-frame format."""
+    return len(payload) >= HEADER.size and payload[0] == MAGIC
+
+
+def record_size(data_length, time_deltas=False):
+    """Return the bytes one frame with this much data takes in a packed payload."""
+    return _RECORD.size + data_length + (_TIME_DELTA.size if time_deltas else 0)
+
+
+def pack_frames(frames, timestamps=None):
+    """
+    Pack CAN frames into one LoRa payload.
+
+    Layout: MAGIC, flags, count, then per frame the 4-byte big-endian CAN
+    ID, the data length, the data and, with timestamps, the frame's age
+    relative to the newest frame in units of TIME_DELTA_UNIT (2 bytes,
+    big-endian, saturating at 6.5 s).
+
+    Args:
+        frames: Sequence of (can_id, data) pairs.
+        timestamps: Reception time of each frame in seconds, or None to
+            leave the time deltas out.
+
+    Returns:
+        The packed payload.
+
+    Raises:
+        ValueError: If there are more than 255 frames or the payload would
+            be longer than MAX_PAYLOAD.
+    """
+    if len(frames) > 0xFF:
+        raise ValueError("At most 255 frames fit in one packed payload")
+    if timestamps is not None and len(timestamps) != len(frames):
+        raise ValueError("Need one timestamp per frame")
+
+    flags = FLAG_TIME_DELTAS if timestamps is not None else 0
+    parts = [HEADER.pack(MAGIC, flags, len(frames))]
+    newest = max(timestamps) if timestamps else 0.0
+    for index, (can_id, data) in enumerate(frames):
+        parts.append(_RECORD.pack(can_id, len(data)))
+        parts.append(bytes(data))
+        if timestamps is not None:
+            age = round((newest - timestamps[index]) / TIME_DELTA_UNIT)
+            parts.append(_TIME_DELTA.pack(min(max(age, 0), _MAX_TIME_DELTA)))
+
+    payload = b"".join(parts)
+    if len(payload) > MAX_PAYLOAD:
+        raise ValueError(
+            f"Packed payload is {len(payload)} bytes, at most {MAX_PAYLOAD} fit"
+        )
+    return payload
+
+
+def pack_payloads(frames, timestamps=None, max_size=MAX_PAYLOAD):
+    """
+    Pack CAN frames into as few LoRa payloads as possible, in order.
+
+    Args:
+        frames: Sequence of (can_id, data) pairs.
+        timestamps: Reception time of each frame in seconds, or None.
+        max_size: Largest payload to produce.
+
+    Returns:
+        List of packed payloads.
+
+    Raises:
+        ValueError: If a single frame does not fit in max_size.
+    """
+    time_deltas = timestamps is not None
+    payloads = []
+    start = 0
+    size = HEADER.size
+    for index, (_, data) in enumerate(frames):
+        needed = record_size(len(data), time_deltas)
+        if HEADER.size + needed > max_size:
+            raise ValueError(f"Frame {index} does not fit in {max_size} bytes")
+        if size + needed > max_size or index - start == 0xFF:
+            payloads.append(
+                pack_frames(
+                    frames[start:index],
+                    timestamps[start:index] if time_deltas else None,
+                )
+            )
+            start, size = index, HEADER.size
+        size += needed
+    if start < len(frames):
+        payloads.append(
+            pack_frames(frames[start:], timestamps[start:] if time_deltas else None)
+        )
+    return payloads
+
+
+def unpack_payload(payload):
+    """
+    Split a packed LoRa payload into single-frame payloads.
+
+    Args:
+        payload: A packed payload (see is_packed()).
+
+    Returns:
+        List of (frame payload, time offset) pairs. Each frame payload is
+        the 4-byte CAN ID followed by the data, as sent unpacked; the time
+        offset is the frame's time relative to the newest frame in seconds
+        (0 or negative), or None without time deltas.
+
+    Raises:
+        ValueError: If the payload is not a well-formed packed payload.
+    """
+    payload = bytes(payload)
+    if not is_packed(payload):
+        raise ValueError("Not a packed payload")
+    _, flags, count = HEADER.unpack_from(payload)
+    time_deltas = bool(flags & FLAG_TIME_DELTAS)
+
+    frames = []
+    pos = HEADER.size
+    end = len(payload)
+    for _ in range(count):
+        if pos + _RECORD.size > end:
+            raise ValueError("Packed payload truncated")
+        length = payload[pos + 4]
+        data_end = pos + _RECORD.size + length
+        offset = None
+        if time_deltas:
+            if data_end + _TIME_DELTA.size > end:
+                raise ValueError("Packed payload truncated")
+            age = _TIME_DELTA.unpack_from(payload, data_end)[0]
+            offset = -age * TIME_DELTA_UNIT
+            next_pos = data_end + _TIME_DELTA.size
+        else:
+            next_pos = data_end
+        if data_end > end:
+            raise ValueError("Packed payload truncated")
+        frames.append((payload[pos : pos + 4] + payload[pos + 5 : data_end], offset))
+        pos = next_pos
+    if pos != end:
+        raise ValueError("Trailing bytes after packed frames")
+    return frames
@@ -1,7 +1,13 @@
 import os
-import pandas as pd
+import time
+import threading
+import logging
 from datetime import datetime
 
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger("lora_tool.data_handler")
+
 
 def save_reception_data(reception_data, file_prefix):
     """
@@ -11,6 +17,8 @@ def save_reception_data(reception_data, file_prefix):
         reception_data: The data to save.
         file_prefix: The prefix for the Parquet file name.
     """
+    import pandas as pd
+
     directory = "receiver_tests"
     os.makedirs(directory, exist_ok=True)
 
@@ -20,3 +28,246 @@ def save_reception_data(reception_data, file_prefix):
 
     df = pd.DataFrame(reception_data)
     df.to_parquet(parquet_file, index=False)
+
+
+class CaptureWriter:
+    # Raw LOG fields stored for every row, in column order
+    LOG_COLUMNS = (
+        "timestamp",
+        "rssi",
+        "snr",
+        "crc_error",
+        "general_error",
+        "can_id",
+        "message_name",
+        "payload",
+    )
+
+    def __init__(
+        self,
+        file_prefix,
+        decoder=None,
+        directory="receiver_tests",
+        flush_rows=1000,
+        flush_interval=5.0,
+        max_file_bytes=256 * 1024 * 1024,
+        max_file_seconds=60.0,
+    ):
+        """
+        Initialize a streaming Parquet capture of received LOG packets.
+
+        Rows are buffered and appended to the current file as a row group
+        by a background thread once flush_rows rows are waiting or every
+        flush_interval seconds, so memory use stays flat however long the
+        session runs and decoding and writing stay off the thread that
+        receives packets. Files are rotated by size or age; every rotated
+        file is complete. A Parquet file has no footer until it is closed,
+        so a crash or power loss makes the file being written unreadable:
+        at most max_file_seconds of data is lost.
+
+        Args:
+            file_prefix: The prefix for the Parquet file names.
+            decoder: Optional CANDecoder used to add typed signal columns.
+            directory: Folder the capture files are written to.
+            flush_rows: Number of buffered rows that triggers a flush.
+            flush_interval: Maximum time rows stay buffered, in seconds.
+            max_file_bytes: File size that triggers rotation.
+            max_file_seconds: File age that triggers rotation, in seconds;
+                also the most a crash can lose.
+        """
+        self.file_prefix = file_prefix
+        self.decoder = decoder
+        self.directory = directory
+        self.flush_rows = flush_rows
+        self.flush_interval = flush_interval
+        self.max_file_bytes = max_file_bytes
+        self.max_file_seconds = max_file_seconds
+        # Guards the row buffer; signalled when flush_rows rows are waiting
+        self.lock = threading.Lock()
+        self.ready = threading.Condition(self.lock)
+        # Serializes writes to the file between the flusher and flush()
+        self.write_lock = threading.Lock()
+
+        self.files = []
+        self.rows_written = 0
+        self._writer = None
+        self._path = None
+        self._opened_at = 0.0
+        self._rows = {name: [] for name in self.LOG_COLUMNS}
+
+        # One typed column per decoded signal, named "<message>.<signal>"
+        self._signal_columns = []
+        plans = decoder.plans if decoder else {}
+        for plan in plans.values():
+            for signal in plan.signals.values():
+                self._signal_columns.append(
+                    (plan.name, signal.name, signal.is_integer)
+                )
+        self.schema = self._build_schema()
+
+        self.stop_event = threading.Event()
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def _build_schema(self):
+        import pyarrow as pa
+
+        fields = [
+            pa.field("timestamp", pa.float64()),
+            pa.field("rssi", pa.float32()),
+            pa.field("snr", pa.float32()),
+            pa.field("crc_error", pa.bool_()),
+            pa.field("general_error", pa.bool_()),
+            pa.field("can_id", pa.uint32()),
+            pa.field("message_name", pa.string()),
+            pa.field("payload", pa.binary()),
+        ]
+        for message_name, signal_name, is_integer in self._signal_columns:
+            fields.append(
+                pa.field(
+                    f"{message_name}.{signal_name}",
+                    pa.int64() if is_integer else pa.float64(),
+                )
+            )
+        return pa.schema(fields)
+
+    def write(self, timestamp, rssi, snr, crc_error, general_error, payload):
+        """
+        Buffer one received LOG packet for the background flusher.
+
+        Args:
+            timestamp: Reception time in seconds since the epoch.
+            rssi: Average RSSI of the packet.
+            snr: SNR of the packet.
+            crc_error: Whether the radio reported a CRC error.
+            general_error: Whether the radio reported a general error.
+            payload: The raw CAN payload.
+        """
+        payload = bytes(payload)
+        can_id = int.from_bytes(payload[:4], "big") if len(payload) >= 4 else None
+        plan = self.decoder.plans.get(can_id) if self.decoder else None
+
+        with self.lock:
+            rows = self._rows
+            rows["timestamp"].append(timestamp)
+            rows["rssi"].append(rssi)
+            rows["snr"].append(snr)
+            rows["crc_error"].append(crc_error)
+            rows["general_error"].append(general_error)
+            rows["can_id"].append(can_id)
+            rows["message_name"].append(plan.name if plan else None)
+            rows["payload"].append(payload)
+            if len(rows["timestamp"]) == self.flush_rows:
+                self.ready.notify()
+
+    def _batch_due(self):
+        rows = len(self._rows["timestamp"])
+        return self.stop_event.is_set() or rows >= self.flush_rows
+
+    def _run(self):
+        """Flush buffered rows in the background until closed."""
+        while not self.stop_event.is_set():
+            with self.ready:
+                self.ready.wait_for(self._batch_due, self.flush_interval)
+            if self.stop_event.is_set():
+                return
+            try:
+                self.flush()
+            except Exception as e:
+                logger.error(f"Error writing capture {self._path}: {e}")
+
+    def _signal_arrays(self, payloads):
+        """Decode the buffered payloads into one array per signal column."""
+        import numpy as np
+        import pyarrow as pa
+
+        count = len(payloads)
+        batch = self.decoder.decode_batch(payloads) if self.decoder else None
+        messages = batch["messages"] if batch else {}
+
+        arrays = []
+        for message_name, signal_name, is_integer in self._signal_columns:
+            values = np.zeros(count, dtype=np.int64 if is_integer else np.float64)
+            mask = np.ones(count, dtype=bool)
+            group = messages.get(message_name)
+            # A DBC reload may have removed the signal since the file opened
+            column = group["signals"].get(signal_name) if group else None
+            if column is not None:
+                values[group["index"]] = column
+                mask[group["index"]] = False
+            arrays.append(pa.array(values, mask=mask))
+        return arrays
+
+    def _write_rows(self, rows):
+        import pyarrow as pa
+
+        if not rows["timestamp"]:
+            # Close an aging file even while the link is quiet
+            if (
+                self._writer is not None
+                and time.monotonic() - self._opened_at >= self.max_file_seconds
+            ):
+                self._close_file()
+            return
+
+        if self._writer is None:
+            self._open()
+
+        arrays = [
+            pa.array(rows[name], type=self.schema.field(name).type)
+            for name in self.LOG_COLUMNS
+        ]
+        arrays.extend(self._signal_arrays(rows["payload"]))
+        table = pa.Table.from_arrays(arrays, schema=self.schema)
+        self._writer.write_table(table)
+        self.rows_written += table.num_rows
+
+        if (
+            os.path.getsize(self._path) >= self.max_file_bytes
+            or time.monotonic() - self._opened_at >= self.max_file_seconds
+        ):
+            self._close_file()
+
+    def _open(self):
+        import pyarrow.parquet as pq
+
+        os.makedirs(self.directory, exist_ok=True)
+        date_str = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
+        path = os.path.join(self.directory, f"{self.file_prefix}_{date_str}.parquet")
+        # Several rotations within one second get a numeric suffix
+        counter = 1
+        while os.path.exists(path) or path in self.files:
+            path = os.path.join(
+                self.directory, f"{self.file_prefix}_{date_str}_{counter}.parquet"
+            )
+            counter += 1
+
+        self._writer = pq.ParquetWriter(path, self.schema)
+        self._path = path
+        self._opened_at = time.monotonic()
+        self.files.append(path)
+
+    def _close_file(self):
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+
+    def flush(self):
+        """Write any buffered rows to the current file."""
+        with self.write_lock:
+            # Swap the buffer so packets keep arriving while the rows are
+            # decoded and written
+            with self.lock:
+                rows, self._rows = self._rows, {name: [] for name in self.LOG_COLUMNS}
+            self._write_rows(rows)
+
+    def close(self):
+        """Stop the flusher, write buffered rows and close the current file."""
+        self.stop_event.set()
+        with self.ready:
+            self.ready.notify()
+        if self.thread is not threading.current_thread():
+            self.thread.join()
+        self.flush()
+        with self.write_lock:
+            self._close_file()
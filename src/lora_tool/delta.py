@@ -0,0 +1,230 @@
+# lora_tool/delta.py
+import threading
+import time
+
+# Marks a signal the client has not been sent yet
+_UNSENT = object()
+
+
+class Deadbands:
+    def __init__(self, decoder=None, overrides=None):
+        """
+        Per-signal deadbands for change-only emission.
+
+        A signal is only sent again once it has moved further than its
+        deadband from the value the client last got. Deadbands come from the
+        "Deadband" attribute of each DBC signal and can be overridden from
+        configuration. They are looked up again after a DBC reload.
+
+        Args:
+            decoder: CANDecoder whose DBC supplies the attributes, or None.
+            overrides: Dictionary mapping "<message>.<signal>" or just
+                "<signal>" (any message) to a deadband.
+        """
+        self.decoder = decoder
+        self.overrides = dict(overrides or {})
+        self._version = None
+        # message name -> {signal: deadband} for signals with one
+        self._messages = {}
+
+    def _build(self, tables):
+        overrides = self.overrides
+        messages = {}
+        for plan in tables.plans.values() if tables else ():
+            bands = {}
+            for name, signal in plan.signals.items():
+                band = overrides.get(
+                    f"{plan.name}.{name}", overrides.get(name, signal.deadband)
+                )
+                if band:
+                    bands[name] = band
+            if bands:
+                messages[plan.name] = bands
+        return messages
+
+    def for_message(self, message_name):
+        """
+        Return the deadbands of a message's signals.
+
+        Args:
+            message_name: Name of the message in the DBC.
+
+        Returns:
+            Dictionary mapping signal name to deadband; signals without one
+            are sent on any change.
+        """
+        tables = self.decoder.tables if self.decoder else None
+        version = tables.version if tables else None
+        if version != self._version:
+            self._messages = self._build(tables)
+            self._version = version
+        return self._messages.get(message_name, {})
+
+
+class DeltaEncoder:
+    def __init__(self, deadbands=None, keyframe_interval=10.0):
+        """
+        Strip unchanged signals from the messages sent to one client.
+
+        Remembers the signal values last sent per device and message. A
+        message whose signals were all sent before goes out with only the
+        signals that changed beyond their deadband and "delta": True; the
+        client keeps the other values. Every keyframe_interval seconds the
+        state is forgotten so each message goes out in full once, which
+        resynchronises clients that lost track.
+
+        Args:
+            deadbands: Deadbands to apply, or None to send any change.
+            keyframe_interval: Seconds between full keyframes.
+        """
+        self.deadbands = deadbands
+        self.keyframe_interval = keyframe_interval
+        self.lock = threading.Lock()
+        # (device, message name) -> {signal: value last sent}
+        self.sent = {}
+        self.next_keyframe = 0.0
+        # Sequence number the client is expected to ask from next (polling)
+        self.last_seq = None
+        self.last_used = time.monotonic()
+        self.signals_sent = 0
+        self.signals_skipped = 0
+
+    def reset(self):
+        """Send every message in full again, starting with the next batch."""
+        self.sent.clear()
+        self.next_keyframe = 0.0
+
+    def encode(self, messages, now=None):
+        """
+        Convert a batch of queued messages for this client.
+
+        The queued messages are shared and left unchanged; stripped ones
+        are copies.
+
+        Args:
+            messages: Messages from the message buffer, in order.
+            now: Monotonic time, for testing.
+
+        Returns:
+            Tuple of (messages, keyframe) where keyframe is True if the
+            client's state was reset before this batch.
+        """
+        now = time.monotonic() if now is None else now
+        self.last_used = now
+        keyframe = now >= self.next_keyframe
+        if keyframe:
+            self.sent.clear()
+            self.next_keyframe = now + self.keyframe_interval
+
+        sent = self.sent
+        deadbands = self.deadbands
+        result = []
+        for message in messages:
+            signals = message.get("signals")
+            if not signals:
+                result.append(message)
+                continue
+            message_name = message.get("message_name")
+            key = (message.get("device"), message_name)
+            last = sent.get(key)
+            if last is None:
+                sent[key] = dict(signals)
+                self.signals_sent += len(signals)
+                result.append(message)
+                continue
+
+            bands = deadbands.for_message(message_name) if deadbands else {}
+            changed = {}
+            for name, value in signals.items():
+                old = last.get(name, _UNSENT)
+                if value == old:
+                    continue
+                band = bands.get(name)
+                if band and old is not _UNSENT and old is not None:
+                    try:
+                        if abs(value - old) <= band:
+                            continue
+                    except TypeError:
+                        pass
+                changed[name] = value
+                last[name] = value
+            self.signals_sent += len(changed)
+            self.signals_skipped += len(signals) - len(changed)
+            result.append(dict(message, signals=changed, delta=True))
+        return result, keyframe
+
+    def stats(self):
+        """
+        Return how many signal values were sent and left out.
+
+        Returns:
+            Dictionary with sent and skipped counts and the fraction skipped.
+        """
+        total = self.signals_sent + self.signals_skipped
+        return {
+            "signals_sent": self.signals_sent,
+            "signals_skipped": self.signals_skipped,
+            "skipped_ratio": self.signals_skipped / total if total else None,
+        }
+
+
+class DeltaClients:
+    def __init__(self, deadbands=None, keyframe_interval=10.0, idle_timeout=60.0):
+        """
+        DeltaEncoders of polling clients, by client ID.
+
+        A polling client passes its own ID with each request. If it asks
+        from a different position than its last response ended at (a lost
+        response, a reload of the page), its state is reset and it gets a
+        keyframe.
+
+        Args:
+            deadbands: Deadbands shared by the encoders.
+            keyframe_interval: Seconds between full keyframes.
+            idle_timeout: Seconds after which a silent client is forgotten.
+        """
+        self.deadbands = deadbands
+        self.keyframe_interval = keyframe_interval
+        self.idle_timeout = idle_timeout
+        self.lock = threading.Lock()
+        self.encoders = {}
+
+    def __len__(self):
+        return len(self.encoders)
+
+    def encoder(self):
+        """Return a new encoder, e.g. for a stream connection."""
+        return DeltaEncoder(self.deadbands, self.keyframe_interval)
+
+    def encode(self, client_id, since, messages, last_seq):
+        """
+        Convert a poll response for one client.
+
+        Args:
+            client_id: ID the client polls with.
+            since: Sequence number the client asked from.
+            messages: Messages newer than since.
+            last_seq: Sequence number the response ends at.
+
+        Returns:
+            Tuple of (messages, keyframe) as from DeltaEncoder.encode().
+        """
+        now = time.monotonic()
+        with self.lock:
+            encoder = self.encoders.get(client_id)
+            if encoder is None:
+                encoder = self.encoders[client_id] = self.encoder()
+            # Forget clients that stopped polling
+            expired = [
+                key
+                for key, other in self.encoders.items()
+                if now - other.last_used > self.idle_timeout and other is not encoder
+            ]
+            for key in expired:
+                del self.encoders[key]
+
+        with encoder.lock:
+            if encoder.last_seq != since:
+                encoder.reset()
+            encoder.last_seq = last_seq
+            return encoder.encode(messages, now)
@@ -0,0 +1,185 @@
+# lora_tool/diversity.py
+import threading
+import time
+import logging
+from collections import OrderedDict
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger("lora_tool.diversity")
+
+
+def link_quality(log):
+    """Sort key for a received copy: CRC-clean first, then SNR, then RSSI."""
+    return (not log.crc_error, log.snr, log.rssi_avg)
+
+
+class _Pending:
+    __slots__ = ("first_seen", "source", "log", "receivers")
+
+    def __init__(self, first_seen, source, log):
+        self.first_seen = first_seen
+        self.source = source
+        self.log = log
+        self.receivers = [source.device_id]
+
+    def add(self, source, log):
+        self.receivers.append(source.device_id)
+        if link_quality(log) > link_quality(self.log):
+            self.source = source
+            self.log = log
+
+
+class DiversityMerger:
+    def __init__(self, emit, window=0.05, capacity=4096):
+        """
+        Merge copies of one transmission heard by several receivers.
+
+        A LOG payload is held for the window after its first copy arrives.
+        Identical payloads from other receivers within the window are
+        duplicates; only the copy with the best link metrics is emitted.
+        Pending payloads live in an insertion-ordered hash index, so each
+        packet costs O(1) and memory is bounded by the capacity.
+
+        Args:
+            emit: Called as emit(source, log, receivers) for every merged
+                transmission, with the session that heard the best copy.
+            window: Seconds copies of one transmission may arrive apart.
+                Keep it shorter than the period of repeating messages.
+            capacity: Maximum number of payloads held at once; the oldest
+                is emitted early when it is exceeded.
+        """
+        self.emit = emit
+        self.window = window
+        self.capacity = capacity
+        self.lock = threading.Lock()
+        # payload -> _Pending, oldest first
+        self.pending = OrderedDict()
+
+        self.merged = 0
+        self.duplicates = 0
+        self.evicted = 0
+        # device ID -> {"heard", "best", "unique"}
+        self.receivers = {}
+
+        self.stop_event = threading.Event()
+        self.thread = None
+
+    def _receiver(self, device_id):
+        counts = self.receivers.get(device_id)
+        if counts is None:
+            counts = self.receivers[device_id] = {"heard": 0, "best": 0, "unique": 0}
+        return counts
+
+    def _pop(self, key):
+        """Remove a pending payload and count its contributions."""
+        entry = self.pending.pop(key)
+        self.merged += 1
+        self._receiver(entry.source.device_id)["best"] += 1
+        if len(entry.receivers) == 1:
+            self._receiver(entry.source.device_id)["unique"] += 1
+        return entry
+
+    def _expired(self, now):
+        """Pop every pending payload whose window has passed."""
+        ready = []
+        deadline = now - self.window
+        while self.pending:
+            key, entry = next(iter(self.pending.items()))
+            if entry.first_seen > deadline:
+                break
+            ready.append(self._pop(key))
+        return ready
+
+    def _emit(self, entries):
+        for entry in entries:
+            try:
+                self.emit(entry.source, entry.log, entry.receivers)
+            except Exception as e:
+                logger.error(f"Error emitting merged packet: {e}")
+
+    def offer(self, source, log):
+        """
+        Add a copy of a LOG packet from one receiver.
+
+        Args:
+            source: The DeviceSession that received it.
+            log: The packet's Log message.
+        """
+        now = time.monotonic()
+        key = bytes(log.payload)
+        ready = []
+        with self.lock:
+            self._receiver(source.device_id)["heard"] += 1
+            entry = self.pending.get(key)
+            if entry is not None and source.device_id in entry.receivers:
+                # One receiver cannot hear a transmission twice, so this is
+                # the next transmission of the same payload
+                ready.append(self._pop(key))
+                entry = None
+
+            if entry is None:
+                self.pending[key] = _Pending(now, source, log)
+                if len(self.pending) > self.capacity:
+                    ready.append(self._pop(next(iter(self.pending))))
+                    self.evicted += 1
+            else:
+                entry.add(source, log)
+                self.duplicates += 1
+            ready.extend(self._expired(now))
+        self._emit(ready)
+
+    def flush(self, force=False):
+        """
+        Emit payloads whose window has passed.
+
+        Args:
+            force: Emit everything still pending.
+        """
+        with self.lock:
+            if force:
+                ready = [self._pop(key) for key in list(self.pending)]
+            else:
+                ready = self._expired(time.monotonic())
+        self._emit(ready)
+
+    def _run(self):
+        # Emit held payloads when no new packets arrive to trigger it
+        while not self.stop_event.wait(self.window / 2):
+            self.flush()
+
+    def start(self):
+        """Start the background thread that flushes expired payloads."""
+        self.stop_event.clear()
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        """Stop the flush thread and emit everything still pending."""
+        self.stop_event.set()
+        if self.thread and self.thread is not threading.current_thread():
+            self.thread.join(1.0)
+        self.flush(force=True)
+
+    def stats(self):
+        """
+        Return merge counters and per-receiver contributions.
+
+        Returns:
+            Dictionary with the window, merged and duplicate counts, the
+            number of pending payloads and, per receiver, how many copies it
+            heard, how many of its copies were the best and how many
+            transmissions only it heard.
+        """
+        with self.lock:
+            return {
+                "window": self.window,
+                "merged": self.merged,
+                "duplicates": self.duplicates,
+                "evicted": self.evicted,
+                "pending": len(self.pending),
+                "receivers": {
+                    device_id: dict(counts)
+                    for device_id, counts in self.receivers.items()
+                },
+            }
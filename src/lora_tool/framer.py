@@ -0,0 +1,101 @@
+# lora_tool/framer.py
+from lora_tool.constants import START_MARKER, END_MARKER
+
+
+class PacketFramer:
+    def __init__(self, start_marker=START_MARKER, end_marker=END_MARKER):
+        """
+        Initialize an incremental <START>...<END> framer.
+
+        Incoming bytes are appended to a single bytearray. Consumed bytes are
+        trimmed from the front (which CPython does without moving the tail),
+        and the scan position is remembered between feeds so every byte is
+        searched at most a constant number of times.
+
+        Args:
+            start_marker: Marker indicating the start of a frame.
+            end_marker: Marker indicating the end of a frame.
+        """
+        self.start_marker = start_marker
+        self.end_marker = end_marker
+        self.buffer = bytearray()
+        # Offset of the first byte that has not been consumed yet
+        self._start = 0
+        # Offset where the next marker search resumes
+        self._scan = 0
+        # Offset of the current frame body, or -1 while looking for a start marker
+        self._body = -1
+
+    def __len__(self):
+        """Return the number of buffered bytes that have not been consumed."""
+        return len(self.buffer) - self._start
+
+    def feed(self, data):
+        """
+        Append received bytes to the framer.
+
+        Args:
+            data: Bytes-like object read from the device.
+        """
+        if self._start:
+            del self.buffer[: self._start]
+            self._scan -= self._start
+            if self._body >= 0:
+                self._body -= self._start
+            self._start = 0
+        self.buffer += data
+
+    def reset(self):
+        """Discard all buffered data."""
+        self.buffer.clear()
+        self._start = 0
+        self._scan = 0
+        self._body = -1
+
+    def _next_span(self):
+        """Return the (start, end) offsets of the next complete frame, or None."""
+        buffer = self.buffer
+
+        if self._body < 0:
+            idx = buffer.find(self.start_marker, self._scan)
+            if idx < 0:
+                # Drop the noise but keep a possible partial start marker
+                tail = len(buffer) - len(self.start_marker) + 1
+                self._start = self._scan = max(self._start, tail)
+                return None
+            self._start = idx
+            self._body = self._scan = idx + len(self.start_marker)
+
+        end_idx = buffer.find(self.end_marker, self._scan)
+        if end_idx < 0:
+            tail = len(buffer) - len(self.end_marker) + 1
+            self._scan = max(self._body, tail)
+            return None
+
+        span = (self._body, end_idx)
+        self._start = self._scan = end_idx + len(self.end_marker)
+        self._body = -1
+        return span
+
+    def frames(self):
+        """
+        Yield every complete frame currently in the buffer.
+
+        Frames are memoryviews into the internal buffer and are released as
+        soon as the generator advances, so callers must copy (or fully parse)
+        a frame before asking for the next one. Close the generator before
+        calling feed() again if the iteration is abandoned early.
+
+        Yields:
+            memoryview of each frame body, without markers.
+        """
+        with memoryview(self.buffer) as view:
+            while True:
+                span = self._next_span()
+                if span is None:
+                    return
+                frame = view[span[0] : span[1]]
+                try:
+                    yield frame
+                finally:
+                    frame.release()
@@ -0,0 +1,469 @@
+# lora_tool/gateway.py
+import re
+import threading
+import time
+import logging
+from collections import deque
+import packet_pb2 as packet_pb2
+from lora_tool.transport import open_transport
+from lora_tool.lora_device import LoRaDevice
+from lora_tool.data_handler import CaptureWriter
+from lora_tool.raw_capture import RawCaptureWriter
+from lora_tool.diversity import DiversityMerger
+from lora_tool.can_packing import is_packed, unpack_payload
+from lora_tool.metrics import DECODE_ERRORS, PACKET_LOG, STAGE_SECONDS
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger("lora_tool.gateway")
+
+
+def device_id_for(port):
+    """
+    Derive a short device ID from a port name or transport URL.
+
+    Args:
+        port: e.g. "/dev/ttyUSB0", "COM3" or "tcp://10.0.0.5:4000".
+
+    Returns:
+        An ID safe to use in URLs and file names, e.g. "ttyUSB0".
+    """
+    name = port.split("://", 1)[-1].rstrip("/").rsplit("/", 1)[-1]
+    return re.sub(r"[^A-Za-z0-9_.-]+", "_", name).strip("_") or "device"
+
+
+class DeviceSession:
+    def __init__(
+        self, device_id, port, transport, decoder, message_queue, sinks=()
+    ):
+        """
+        One connected radio with its own I/O thread and receive pipeline.
+
+        LOG packets are decoded on the device's own I/O thread and appended
+        to the shared message buffer tagged with the device ID, so every
+        radio is read and decoded independently of the others.
+
+        Args:
+            device_id: ID the device is registered under.
+            port: The port name or transport URL it was opened from.
+            transport: The open Transport.
+            decoder: CANDecoder for the payloads, or None.
+            message_queue: MessageRing shared by all devices.
+            sinks: Objects whose add_message() is called with every queued
+                message (signal history, latest values).
+        """
+        self.device_id = device_id
+        self.port = port
+        self.transport = transport
+        self.decoder = decoder
+        self.message_queue = message_queue
+        self.sinks = sinks
+        self.device = LoRaDevice(transport)
+        self.capture_writer = None
+        self.is_receiving = False
+        self.received = 0
+        # DiversityMerger shared with the other receivers, if enabled
+        self.merger = None
+        # Called with frames of unknown CAN IDs to keep for re-decoding
+        self.hold_unknown = None
+
+    def start(self):
+        """
+        Start the device's I/O thread and read its status.
+
+        A passive transport (a replay) has no device to ask. Its I/O thread
+        is started by start_receiving() instead, so no recorded packet is
+        read before the receive pipeline is attached.
+        """
+        if self.transport.passive:
+            return {"success": True}
+        self.device.start()
+        return self.device.update_status()
+
+    def handle_log_packet(self, packet):
+        """Pass a LOG packet from the device's I/O thread on for decoding."""
+        self.received += 1
+        if self.merger:
+            self.merger.offer(self, packet.log)
+        else:
+            self.deliver(packet.log)
+
+    def deliver(self, log, receivers=None):
+        """
+        Decode a LOG payload and queue its CAN frames.
+
+        A packed payload (see lora_tool.can_packing) is split into its
+        frames, each queued as its own message. Like every message they are
+        timestamped as they are queued, so the buffer stays in time order;
+        frames sent with a time delta also get a "frame_time" that much
+        before the packet arrived.
+
+        Args:
+            log: The packet's Log message.
+            receivers: IDs of every device that heard it, when merged.
+        """
+        payload = log.payload
+        if not is_packed(payload):
+            self.deliver_frame(log, payload, receivers)
+            return
+
+        try:
+            frames = unpack_payload(payload)
+        except ValueError as e:
+            DECODE_ERRORS.inc("packed")
+            logger.warning(f"Dropped packed payload from {self.device_id}: {e}")
+            return
+        now = time.time()
+        for frame, offset in frames:
+            frame_time = None if offset is None else now + offset
+            self.deliver_frame(log, frame, receivers, frame_time=frame_time)
+
+    def deliver_frame(
+        self,
+        log,
+        payload,
+        receivers=None,
+        frame_time=None,
+        redecoded=False,
+    ):
+        """
+        Decode one CAN frame and queue it.
+
+        Args:
+            log: The Log message the frame arrived in.
+            payload: The frame (4-byte CAN ID followed by data).
+            receivers: IDs of every device that heard it, when merged.
+            frame_time: When the frame was received, if that was earlier
+                than now: frames sent with a time delta and frames decoded
+                again. Stored as "frame_time" and written to the capture;
+                "timestamp" is always the time the message was queued.
+            redecoded: The frame was held with an unknown CAN ID and is
+                decoded again after a DBC reload; such messages are marked
+                "redecoded" and not written to the capture again.
+        """
+        clock = time.perf_counter
+        started = clock()
+
+        # Process the CAN message from the payload
+        if self.decoder:
+            # Numbers only; clients format them using /api/schema
+            can_data = self.decoder.decode_payload(payload, typed=True)
+        else:
+            can_data = {"error": "CAN decoder not initialized"}
+
+        message_info = {
+            "device": self.device_id,
+            "rssi": log.rssi_avg,
+            "snr": log.snr,
+            "crc_error": log.crc_error,
+            "general_error": log.general_error,
+            "can_id": can_data.get("can_id"),
+            "message_name": can_data.get("message_name", "Unknown"),
+            "signals": can_data.get("signals", {}),
+            "raw_data": can_data.get("data"),
+            "dbc_version": can_data.get("dbc_version"),
+        }
+        if receivers is not None:
+            message_info["receivers"] = receivers
+        if frame_time is not None:
+            message_info["frame_time"] = frame_time
+        if redecoded:
+            message_info["redecoded"] = True
+        decoded = clock()
+
+        # Stamped under the buffer lock so the merged stream stays time-ordered
+        self.message_queue.append(message_info, stamp=True)
+        queued = clock()
+        for sink in self.sinks:
+            sink.add_message(message_info)
+        STAGE_SECONDS.observe(decoded - started, "decode")
+        STAGE_SECONDS.observe(queued - decoded, "queue")
+        STAGE_SECONDS.observe(clock() - queued, "sinks")
+
+        if redecoded:
+            return
+        if frame_time is None:
+            frame_time = message_info["timestamp"]
+        if (
+            self.hold_unknown
+            and "dbc_version" in can_data
+            and can_data["can_id"] not in self.decoder.plans
+        ):
+            self.hold_unknown(
+                self,
+                log,
+                payload,
+                receivers,
+                frame_time,
+                can_data["can_id"],
+            )
+
+        if self.capture_writer:
+            self.capture_writer.write(
+                frame_time,
+                log.rssi_avg,
+                log.snr,
+                log.crc_error,
+                log.general_error,
+                payload,
+            )
+
+        if PACKET_LOG.sample():
+            logger.debug(
+                f"Received message from {self.device_id}: "
+                f"{message_info['message_name']}"
+            )
+
+    def start_receiving(self, capture=False, raw_capture=False):
+        """
+        Switch the device to receiver mode and feed its LOG packets to the buffer.
+
+        Args:
+            capture: Stream decoded messages to Parquet files.
+            raw_capture: Record the exact byte stream for later replay.
+
+        Returns:
+            True if the state change was sent.
+        """
+        if capture:
+            self.capture_writer = CaptureWriter(
+                f"reception_{self.device_id}", self.decoder
+            )
+        if raw_capture:
+            self.device.recorder = RawCaptureWriter.create(f"raw_{self.device_id}")
+
+        # LOG packets are decoded on the device's I/O thread as they arrive
+        self.device.register_callback(
+            packet_pb2.PacketType.LOG, self.handle_log_packet
+        )
+        if self.transport.passive:
+            self.device.start()
+            self.is_receiving = True
+            return True
+        ack = self.device.change_state(packet_pb2.State.RECEIVER)
+        if not ack:
+            self.finish_receiving()
+            return False
+        # Firmware may not ACK state changes, or the ACK may be lost; the
+        # pipeline stays attached either way
+        if self.device.wait_response(ack) is None:
+            logger.warning(f"{self.device_id} did not acknowledge receiver mode")
+        self.is_receiving = True
+        return True
+
+    def stop_receiving(self):
+        """Switch the device back to standby and close any captures."""
+        if not self.transport.passive:
+            ack = self.device.change_state(packet_pb2.State.STANDBY)
+            if ack and self.device.wait_response(ack) is None:
+                logger.warning(f"{self.device_id} did not acknowledge standby")
+        self.finish_receiving()
+
+    def finish_receiving(self):
+        """Detach the receive pipeline from the device and close any captures."""
+        self.device.callbacks.pop(packet_pb2.PacketType.LOG, None)
+        if self.capture_writer:
+            try:
+                self.capture_writer.close()
+                logger.info(f"Capture saved to {', '.join(self.capture_writer.files)}")
+            except Exception as e:
+                logger.error(f"Error closing capture: {e}")
+            self.capture_writer = None
+        if self.device.recorder:
+            self.device.recorder.close()
+            logger.info(f"Raw capture saved to {self.device.recorder.path}")
+            self.device.recorder = None
+        self.is_receiving = False
+
+    def close(self):
+        """Stop receiving, stop the I/O thread and close the transport."""
+        if self.is_receiving:
+            self.finish_receiving()
+        self.device.stop()
+        self.transport.close()
+
+    def status(self):
+        """
+        Return a summary of the device for the API.
+
+        Returns:
+            Dictionary with ID, port, receive state and reader statistics.
+        """
+        reader = self.device.reader
+        return {
+            "device": self.device_id,
+            "port": self.port,
+            "connected": self.device.ser is not None,
+            "is_receiving": self.is_receiving,
+            "received": self.received,
+            "settings": self.device.lora_settings,
+            "gps": self.device.gps_data,
+            "reader": reader.stats() if reader else None,
+            "transmitter": self.device.transmitter.stats(),
+            "capture_files": self.capture_writer.files if self.capture_writer else [],
+        }
+
+
+class DeviceRegistry:
+    def __init__(self, message_queue, decoder=None, sinks=(), unknown_history=0):
+        """
+        Keep track of every connected radio.
+
+        Args:
+            message_queue: MessageRing the receive streams are merged into.
+            decoder: CANDecoder shared by the devices' pipelines.
+            sinks: Objects whose add_message() is called with every queued
+                message (signal history, latest values).
+            unknown_history: Number of recent frames with unknown CAN IDs
+                kept and decoded again when a DBC reload defines their ID;
+                0 disables re-decoding.
+        """
+        self.message_queue = message_queue
+        self.decoder = decoder
+        self.sinks = list(sinks)
+        self.sessions = {}
+        # Device used when a request does not name one
+        self.last_id = None
+        self.lock = threading.Lock()
+        # Merges copies of one transmission heard by several devices
+        self.merger = None
+        # (session, log, payload, receivers, frame_time, can_id) of unknown frames
+        self.unknown = deque(maxlen=unknown_history) if unknown_history else None
+        self.unknown_lock = threading.Lock()
+        self.redecoded = 0
+        if decoder is not None and self.unknown is not None:
+            decoder.reload_callbacks.append(self.redecode_unknown)
+
+    def __len__(self):
+        return len(self.sessions)
+
+    def __iter__(self):
+        return iter(list(self.sessions.values()))
+
+    def open(self, port, device_id=None):
+        """
+        Connect to a device and start its I/O thread.
+
+        A device already registered under the same ID is closed first.
+
+        Args:
+            port: Serial port name or transport URL (tcp://, replay://, sim://).
+            device_id: ID to register the device under (default from the port).
+
+        Returns:
+            Tuple of (DeviceSession, status from LoRaDevice.update_status()).
+        """
+        device_id = device_id or device_id_for(port)
+        self.close(device_id)
+
+        transport = open_transport(port, decoder=self.decoder)
+        session = DeviceSession(
+            device_id, port, transport, self.decoder, self.message_queue, self.sinks
+        )
+        session.merger = self.merger
+        if self.unknown is not None:
+            session.hold_unknown = self.hold_unknown
+        with self.lock:
+            self.sessions[device_id] = session
+            self.last_id = device_id
+        try:
+            result = session.start()
+        except Exception:
+            self.close(device_id)
+            raise
+        return session, result
+
+    def get(self, device_id=None):
+        """
+        Look up a device.
+
+        Args:
+            device_id: The device ID, or None for the last connected device.
+
+        Returns:
+            The DeviceSession, or None if there is no such device.
+        """
+        return self.sessions.get(device_id or self.last_id)
+
+    def close(self, device_id):
+        """
+        Disconnect a device if it is registered.
+
+        Args:
+            device_id: The device ID.
+
+        Returns:
+            True if a device was closed.
+        """
+        with self.lock:
+            session = self.sessions.pop(device_id, None)
+            if self.last_id == device_id:
+                self.last_id = next(reversed(self.sessions), None)
+        if session is None:
+            return False
+        try:
+            session.close()
+        except Exception as e:
+            logger.error(f"Error closing {device_id}: {e}")
+        return True
+
+    def hold_unknown(self, session, log, payload, receivers, frame_time, can_id):
+        """Keep a frame whose CAN ID the DBC does not define yet."""
+        with self.unknown_lock:
+            self.unknown.append((session, log, payload, receivers, frame_time, can_id))
+
+    def redecode_unknown(self, tables):
+        """
+        Decode held frames whose CAN ID a reloaded DBC now defines.
+
+        They are queued again, stamped like any new message so the buffer
+        stays in time order, with their original reception time as
+        "frame_time" and marked "redecoded".
+
+        Args:
+            tables: The DecodeTables that were swapped in.
+
+        Returns:
+            Number of frames decoded again.
+        """
+        known, remaining = [], []
+        with self.unknown_lock:
+            for entry in self.unknown:
+                (known if entry[5] in tables.plans else remaining).append(entry)
+            if not known:
+                return 0
+            self.unknown.clear()
+            self.unknown.extend(remaining)
+
+        for session, log, payload, receivers, frame_time, _ in known:
+            session.deliver_frame(log, payload, receivers, frame_time, redecoded=True)
+        self.redecoded += len(known)
+        logger.info(f"Decoded {len(known)} held frames again after DBC reload")
+        return len(known)
+
+    def set_diversity(self, window):
+        """
+        Enable or disable merging of duplicate receptions across devices.
+
+        Args:
+            window: Seconds copies of one transmission may arrive apart,
+                or None to pass every copy through.
+        """
+        old = self.merger
+        if window:
+            self.merger = DiversityMerger(
+                lambda source, log, receivers: source.deliver(log, receivers),
+                window=window,
+            )
+            self.merger.start()
+        else:
+            self.merger = None
+        for session in self:
+            session.merger = self.merger
+        if old:
+            old.stop()
+
+    def close_all(self):
+        """Disconnect every device."""
+        for device_id in list(self.sessions):
+            self.close(device_id)
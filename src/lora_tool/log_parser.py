@@ -0,0 +1,137 @@
+# lora_tool/log_parser.py
+import struct
+from collections import namedtuple
+import packet_pb2 as packet_pb2
+from google.protobuf.internal import api_implementation
+
+LOG = packet_pb2.PacketType.LOG
+
+# The compiled (upb) protobuf runtime parses a LOG packet about as fast as
+# matching its layout in Python, so the fast path only pays off on the
+# pure-Python runtime (see benchmarks/bench_log_parser.py)
+FAST_PATH = api_implementation.Type() == "python"
+
+# A LOG packet as the device sends it, in wire format:
+#   08 03            type = LOG
+#   22 <len>         log, shorter than 128 bytes
+#   [08 01] [10 01]  crc_error, general_error when set
+#   25 <float>       rssi_avg
+#   2d <float>       snr
+#   32 <len> <data>  payload
+_PACKET_PREFIX = b"\x08\x03\x22"
+# Header of the common case, without error flags: prefix, log length,
+# rssi_avg tag and value, snr tag and value, payload tag and length
+_LOG_HEADER = struct.Struct("<3sBBfBfBB")
+# The same after crc_error and/or general_error
+_LOG_FIXED = struct.Struct("<BfBfBB")
+_LOG_FIXED_TAGS = (0x25, 0x2D, 0x32)
+_LOG_FLAGS = {b"\x08\x01": (True, False), b"\x10\x01": (False, True)}
+
+
+class FastLogPacket(
+    namedtuple(
+        "FastLogPacket", ["crc_error", "general_error", "rssi_avg", "snr", "payload"]
+    )
+):
+    """
+    A LOG packet decoded straight from the wire.
+
+    Stands in for both the Packet and its Log: it has the packet's type,
+    and log returns the packet itself. A tuple is cheaper to create than
+    an object with attributes.
+    """
+
+    __slots__ = ()
+    type = LOG
+
+    @property
+    def log(self):
+        return self
+
+    @property
+    def gps(self):
+        # The fixed layout has no position
+        return packet_pb2.Gps()
+
+
+_new = tuple.__new__
+
+
+def parse_log_packet(data):
+    """
+    Decode a LOG packet directly from the fixed layout the device sends.
+
+    Args:
+        data: Serialized Packet (bytes or memoryview).
+
+    Returns:
+        FastLogPacket, or None if the packet is not a LOG packet in the
+        fixed layout (other types, a GPS position, zero RSSI or SNR, which
+        protobuf leaves out, unknown fields or a malformed packet).
+    """
+    data = bytes(data)
+    end = len(data)
+    if end < _LOG_HEADER.size:
+        return None
+    prefix, size, rssi_tag, rssi_avg, snr_tag, snr, payload_tag, length = (
+        _LOG_HEADER.unpack_from(data)
+    )
+    if (
+        prefix == _PACKET_PREFIX
+        and rssi_tag == 0x25
+        and snr_tag == 0x2D
+        and payload_tag == 0x32
+        and size == end - 4
+        and length == end - _LOG_HEADER.size
+    ):
+        return _new(
+            FastLogPacket, (False, False, rssi_avg, snr, data[_LOG_HEADER.size :])
+        )
+
+    # Frames with error flags set, e.g. CRC errors
+    if prefix != _PACKET_PREFIX or size != end - 4:
+        return None
+    pos = 4
+    crc_error = general_error = False
+    while data[pos : pos + 2] in _LOG_FLAGS:
+        crc, general = _LOG_FLAGS[data[pos : pos + 2]]
+        crc_error |= crc
+        general_error |= general
+        pos += 2
+    if end - pos < _LOG_FIXED.size:
+        return None
+    rssi_tag, rssi_avg, snr_tag, snr, payload_tag, length = _LOG_FIXED.unpack_from(
+        data, pos
+    )
+    pos += _LOG_FIXED.size
+    if (rssi_tag, snr_tag, payload_tag) != _LOG_FIXED_TAGS or pos + length != end:
+        return None
+    return _new(
+        FastLogPacket, (crc_error, general_error, rssi_avg, snr, data[pos:end])
+    )
+
+
+def parse_packet(data):
+    """
+    Parse a packet, taking the fast path for LOG packets.
+
+    With FAST_PATH, LOG packets in the layout the device sends are decoded
+    without building a protobuf message; everything else goes through
+    packet_pb2.
+
+    Args:
+        data: Serialized Packet (bytes or memoryview).
+
+    Returns:
+        FastLogPacket or packet_pb2.Packet.
+
+    Raises:
+        google.protobuf.message.DecodeError: If the packet is malformed.
+    """
+    if FAST_PATH:
+        packet = parse_log_packet(data)
+        if packet is not None:
+            return packet
+    packet = packet_pb2.Packet()
+    packet.ParseFromString(data)
+    return packet
@@ -3,10 +3,27 @@ import struct
 import time
 import random
 import threading
+import logging
+from collections import deque
+from concurrent.futures import CancelledError, Future
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from contextlib import closing
 from datetime import datetime
 import packet_pb2 as packet_pb2
 from lora_tool.constants import START_MARKER, END_MARKER
 from lora_tool.data_handler import save_reception_data
+from lora_tool.framer import PacketFramer
+from lora_tool.log_parser import parse_packet
+from lora_tool.packet_reader import PacketReader
+from lora_tool.airtime import TransmitScheduler
+from lora_tool.metrics import FRAMES, PARSE_FAILURES, STAGE_SECONDS
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger("lora_tool.lora_device")
+
+# Seconds to wait for the device to answer a request
+RESPONSE_TIMEOUT = 5.0
 
 
 class LoRaDevice:
@@ -15,7 +32,7 @@ class LoRaDevice:
         Initialize the LoRaDevice with a serial connection.
 
         Args:
-            ser: The serial connection to use for communication.
+            ser: The Transport (or pyserial connection) to use for communication.
         """
         self.ser = ser
         self.transmit_count = 0
@@ -28,32 +45,191 @@ class LoRaDevice:
         self.payload = 0
         self.lock = threading.Lock()
 
-        # Buffer for processing packets
-        self.buffer = b""
+        # Incremental framer for processing packets
+        self.framer = PacketFramer()
+        # Optional RawCaptureWriter recording every byte read
+        self.recorder = None
         # Callback functions for received packets
         self.callbacks = {}
+        # (deadline, future) pairs waiting for a response, per packet type,
+        # oldest first
+        self.pending = {}
+        # PacketReader that owns the connection once start() is called
+        self.reader = None
+        # Paces send_transmission() by time on air
+        self.transmitter = TransmitScheduler(self)
+
+    def start(self):
+        """
+        Start the I/O thread that owns the connection.
 
-    def send_transmission(self, payload, delay=0.5):
+        From then on every read and write goes through one PacketReader:
+        commands are queued and written between reads, responses resolve
+        the futures returned by request(), and all other packets (LOG
+        telemetry) are passed to the registered callbacks.
+        """
+        if self.reader is None or not self.reader.is_running:
+            self.reader = PacketReader(self, self.dispatch)
+            self.reader.start()
+
+    def stop(self):
+        """Stop the I/O thread and fail requests still waiting for a response."""
+        self.transmitter.stop()
+        if self.reader:
+            self.reader.stop()
+        with self.lock:
+            pending, self.pending = self.pending, {}
+        for waiters in pending.values():
+            for _, future in waiters:
+                future.cancel()
+
+    def write_frame(self, framed):
         """
-        Build and send a transmission packet containing the payload.
+        Write a framed packet, through the I/O thread when it is running.
 
         Args:
-            payload: The data payload to send.
-            delay: Delay after sending (in seconds).
+            framed: The packet bytes including start and end markers.
         """
-        if self.ser:
-            transmission_packet = packet_pb2.Packet()
-            transmission_packet.type = packet_pb2.PacketType.TRANSMISSION
-            transmission_packet.transmission.payload = payload
-            serialized = transmission_packet.SerializeToString()
-            framed = START_MARKER + serialized + END_MARKER
+        if self.reader and self.reader.is_running:
+            self.reader.submit(framed)
+        else:
             self.ser.write(framed)
 
-            self.transmit_count += 1
-            time.sleep(delay)
-            return True
+    def send_packet(self, packet):
+        """
+        Frame and send a packet to the device.
+
+        Args:
+            packet: The packet to send.
+        """
+        self.write_frame(START_MARKER + packet.SerializeToString() + END_MARKER)
+
+    def request(self, packet, response_type, timeout=RESPONSE_TIMEOUT):
+        """
+        Send a packet and return a future for the device's response.
+
+        Responses are matched to requests by packet type, in the order the
+        requests were sent. A request still unanswered after timeout is
+        cancelled the next time a request or response of its type comes by,
+        so a lost response cannot shift the matching for longer than that.
+        Without the I/O thread nothing reads the responses, so the packet is
+        just written and the future is returned cancelled.
+
+        Args:
+            packet: The packet to send.
+            response_type: The PacketType of the expected response.
+            timeout: Seconds to wait for the response before giving up.
+
+        Returns:
+            A concurrent.futures.Future resolved with the response packet.
+        """
+        future = Future()
+        if self.reader and self.reader.is_running:
+            now = time.monotonic()
+            with self.lock:
+                waiters = self.pending.setdefault(response_type, deque())
+                self._expire(waiters, now)
+                waiters.append((now + timeout, future))
+        else:
+            future.cancel()
+        self.send_packet(packet)
+        return future
+
+    @staticmethod
+    def _expire(waiters, now):
+        """Drop requests that timed out or whose caller cancelled them."""
+        expired = [
+            entry for entry in waiters if entry[0] <= now or entry[1].cancelled()
+        ]
+        for entry in expired:
+            waiters.remove(entry)
+            entry[1].cancel()
+
+    @staticmethod
+    def wait_response(future, timeout=RESPONSE_TIMEOUT):
+        """
+        Wait for the response to a request.
+
+        Args:
+            future: A future returned by request().
+            timeout: Maximum time to wait, in seconds.
+
+        Returns:
+            The response packet, or None if none arrived in time. The
+            request is then cancelled so the next response of its type goes
+            to the next request.
+        """
+        try:
+            return future.result(timeout)
+        except (FutureTimeoutError, CancelledError):
+            future.cancel()
+            return None
+
+    def dispatch(self, packet):
+        """
+        Route a packet read by the I/O thread.
+
+        Args:
+            packet: The parsed packet.
+
+        Returns:
+            False, so the reader keeps going.
+        """
+        now = time.monotonic()
+        with self.lock:
+            waiters = self.pending.get(packet.type)
+            while waiters:
+                deadline, future = waiters.popleft()
+                if deadline <= now:
+                    future.cancel()
+                    continue
+                # Skip requests whose caller cancelled after a timeout
+                if future.set_running_or_notify_cancel():
+                    break
+            else:
+                future = None
+        if future:
+            future.set_result(packet)
+            return False
+
+        callback = self.callbacks.get(packet.type)
+        if callback:
+            callback(packet)
         return False
 
+    def send_transmission(self, payload):
+        """
+        Queue a transmission packet containing the payload.
+
+        Frames are paced by the TransmitScheduler according to their time
+        on air for the current settings, so this returns immediately.
+
+        Args:
+            payload: The data payload to send.
+
+        Returns:
+            A Future for the transmission, or False if not connected.
+        """
+        if self.ser:
+            return self.transmitter.submit(payload)
+        return False
+
+    def transmit_now(self, payload):
+        """
+        Build and send a transmission packet without pacing.
+
+        Args:
+            payload: The data payload to send.
+
+        Returns:
+            A Future resolved with the device's ACK.
+        """
+        transmission_packet = packet_pb2.Packet()
+        transmission_packet.type = packet_pb2.PacketType.TRANSMISSION
+        transmission_packet.transmission.payload = payload
+        self.transmit_count += 1
+        return self.request(transmission_packet, packet_pb2.PacketType.ACK)
+
     def update_lora_settings(self, packet):
         """
         Update the stored settings from a received SETTINGS packet.
@@ -73,15 +249,74 @@ class LoRaDevice:
             "Sync Word": hex(settings.sync_word),
         }
 
-    def update_status(self):
+    def update_gps_data(self, packet):
         """
-        Send requests for both settings and GPS status and process incoming packets
-        until both responses are received.
+        Update the stored GPS data from a received GPS packet.
+
+        Args:
+            packet: The received GPS packet.
+        """
+        gps = packet.gps
+        self.gps_data = {
+            "Latitude": gps.latitude,
+            "Longitude": gps.longitude,
+            "Satellites": gps.satellites,
+        }
+
+    def _status_requests(self):
+        """Build the REQUEST packets for settings and GPS status."""
+        requests = []
+        for field in ("settings", "gps"):
+            request_pkt = packet_pb2.Packet()
+            request_pkt.type = packet_pb2.PacketType.REQUEST
+            setattr(request_pkt.request, field, True)
+            requests.append(request_pkt)
+        return requests
+
+    def update_status(self, timeout=RESPONSE_TIMEOUT):
+        """
+        Send requests for both settings and GPS status and wait for the responses.
+
+        With the I/O thread running the responses are picked out of the
+        stream as they arrive, so LOG packets received in the meantime still
+        reach the receive callback. Without it the port is read directly.
+
+        Args:
+            timeout: Maximum time to wait for both responses, in seconds.
+
+        Returns:
+            Dictionary with success and, when received, settings and gps.
         """
         if not self.ser:
             return False
 
-        self.ser.reset_input_buffer()
+        if not (self.reader and self.reader.is_running):
+            return self._update_status_blocking(timeout)
+
+        settings_request, gps_request = self._status_requests()
+        futures = {
+            "settings": self.request(settings_request, packet_pb2.PacketType.SETTINGS),
+            "gps": self.request(gps_request, packet_pb2.PacketType.GPS),
+        }
+        result = {"success": False}
+        deadline = time.monotonic() + timeout
+        for name, future in futures.items():
+            remaining = max(0.0, deadline - time.monotonic())
+            packet = self.wait_response(future, remaining)
+            if packet is None:
+                continue
+            if name == "settings":
+                self.update_lora_settings(packet)
+                result["settings"] = self.lora_settings
+            else:
+                self.update_gps_data(packet)
+                result["gps"] = self.gps_data
+
+        result["success"] = "settings" in result and "gps" in result
+        return result
+
+    def _update_status_blocking(self, timeout):
+        """Request status and read the port until both responses arrive."""
         status_received = {"settings": False, "gps": False}
         result = {"success": False}
 
@@ -96,12 +331,7 @@ class LoRaDevice:
             elif (
                 packet.type == packet_pb2.PacketType.GPS and not status_received["gps"]
             ):
-                gps = packet.gps
-                self.gps_data = {
-                    "Latitude": gps.latitude,
-                    "Longitude": gps.longitude,
-                    "Satellites": gps.satellites,
-                }
+                self.update_gps_data(packet)
                 status_received["gps"] = True
                 result["gps"] = self.gps_data
 
@@ -111,28 +341,12 @@ class LoRaDevice:
                 return True
             return False
 
-        # Send combined requests for settings and GPS
-        for req_type in [("settings", True), ("gps", True)]:
-            request_pkt = packet_pb2.Packet()
-            request_pkt.type = packet_pb2.PacketType.REQUEST
-            if req_type[0] == "settings":
-                request_pkt.request.settings = True
-            else:
-                request_pkt.request.gps = True
-            serialized = request_pkt.SerializeToString()
-            framed = START_MARKER + serialized + END_MARKER
-            self.ser.write(framed)
-
-        # Process packets with timeout
-        start_time = time.time()
-        timeout = 5.0  # 5 seconds timeout
-
-        while time.time() - start_time < timeout:
-            if self.ser.in_waiting > 0:
-                if self.process_packet(callback):
-                    break
-            time.sleep(0.1)
+        for request_pkt in self._status_requests():
+            self.send_packet(request_pkt)
 
+        self.process_serial_packets(
+            callback, exit_on_condition=True, max_processing_time=timeout
+        )
         return result
 
     def process_packet(self, callback):
@@ -149,30 +363,49 @@ class LoRaDevice:
         if not self.ser or self.ser.in_waiting == 0:
             return False
 
-        # Read data
-        self.buffer += self.ser.read(self.ser.in_waiting)
-
-        # Look for complete packets
-        while START_MARKER in self.buffer and END_MARKER in self.buffer:
-            start_idx = self.buffer.find(START_MARKER) + len(START_MARKER)
-            end_idx = self.buffer.find(END_MARKER)
+        return self.handle_data(self.ser.read(self.ser.in_waiting), callback)
 
-            if start_idx > end_idx:  # Corrupted buffer
-                self.buffer = self.buffer[end_idx + len(END_MARKER) :]
-                continue
+    def handle_data(self, data, callback):
+        """
+        Frame and parse bytes read from the device.
 
-            message = self.buffer[start_idx:end_idx]
-            self.buffer = self.buffer[end_idx + len(END_MARKER) :]
+        Args:
+            data: Bytes read from the serial connection.
+            callback: Function to call with each parsed packet.
 
-            try:
-                received_packet = packet_pb2.Packet()
-                received_packet.ParseFromString(message)
+        Returns:
+            True if the callback indicates processing should stop,
+            False otherwise.
+        """
+        if self.recorder and data:
+            self.recorder.write(data)
+        self.framer.feed(data)
 
-                # Call the callback and check if it wants to stop processing
-                if callback(received_packet):
-                    return True
-            except Exception as e:
-                print(f"Failed to decode message: {e}")
+        # Parse complete packets straight out of the framer's buffer
+        framed = 0
+        clock = time.perf_counter
+        try:
+            with closing(self.framer.frames()) as frames:
+                for message in frames:
+                    framed += 1
+                    started = clock()
+                    # LOG packets skip building a protobuf message
+                    try:
+                        received_packet = parse_packet(message)
+                    except Exception as e:
+                        PARSE_FAILURES.inc()
+                        logger.warning(f"Failed to decode message: {e}")
+                        continue
+                    STAGE_SECONDS.observe(clock() - started, "parse")
+
+                    # Call the callback and check if it wants to stop processing
+                    try:
+                        if callback(received_packet):
+                            return True
+                    except Exception as e:
+                        logger.exception(f"Failed to handle message: {e}")
+        finally:
+            FRAMES.inc(amount=framed)
 
         return False
 
@@ -182,6 +415,9 @@ class LoRaDevice:
         """
         Process incoming serial data for a limited time.
 
+        Reads block until data arrives or the port timeout expires, so
+        packets are handled as soon as they are complete.
+
         Args:
             callback: Function to call with each parsed packet.
             exit_on_condition: If True, stop after one packet.
@@ -190,12 +426,12 @@ class LoRaDevice:
         start_time = time.time()
 
         try:
-            while time.time() - start_time < max_processing_time:
-                if self.process_packet(callback) and exit_on_condition:
+            while self.ser and time.time() - start_time < max_processing_time:
+                data = self.ser.read(self.ser.in_waiting or 1)
+                if self.handle_data(data, callback) and exit_on_condition:
                     break
-                time.sleep(0.01)
         except Exception as e:
-            print(f"Error in process_serial_packets: {e}")
+            logger.error(f"Error in process_serial_packets: {e}")
 
     def register_callback(self, packet_type, callback_fn):
         """
@@ -213,13 +449,13 @@ class LoRaDevice:
 
         Args:
             state: The new state to set for the device.
+
+        Returns:
+            A Future resolved with the device's ACK, or False if not connected.
         """
         if self.ser:
             stateChange_request = packet_pb2.Packet()
             stateChange_request.type = packet_pb2.PacketType.REQUEST
             stateChange_request.request.stateChange = state
-            serialized_request = stateChange_request.SerializeToString()
-            framed_request = START_MARKER + serialized_request + END_MARKER
-            self.ser.write(framed_request)
-            return True
+            return self.request(stateChange_request, packet_pb2.PacketType.ACK)
         return False
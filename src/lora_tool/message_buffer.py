@@ -0,0 +1,132 @@
+# lora_tool/message_buffer.py
+import threading
+import time
+
+
+class MessageRing:
+    def __init__(self, capacity=10000):
+        """
+        Initialize a fixed-capacity message buffer.
+
+        Every appended message gets a monotonically increasing sequence
+        number. When the buffer is full the oldest message is overwritten,
+        so memory stays bounded however long nobody reads. Readers keep
+        their own position, so several clients can follow the same stream.
+
+        Args:
+            capacity: Maximum number of messages kept.
+        """
+        if capacity <= 0:
+            raise ValueError("capacity must be positive")
+        self.capacity = capacity
+        self.lock = threading.Lock()
+        # Signalled whenever a message is appended
+        self.changed = threading.Condition(self.lock)
+        self._items = [None] * capacity
+        # Sequence number of the next message (the first one is 1)
+        self._next_seq = 1
+        self._first_seq = 1
+        # Messages pushed out of the full buffer, read or not
+        self.overwritten = 0
+        # Messages readers asked for after they had been overwritten
+        self.missed = 0
+
+    def __len__(self):
+        """Return the number of messages currently held."""
+        with self.lock:
+            return self._next_seq - self._first_seq
+
+    @property
+    def last_seq(self):
+        """Sequence number of the newest message, or 0 if none were added."""
+        return self._next_seq - 1
+
+    def append(self, message, stamp=False):
+        """
+        Add a message, overwriting the oldest one if the buffer is full.
+
+        Args:
+            message: The message to store.
+            stamp: Set message["timestamp"] to the current time while
+                holding the lock, so messages appended from several threads
+                stay in time order.
+
+        Returns:
+            The sequence number assigned to the message.
+        """
+        with self.lock:
+            if stamp:
+                message["timestamp"] = time.time()
+            seq = self._next_seq
+            self._items[seq % self.capacity] = message
+            self._next_seq = seq + 1
+            if seq - self._first_seq >= self.capacity:
+                self._first_seq += 1
+                self.overwritten += 1
+            self.changed.notify_all()
+            return seq
+
+    def wait(self, seq, timeout=None):
+        """
+        Block until there is a message newer than a sequence number.
+
+        Args:
+            seq: Last sequence number the reader has seen.
+            timeout: Maximum time to wait, in seconds.
+
+        Returns:
+            True if newer messages are available, False on timeout.
+        """
+        with self.changed:
+            return self.changed.wait_for(lambda: self._next_seq - 1 != seq, timeout)
+
+    def since(self, seq=0, limit=None):
+        """
+        Return the messages newer than a sequence number.
+
+        Args:
+            seq: Last sequence number the reader has seen (0 for everything).
+            limit: Maximum number of messages to return.
+
+        Returns:
+            Tuple of (messages, last_seq, missed) where last_seq is the
+            sequence number to pass next time and missed counts messages
+            overwritten before they were read.
+        """
+        with self.lock:
+            if seq >= self._next_seq:
+                # The reader is ahead of us, e.g. after a server restart
+                seq = 0
+            start = max(seq + 1, self._first_seq)
+            missed = start - seq - 1 if seq else 0
+            self.missed += missed
+            end = self._next_seq
+            if limit is not None:
+                end = min(end, start + limit)
+            items = self._items
+            capacity = self.capacity
+            messages = [items[i % capacity] for i in range(start, end)]
+            return messages, max(seq, end - 1), missed
+
+    def clear(self):
+        """Drop all messages without resetting sequence numbers."""
+        with self.lock:
+            self._items = [None] * self.capacity
+            self._first_seq = self._next_seq
+
+    def stats(self):
+        """
+        Return buffer occupancy counters.
+
+        Returns:
+            Dictionary with capacity, size, last sequence number, messages
+            overwritten and messages readers missed.
+        """
+        with self.lock:
+            return {
+                "capacity": self.capacity,
+                "size": self._next_seq - self._first_seq,
+                "last_seq": self._next_seq - 1,
+                "overwritten": self.overwritten,
+                "missed": self.missed,
+            }
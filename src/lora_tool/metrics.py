@@ -0,0 +1,287 @@
+# lora_tool/metrics.py
+import bisect
+import threading
+
+# Latency buckets in seconds, from 10 us to 1 s
+LATENCY_BUCKETS = (
+    0.00001,
+    0.000025,
+    0.00005,
+    0.0001,
+    0.00025,
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+)
+
+
+def _escape(value):
+    """Escape a label value for the exposition format."""
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _label_text(labelnames, labelvalues, extra=""):
+    pairs = [
+        f'{name}="{_escape(value)}"' for name, value in zip(labelnames, labelvalues)
+    ]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value):
+    if value == float("inf"):
+        return "+Inf"
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value)
+
+
+class Metric:
+    kind = "untyped"
+
+    def __init__(self, name, description, labelnames=()):
+        """
+        A named metric, optionally split by labels.
+
+        Args:
+            name: Metric name, e.g. "lora_frames_total".
+            description: One-line description for the HELP comment.
+            labelnames: Names of the labels values are split by.
+        """
+        self.name = name
+        self.description = description
+        self.labelnames = tuple(labelnames)
+        self.lock = threading.Lock()
+
+    def samples(self):
+        """Yield (suffix, label text, value) for the exposition format."""
+        raise NotImplementedError
+
+    def render(self):
+        lines = [
+            f"# HELP {self.name} {self.description}",
+            f"# TYPE {self.name} {self.kind}",
+        ]
+        for suffix, labels, value in self.samples():
+            lines.append(f"{self.name}{suffix}{labels} {_number(value)}")
+        return "\n".join(lines)
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def __init__(self, name, description, labelnames=(), function=None):
+        """
+        A value that only goes up.
+
+        Args:
+            name: Metric name.
+            description: One-line description.
+            labelnames: Names of the labels values are split by.
+            function: Called at scrape time for the current total, for
+                counts an object already keeps, instead of using inc().
+        """
+        super().__init__(name, description, labelnames)
+        self.function = function
+        self.values = {}
+
+    def inc(self, *labelvalues, amount=1):
+        """
+        Increase the counter.
+
+        Args:
+            labelvalues: One value per label name, in order.
+            amount: How much to add.
+        """
+        with self.lock:
+            self.values[labelvalues] = self.values.get(labelvalues, 0) + amount
+
+    def value(self, *labelvalues):
+        return self.values.get(labelvalues, 0)
+
+    def samples(self):
+        if self.function:
+            yield "", "", self.function()
+            return
+        with self.lock:
+            items = list(self.values.items())
+        if not items and not self.labelnames:
+            items = [((), 0)]
+        for labelvalues, value in items:
+            yield "", _label_text(self.labelnames, labelvalues), value
+
+
+class Gauge(Metric):
+    kind = "gauge"
+
+    def __init__(self, name, description, function=None):
+        """
+        A value that goes up and down.
+
+        Args:
+            name: Metric name.
+            description: One-line description.
+            function: Called at scrape time for the current value, instead
+                of the value being set.
+        """
+        super().__init__(name, description)
+        self.function = function
+        self.current = 0
+
+    def set(self, value):
+        self.current = value
+
+    def samples(self):
+        value = self.function() if self.function else self.current
+        yield "", "", value
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, name, description, labelnames=(), buckets=LATENCY_BUCKETS):
+        """
+        Distribution of observed values in cumulative buckets.
+
+        Args:
+            name: Metric name, e.g. "lora_stage_seconds".
+            description: One-line description.
+            labelnames: Names of the labels values are split by.
+            buckets: Upper bounds of the buckets, ascending.
+        """
+        super().__init__(name, description, labelnames)
+        self.buckets = tuple(buckets)
+        # labelvalues -> [bucket counts..., sum, count]
+        self.values = {}
+
+    def observe(self, value, *labelvalues):
+        """
+        Record one observation.
+
+        Args:
+            value: The observed value (seconds for latencies).
+            labelvalues: One value per label name, in order.
+        """
+        index = bisect.bisect_left(self.buckets, value)
+        with self.lock:
+            state = self.values.get(labelvalues)
+            if state is None:
+                state = self.values[labelvalues] = [0] * (len(self.buckets) + 3)
+            state[index] += 1
+            state[-2] += value
+            state[-1] += 1
+
+    def samples(self):
+        with self.lock:
+            items = [(labels, list(state)) for labels, state in self.values.items()]
+        for labelvalues, state in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), state):
+                cumulative += count
+                labels = _label_text(
+                    self.labelnames, labelvalues, f'le="{_number(bound)}"'
+                )
+                yield "_bucket", labels, cumulative
+            labels = _label_text(self.labelnames, labelvalues)
+            yield "_sum", labels, state[-2]
+            yield "_count", labels, state[-1]
+
+
+class MetricsRegistry:
+    def __init__(self):
+        """Collection of metrics rendered together for /metrics."""
+        self.metrics = {}
+        self.lock = threading.Lock()
+
+    def _register(self, metric):
+        with self.lock:
+            existing = self.metrics.get(metric.name)
+            if existing is not None:
+                return existing
+            self.metrics[metric.name] = metric
+            return metric
+
+    def counter(self, name, description, labelnames=(), function=None):
+        """Return the counter with this name, creating it if needed."""
+        counter = self._register(Counter(name, description, labelnames, function))
+        if function is not None:
+            counter.function = function
+        return counter
+
+    def gauge(self, name, description, function=None):
+        """Return the gauge with this name, creating it if needed."""
+        gauge = self._register(Gauge(name, description, function))
+        if function is not None:
+            gauge.function = function
+        return gauge
+
+    def histogram(self, name, description, labelnames=(), buckets=LATENCY_BUCKETS):
+        """Return the histogram with this name, creating it if needed."""
+        return self._register(Histogram(name, description, labelnames, buckets))
+
+    def render(self):
+        """
+        Render every metric in the Prometheus text exposition format.
+
+        Returns:
+            The /metrics response body.
+        """
+        with self.lock:
+            metrics = list(self.metrics.values())
+        return "\n".join(metric.render() for metric in metrics) + "\n"
+
+
+# Process-wide registry used by the receive pipeline
+REGISTRY = MetricsRegistry()
+
+FRAMES = REGISTRY.counter("lora_frames_total", "Frames cut from the serial stream")
+PARSE_FAILURES = REGISTRY.counter(
+    "lora_parse_failures_total", "Frames that failed protobuf parsing"
+)
+BYTES_READ = REGISTRY.counter("lora_bytes_read_total", "Bytes read from devices")
+DECODED = REGISTRY.counter("lora_decoded_frames_total", "CAN frames decoded")
+UNKNOWN_IDS = REGISTRY.counter(
+    "lora_unknown_frames_total", "CAN frames with an ID not in the DBC", ["can_id"]
+)
+DECODE_ERRORS = REGISTRY.counter(
+    "lora_decode_errors_total", "CAN frames that failed to decode", ["can_id"]
+)
+STAGE_SECONDS = REGISTRY.histogram(
+    "lora_stage_seconds", "Time spent per packet in each receive stage", ["stage"]
+)
+
+
+class PacketLogSampler:
+    def __init__(self, every=0):
+        """
+        Switch for per-packet debug logging.
+
+        Logging every packet dominates the cost of the receive path at high
+        rates, so it is off by default and, when on, only one packet in
+        every N is logged.
+
+        Args:
+            every: Log one packet in this many; 0 disables packet logging.
+        """
+        self.every = every
+        self._count = 0
+
+    def sample(self):
+        """Return True if the current packet should be logged."""
+        if not self.every:
+            return False
+        self._count += 1
+        return self._count % self.every == 0
+
+
+# Shared by every stage that logs individual packets
+PACKET_LOG = PacketLogSampler()
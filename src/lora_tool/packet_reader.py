@@ -0,0 +1,187 @@
+# lora_tool/packet_reader.py
+import queue
+import threading
+import time
+import logging
+from collections import deque
+from lora_tool.metrics import BYTES_READ, STAGE_SECONDS
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger("lora_tool.packet_reader")
+
+
+def percentile(samples, fraction):
+    """
+    Return the given percentile of a list of samples.
+
+    Args:
+        samples: Sequence of numbers.
+        fraction: Percentile as a fraction between 0 and 1.
+
+    Returns:
+        The sample at that percentile, or None if there are no samples.
+    """
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))
+    return ordered[index]
+
+
+class PacketReader:
+    def __init__(
+        self,
+        device,
+        callback,
+        stop_event=None,
+        read_timeout=0.05,
+        latency_samples=1000,
+    ):
+        """
+        Initialize a blocking reader for a LoRa device.
+
+        Instead of polling in_waiting and sleeping, the reader blocks in
+        read() until bytes arrive (or read_timeout expires, so stop requests
+        are noticed quickly) and hands every parsed packet to the callback
+        as soon as its frame is complete.
+
+        The reader is also the only writer: frames passed to submit() are
+        queued and written by the read loop between reads, so commands from
+        other threads never interleave on the connection.
+
+        Args:
+            device: The LoRaDevice to read from.
+            callback: Function to call with each parsed packet.
+            stop_event: Event that ends the read loop when set.
+            read_timeout: Serial read timeout in seconds.
+            latency_samples: Number of recent latency samples to keep.
+        """
+        self.device = device
+        self.callback = callback
+        self.stop_event = stop_event or threading.Event()
+        self.read_timeout = read_timeout
+        self.thread = None
+        # Framed commands waiting to be written by the read loop
+        self.commands = queue.SimpleQueue()
+
+        self.bytes_read = 0
+        self.bytes_written = 0
+        self.packets = 0
+        # Seconds from read() returning to the callback finishing, per packet
+        self.latencies = deque(maxlen=latency_samples)
+        self._read_time = 0.0
+
+    def _dispatch(self, packet):
+        """Forward a packet to the callback and record its latency."""
+        result = self.callback(packet)
+        self.packets += 1
+        latency = time.perf_counter() - self._read_time
+        self.latencies.append(latency)
+        STAGE_SECONDS.observe(latency, "end_to_end")
+        return result
+
+    def submit(self, data):
+        """
+        Queue framed bytes to be written by the read loop.
+
+        A blocking read is interrupted where the connection supports it
+        (cancel_read), so the command goes out without waiting for the
+        read timeout.
+
+        Args:
+            data: The framed packet to write.
+        """
+        self.commands.put(data)
+        cancel_read = getattr(self.device.ser, "cancel_read", None)
+        if cancel_read:
+            cancel_read()
+
+    def _write_commands(self, ser):
+        """Write every queued command."""
+        while True:
+            try:
+                data = self.commands.get_nowait()
+            except queue.Empty:
+                return
+            try:
+                ser.write(data)
+                self.bytes_written += len(data)
+            except Exception as e:
+                logger.error(f"Error writing to device: {e}")
+
+    @property
+    def is_running(self):
+        """True while the reader thread is alive."""
+        return self.thread is not None and self.thread.is_alive()
+
+    def run(self):
+        """
+        Read and dispatch packets until the stop event is set.
+
+        The connection's timeout is set to read_timeout while the loop runs
+        and put back to the caller's value when it ends.
+        """
+        ser = self.device.ser
+        saved_timeout = ser.timeout
+        if self.read_timeout is not None:
+            ser.timeout = self.read_timeout
+
+        try:
+            while not self.stop_event.is_set():
+                self._write_commands(ser)
+                # Block for the first byte, then take whatever else is waiting
+                data = ser.read(ser.in_waiting or 1)
+                if not data:
+                    continue
+                self._read_time = time.perf_counter()
+                self.bytes_read += len(data)
+                BYTES_READ.inc(amount=len(data))
+                self.device.handle_data(data, self._dispatch)
+        finally:
+            ser.timeout = saved_timeout
+
+    def _run_thread(self):
+        try:
+            self.run()
+        except Exception as e:
+            logger.error(f"Reader stopped: {e}")
+
+    def start(self):
+        """Run the reader in a background daemon thread."""
+        self.stop_event.clear()
+        self.thread = threading.Thread(target=self._run_thread, daemon=True)
+        self.thread.start()
+
+    def stop(self, timeout=1.0):
+        """
+        Stop the reader and wait for its thread to finish, which restores
+        the connection's original timeout.
+
+        Args:
+            timeout: Maximum time to wait for the thread, in seconds.
+        """
+        self.stop_event.set()
+        cancel_read = getattr(self.device.ser, "cancel_read", None)
+        if cancel_read:
+            cancel_read()
+        if self.thread and self.thread is not threading.current_thread():
+            self.thread.join(timeout)
+
+    def stats(self):
+        """
+        Return read counters and per-packet latency percentiles.
+
+        Returns:
+            Dictionary with packet and byte counts and latencies in milliseconds.
+        """
+        samples = list(self.latencies)
+        result = {
+            "packets": self.packets,
+            "bytes_read": self.bytes_read,
+            "bytes_written": self.bytes_written,
+        }
+        for name, fraction in (("p50_ms", 0.5), ("p99_ms", 0.99)):
+            value = percentile(samples, fraction)
+            result[name] = None if value is None else round(value * 1000, 3)
+        return result
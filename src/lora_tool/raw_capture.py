@@ -0,0 +1,295 @@
+# lora_tool/raw_capture.py
+import bisect
+import mmap
+import os
+import struct
+import time
+import threading
+from datetime import datetime
+from lora_tool.transport import Transport
+
+# File layout:
+#   header   MAGIC, creation time (float64)
+#   records  timestamp (float64), length (uint32), raw bytes
+#   index    (timestamp, offset) for every INDEX_INTERVAL-th record
+#   trailer  index offset (uint64), record count (uint64), FOOTER_MAGIC
+# All integers are little-endian. A file without a trailer (e.g. after a
+# crash) is still readable by scanning the records.
+MAGIC = b"LORACAP1"
+FOOTER_MAGIC = b"LORAIDX1"
+HEADER = struct.Struct("<8sd")
+RECORD = struct.Struct("<dI")
+INDEX_ENTRY = struct.Struct("<dQ")
+TRAILER = struct.Struct("<QQ8s")
+INDEX_INTERVAL = 256
+
+
+class RawCaptureWriter:
+    def __init__(self, path):
+        """
+        Open an append-only capture of the raw serial byte stream.
+
+        Args:
+            path: The file to create.
+        """
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.lock = threading.Lock()
+        self.count = 0
+        self._index = []
+        self._file = open(path, "wb")
+        self._file.write(HEADER.pack(MAGIC, time.time()))
+
+    @classmethod
+    def create(cls, file_prefix, directory="receiver_tests"):
+        """
+        Create a capture file named after the prefix and the current time.
+
+        Args:
+            file_prefix: The prefix for the capture file name.
+            directory: Folder the capture file is written to.
+        """
+        date_str = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
+        return cls(os.path.join(directory, f"{file_prefix}_{date_str}.lcap"))
+
+    def write(self, data, timestamp=None):
+        """
+        Append one chunk of bytes as read from the device.
+
+        Args:
+            data: The raw bytes.
+            timestamp: Reception time in seconds since the epoch (default now).
+        """
+        if timestamp is None:
+            timestamp = time.time()
+        with self.lock:
+            if self._file is None:
+                return
+            if self.count % INDEX_INTERVAL == 0:
+                self._index.append((timestamp, self._file.tell()))
+            self._file.write(RECORD.pack(timestamp, len(data)))
+            self._file.write(data)
+            self.count += 1
+
+    def flush(self):
+        """Push buffered records to the operating system."""
+        with self.lock:
+            if self._file is not None:
+                self._file.flush()
+
+    def close(self):
+        """Write the index footer and close the file."""
+        with self.lock:
+            if self._file is None:
+                return
+            index_offset = self._file.tell()
+            for timestamp, offset in self._index:
+                self._file.write(INDEX_ENTRY.pack(timestamp, offset))
+            self._file.write(TRAILER.pack(index_offset, self.count, FOOTER_MAGIC))
+            self._file.close()
+            self._file = None
+
+
+class RawCaptureReader:
+    def __init__(self, path):
+        """
+        Memory-map a capture file for reading.
+
+        Records are returned as memoryviews into the mapping, so iterating
+        over a capture does not copy the payload bytes.
+
+        Args:
+            path: The capture file to open.
+        """
+        self.path = path
+        self._file = open(path, "rb")
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        self._view = memoryview(self._map)
+
+        magic, self.created_at = HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC:
+            self.close()
+            raise ValueError(f"{path} is not a LoRa capture file")
+
+        self._end = len(self._map)
+        self.index = []
+        self.count = None
+        if self._end >= HEADER.size + TRAILER.size:
+            index_offset, count, footer = TRAILER.unpack_from(
+                self._map, self._end - TRAILER.size
+            )
+            if footer == FOOTER_MAGIC:
+                self._end = index_offset
+                self.count = count
+                self.index = [
+                    INDEX_ENTRY.unpack_from(self._map, offset)
+                    for offset in range(
+                        index_offset,
+                        len(self._map) - TRAILER.size,
+                        INDEX_ENTRY.size,
+                    )
+                ]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def __iter__(self):
+        return self.records()
+
+    def records(self, offset=None):
+        """
+        Yield every record from an offset to the end of the capture.
+
+        Args:
+            offset: File offset of the first record (default the first one).
+
+        Yields:
+            Tuples of (timestamp, memoryview of the raw bytes).
+        """
+        offset = HEADER.size if offset is None else offset
+        end = self._end
+        view = self._view
+        while offset + RECORD.size <= end:
+            timestamp, length = RECORD.unpack_from(view, offset)
+            offset += RECORD.size
+            if offset + length > end:
+                # Truncated final record from an interrupted capture
+                return
+            yield timestamp, view[offset : offset + length]
+            offset += length
+
+    def records_from(self, timestamp):
+        """
+        Yield records starting near a point in time, using the index.
+
+        Args:
+            timestamp: Time in seconds since the epoch.
+        """
+        position = bisect.bisect_right(self.index, (timestamp, float("inf"))) - 1
+        offset = self.index[position][1] if position >= 0 else None
+        for record in self.records(offset):
+            if record[0] >= timestamp:
+                yield record
+
+    def close(self):
+        """Release the memory map."""
+        try:
+            self._view.release()
+            self._map.close()
+        except BufferError:
+            # Records are still referenced; the mapping is freed with them
+            pass
+        self._file.close()
+
+
+class ReplaySerial(Transport):
+    passive = True
+
+    def __init__(self, path, speed=1.0, loop=False, timeout=1.0):
+        """
+        Transport that plays a raw capture back.
+
+        A recording is fed through the normal receive pipeline as if it
+        came from the port. Writes are accepted and discarded, so the
+        transport is passive: requests are never answered.
+
+        Args:
+            path: The capture file to replay.
+            speed: Playback speed multiplier; 0 replays as fast as possible.
+            loop: Start again from the beginning when the capture ends.
+            timeout: Read timeout in seconds, as for pyserial.
+        """
+        self.reader = RawCaptureReader(path)
+        self.speed = speed
+        self.loop = loop
+        self.timeout = timeout
+        self.is_open = True
+        self._restart()
+
+    def _restart(self):
+        self._records = self.reader.records()
+        self._pending = b""
+        self._pending_time = None
+        self._first_time = None
+        self._started = time.monotonic()
+        self._advance()
+
+    def _advance(self):
+        """Load the next record into the pending slot."""
+        for timestamp, data in self._records:
+            if self._first_time is None:
+                self._first_time = timestamp
+            self._pending = data
+            self._pending_time = timestamp
+            return
+        if self.loop and self._first_time is not None:
+            self._restart()
+        else:
+            self._pending = b""
+            self._pending_time = None
+
+    def _due_in(self):
+        """Seconds until the pending record is due, or None at the end."""
+        if self._pending_time is None:
+            return None
+        if not self.speed:
+            return 0.0
+        due = self._started + (self._pending_time - self._first_time) / self.speed
+        return due - time.monotonic()
+
+    @property
+    def in_waiting(self):
+        due_in = self._due_in()
+        if due_in is None or due_in > 0:
+            return 0
+        return len(self._pending)
+
+    @property
+    def finished(self):
+        """True once every record has been read."""
+        return self._pending_time is None
+
+    def read(self, size=1):
+        """Return up to size bytes, waiting for the next record if needed."""
+        deadline = None if self.timeout is None else time.monotonic() + self.timeout
+        chunks = []
+        while size > 0:
+            due_in = self._due_in()
+            if due_in is None:
+                break
+            if due_in > 0:
+                if chunks:
+                    break
+                if deadline is not None:
+                    due_in = min(due_in, deadline - time.monotonic())
+                    if due_in <= 0:
+                        break
+                time.sleep(due_in)
+                continue
+            chunk = self._pending[:size]
+            chunks.append(bytes(chunk))
+            self._pending = self._pending[len(chunk) :]
+            size -= len(chunk)
+            if not self._pending:
+                self._advance()
+        if not chunks and self.finished and self.timeout:
+            # Behave like an idle port once the capture has ended
+            time.sleep(self.timeout)
+        return b"".join(chunks)
+
+    def write(self, data):
+        return len(data)
+
+    def reset_input_buffer(self):
+        pass
+
+    def close(self):
+        self.is_open = False
+        self._records = iter(())
+        self._pending = b""
+        self.reader.close()
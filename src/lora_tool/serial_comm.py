@@ -1,5 +1,3 @@
-import serial
-from serial.tools import list_ports
 import platform
 import os
 import time
@@ -17,6 +15,8 @@ def list_serial_ports():
     Returns:
         List of available serial port device names.
     """
+    from serial.tools import list_ports
+
     try:
         ports = [port.device for port in list_ports.comports()]
         logger.info(f"Found {len(ports)} serial ports: {ports}")
@@ -33,6 +33,8 @@ def get_default_serial_port():
     Returns:
         Most likely serial port or None if not found.
     """
+    from serial.tools import list_ports
+
     for port in list_ports.comports():
         # Look for common USB-serial converters often used with LoRa devices
         if any(
@@ -64,6 +66,8 @@ def open_serial_port(port_name, baudrate=115200, timeout=1, attempts=3):
     Returns:
         An open serial connection or raises an exception.
     """
+    import serial
+
     logger.info(f"Attempting to open serial port {port_name}")
 
     for attempt in range(attempts):
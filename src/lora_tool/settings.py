@@ -1,5 +1,4 @@
 import packet_pb2 as packet_pb2
-from lora_tool.constants import START_MARKER, END_MARKER
 
 
 def update_settings(
@@ -26,6 +25,9 @@ def update_settings(
         preamble: The preamble length.
         set_crc: Boolean to enable or disable CRC.
         sync_word: The synchronization word.
+
+    Returns:
+        A Future resolved with the device's ACK, or None if not connected.
     """
     if device.ser:
         settings_packet = packet_pb2.Packet()
@@ -39,6 +41,4 @@ def update_settings(
         settings_packet.settings.set_crc = set_crc
         settings_packet.settings.sync_word = sync_word
 
-        serialized = settings_packet.SerializeToString()
-        framed = START_MARKER + serialized + END_MARKER
-        device.ser.write(framed)
+        return device.request(settings_packet, packet_pb2.PacketType.ACK)
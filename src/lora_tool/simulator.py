@@ -0,0 +1,248 @@
+# lora_tool/simulator.py
+import argparse
+import os
+import random
+import socket
+import threading
+import time
+import logging
+import packet_pb2 as packet_pb2
+from lora_tool.constants import START_MARKER, END_MARKER
+from lora_tool.framer import PacketFramer
+from lora_tool.can_packing import HEADER, MAX_PAYLOAD, pack_frames, record_size
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger("lora_tool.simulator")
+
+# Frame IDs and lengths sent when no DBC messages are given
+DEFAULT_MESSAGES = [
+    (0x0CF11E05, 8),
+    (0x0CF11F05, 8),
+    (0x000, 8),
+    (0x001, 5),
+    (0x776, 8),
+    (0x300, 4),
+    (0x6D0, 8),
+]
+
+
+class SimulatedLoRaDevice:
+    def __init__(self, fd, messages=None, rate=100.0, seed=None, pack=1):
+        """
+        Initialize a simulated LoRa firmware on a file descriptor.
+
+        The simulator answers REQUEST, SETTINGS and TRANSMISSION packets the
+        way the firmware does and, while in receiver mode, emits LOG packets
+        carrying CAN payloads at a fixed rate.
+
+        Args:
+            fd: File descriptor of the device end (pty master or socket).
+            messages: (frame_id, length) pairs to send LOG packets for.
+            rate: LOG packets per second while in receiver mode.
+            seed: Seed for the random payload generator.
+            pack: CAN frames per LOG packet; above 1 the payloads use the
+                packed multi-frame format with time deltas.
+        """
+        self.fd = fd
+        self.messages = list(messages or DEFAULT_MESSAGES)
+        self.rate = rate
+        longest = max(length for _, length in self.messages)
+        if pack > 1 and HEADER.size + pack * record_size(longest, True) > MAX_PAYLOAD:
+            raise ValueError(f"{pack} frames do not fit in one packed payload")
+        self.pack = pack
+        self.random = random.Random(seed)
+        self.state = packet_pb2.State.STANDBY
+        self.settings = {
+            "frequency": 915.0,
+            "power": 22,
+            "bandwidth": 500.0,
+            "spreading_factor": 7,
+            "coding_rate": 5,
+            "preamble": 8,
+            "set_crc": True,
+            "sync_word": 0xAB,
+        }
+        self.gps = {"latitude": 43.0731, "longitude": -89.4012, "satellites": 9}
+
+        self.sent = 0
+        self.transmissions = 0
+        self.stop_event = threading.Event()
+        self.write_lock = threading.Lock()
+        self.threads = []
+
+    def send(self, packet):
+        """Frame and write a packet to the host."""
+        self.write_raw(START_MARKER + packet.SerializeToString() + END_MARKER)
+
+    def write_raw(self, data):
+        view = memoryview(data)
+        with self.write_lock:
+            while view:
+                written = os.write(self.fd, view)
+                view = view[written:]
+
+    def _settings_packet(self):
+        packet = packet_pb2.Packet()
+        packet.type = packet_pb2.PacketType.SETTINGS
+        for name, value in self.settings.items():
+            setattr(packet.settings, name, value)
+        return packet
+
+    def _gps_packet(self):
+        packet = packet_pb2.Packet()
+        packet.type = packet_pb2.PacketType.GPS
+        packet.gps.latitude = self.gps["latitude"]
+        packet.gps.longitude = self.gps["longitude"]
+        packet.gps.satellites = self.gps["satellites"]
+        return packet
+
+    def _ack_packet(self):
+        packet = packet_pb2.Packet()
+        packet.type = packet_pb2.PacketType.ACK
+        packet.ack = True
+        return packet
+
+    def log_packet(self):
+        """Build a LOG packet with random payloads for some of the messages."""
+        packet = packet_pb2.Packet()
+        packet.type = packet_pb2.PacketType.LOG
+        packet.log.rssi_avg = self.random.uniform(-120.0, -40.0)
+        packet.log.snr = self.random.uniform(-5.0, 12.0)
+        if self.pack > 1:
+            frames = [
+                (frame_id, self.random.randbytes(length))
+                for frame_id, length in self.random.choices(self.messages, k=self.pack)
+            ]
+            # Frames collected evenly over the interval since the last packet
+            now = time.time()
+            spacing = 1.0 / (self.rate * self.pack) if self.rate > 0 else 0.0
+            timestamps = [now - (self.pack - 1 - i) * spacing for i in range(self.pack)]
+            packet.log.payload = pack_frames(frames, timestamps)
+        else:
+            frame_id, length = self.random.choice(self.messages)
+            packet.log.payload = frame_id.to_bytes(4, "big") + self.random.randbytes(
+                length
+            )
+        return packet
+
+    def handle(self, packet):
+        """
+        Respond to a packet from the host.
+
+        Args:
+            packet: The parsed packet.
+        """
+        if packet.type == packet_pb2.PacketType.REQUEST:
+            request = packet.request
+            if request.settings:
+                self.send(self._settings_packet())
+            if request.gps:
+                self.send(self._gps_packet())
+            if not (request.settings or request.gps or request.search):
+                self.state = request.stateChange
+                self.send(self._ack_packet())
+        elif packet.type == packet_pb2.PacketType.SETTINGS:
+            for name in self.settings:
+                self.settings[name] = getattr(packet.settings, name)
+            self.send(self._ack_packet())
+        elif packet.type == packet_pb2.PacketType.TRANSMISSION:
+            self.transmissions += 1
+            self.send(self._ack_packet())
+
+    def _serve(self):
+        framer = PacketFramer()
+        while not self.stop_event.is_set():
+            try:
+                data = os.read(self.fd, 4096)
+            except OSError:
+                break
+            if not data:
+                break
+            framer.feed(data)
+            for frame in framer.frames():
+                packet = packet_pb2.Packet()
+                try:
+                    packet.ParseFromString(frame)
+                except Exception as e:
+                    logger.warning(f"Simulator failed to decode request: {e}")
+                    continue
+                self.handle(packet)
+
+    def _emit(self):
+        started = None
+        emitted = 0
+        while not self.stop_event.is_set():
+            if self.state != packet_pb2.State.RECEIVER or self.rate <= 0:
+                started = None
+                time.sleep(0.01)
+                continue
+            now = time.monotonic()
+            if started is None:
+                started, emitted = now, 0
+
+            # Send every packet that is due, in one write
+            due = int((now - started) * self.rate) - emitted
+            if due > 0:
+                frames = [
+                    START_MARKER + self.log_packet().SerializeToString() + END_MARKER
+                    for _ in range(due)
+                ]
+                try:
+                    self.write_raw(b"".join(frames))
+                except OSError:
+                    break
+                emitted += due
+                self.sent += due
+            time.sleep(min(0.01, 1.0 / self.rate))
+
+    def start(self):
+        """Start answering requests and emitting LOG packets."""
+        for target in (self._serve, self._emit):
+            thread = threading.Thread(target=target, daemon=True)
+            thread.start()
+            self.threads.append(thread)
+
+    def stop(self):
+        """Stop the simulator threads."""
+        self.stop_event.set()
+        for thread in self.threads:
+            thread.join(0.5)
+
+
+def main():
+    """Run a simulated device on a pseudo-terminal or a TCP port."""
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument("--rate", type=float, default=100.0, help="LOG packets/s")
+    parser.add_argument("--tcp", type=int, help="Listen on this TCP port")
+    parser.add_argument("--state", choices=["standby", "receiver"], default="standby")
+    parser.add_argument("--pack", type=int, default=1, help="CAN frames per packet")
+    args = parser.parse_args()
+
+    if args.tcp:
+        server = socket.create_server(("0.0.0.0", args.tcp))
+        print(f"Simulated device listening on tcp://0.0.0.0:{args.tcp}")
+        connection, address = server.accept()
+        print(f"Host connected from {address[0]}")
+        fd = connection.fileno()
+    else:
+        import tty
+
+        fd, slave_fd = os.openpty()
+        tty.setraw(fd)
+        tty.setraw(slave_fd)
+        print(f"Simulated device on {os.ttyname(slave_fd)}")
+
+    simulator = SimulatedLoRaDevice(fd, rate=args.rate, pack=args.pack)
+    if args.state == "receiver":
+        simulator.state = packet_pb2.State.RECEIVER
+    simulator.start()
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        simulator.stop()
+
+
+if __name__ == "__main__":
+    main()
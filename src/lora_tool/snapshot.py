@@ -0,0 +1,133 @@
+# lora_tool/snapshot.py
+import threading
+import time
+
+
+class SnapshotTable:
+    def __init__(self, refresh_interval=1.0):
+        """
+        Latest value of every signal, for dashboards.
+
+        Each entry remembers the update counter at which it last changed,
+        so a client watching a few signals can be told "nothing new"
+        without the table being serialized. An entry changes when its value
+        does, and when an unchanged value is repeated refresh_interval
+        after its stored timestamp, so timestamps of steady signals lag by
+        less than that. etag() also changes every refresh_interval, so the
+        ages a client holds are never more than that out of date, even when
+        the link goes quiet.
+
+        Args:
+            refresh_interval: Granularity of timestamps and ages, in seconds.
+        """
+        self.refresh_interval = refresh_interval
+        self.lock = threading.Lock()
+        # "<message>.<signal>" -> (value, timestamp, message, device, version)
+        self.values = {}
+        self.version = 0
+
+    def add_message(self, message):
+        """
+        Record the signals of a decoded message.
+
+        Args:
+            message: Message dictionary with timestamp, message_name and signals.
+        """
+        timestamp = message["timestamp"]
+        message_name = message.get("message_name", "Unknown")
+        device = message.get("device")
+        prefix = message_name + "."
+        refresh_interval = self.refresh_interval
+        with self.lock:
+            version = self.version + 1
+            changed = False
+            values = self.values
+            for name, value in message.get("signals", {}).items():
+                key = prefix + name
+                entry = values.get(key)
+                if (
+                    entry is not None
+                    and entry[0] == value
+                    and entry[3] == device
+                    and timestamp - entry[1] < refresh_interval
+                ):
+                    continue
+                values[key] = (value, timestamp, message_name, device, version)
+                changed = True
+            if changed:
+                self.version = version
+
+    def select(self, signals=None):
+        """
+        Resolve a signal filter to table keys.
+
+        Args:
+            signals: Names as "<message>.<signal>" or just "<signal>" (which
+                matches that signal in any message), or None for all.
+
+        Returns:
+            List of matching keys.
+        """
+        with self.lock:
+            keys = list(self.values)
+        if not signals:
+            return keys
+        wanted = set(signals)
+        return [key for key in keys if key in wanted or key.split(".", 1)[1] in wanted]
+
+    def version_of(self, keys):
+        """Return the newest update counter among the given keys."""
+        values = self.values
+        return max((values[key][4] for key in keys if key in values), default=0)
+
+    def etag(self, keys, now=None):
+        """
+        Return a validator for snapshot(keys).
+
+        It changes when one of the entries does and every refresh_interval,
+        as the ages in the snapshot grow.
+
+        Args:
+            keys: Table keys, e.g. from select().
+            now: Current time, for testing.
+
+        Returns:
+            The ETag string.
+        """
+        now = time.time() if now is None else now
+        tick = int(now // self.refresh_interval)
+        return f"{self.version_of(keys)}.{len(keys)}.{tick}"
+
+    def snapshot(self, keys):
+        """
+        Return the current values for the given keys.
+
+        Args:
+            keys: Table keys, e.g. from select().
+
+        Returns:
+            Dictionary mapping each key to its value, timestamp, source
+            message, device and age in seconds.
+        """
+        now = time.time()
+        result = {}
+        with self.lock:
+            for key in keys:
+                entry = self.values.get(key)
+                if entry is None:
+                    continue
+                value, timestamp, message_name, device, _ = entry
+                result[key] = {
+                    "value": value,
+                    "timestamp": timestamp,
+                    "message": message_name,
+                    "device": device,
+                    "age": round(now - timestamp, 3),
+                }
+        return result
+
+    def clear(self):
+        """Forget all values."""
+        with self.lock:
+            self.values.clear()
+            self.version += 1
@@ -0,0 +1,254 @@
+# lora_tool/timeseries.py
+import threading
+from collections import deque
+
+
+def _times(times):
+    """JSON-ready times, to the millisecond."""
+    import numpy as np
+
+    return np.round(times, 3).tolist()
+
+
+def _values(values):
+    """JSON-ready values, to float32 precision instead of 17 digits."""
+    return [float(f"{value:.7g}") for value in values.tolist()]
+
+
+class SeriesBuffer:
+    def __init__(self, chunk_size=1024, max_chunks=128):
+        """
+        History of one signal, kept in fixed-size NumPy chunks.
+
+        Points go into the newest chunk; a full chunk starts a new one and,
+        past max_chunks, the oldest chunk is dropped, so memory is bounded
+        at chunk_size * max_chunks points (12 bytes each).
+
+        Args:
+            chunk_size: Points per chunk.
+            max_chunks: Maximum number of chunks kept.
+        """
+        self.chunk_size = chunk_size
+        self.chunks = deque(maxlen=max_chunks)
+        self._times = None
+        self._values = None
+        self._count = chunk_size
+        self.last_time = float("-inf")
+
+    def __len__(self):
+        if not self.chunks:
+            return 0
+        return (len(self.chunks) - 1) * self.chunk_size + self._count
+
+    def append(self, timestamp, value):
+        """
+        Add a point.
+
+        Args:
+            timestamp: Seconds since the epoch; must not be older than the
+                previous point.
+            value: The numeric value.
+        """
+        if self._count == self.chunk_size:
+            import numpy as np
+
+            self._times = np.empty(self.chunk_size, dtype=np.float64)
+            self._values = np.empty(self.chunk_size, dtype=np.float32)
+            self._count = 0
+            self.chunks.append((self._times, self._values))
+        self._times[self._count] = timestamp
+        self._values[self._count] = value
+        self._count += 1
+        self.last_time = timestamp
+
+    def range(self, start=None, end=None):
+        """
+        Return the points between two times.
+
+        Args:
+            start: First time to include (default the oldest point).
+            end: Last time to include (default the newest point).
+
+        Returns:
+            Tuple of (times, values) arrays.
+        """
+        import numpy as np
+
+        times, values = [], []
+        last = len(self.chunks) - 1
+        for position, (chunk_times, chunk_values) in enumerate(self.chunks):
+            count = self._count if position == last else self.chunk_size
+            chunk_times = chunk_times[:count]
+            if start is not None and chunk_times[-1] < start:
+                continue
+            if end is not None and chunk_times[0] > end:
+                break
+            lo = 0 if start is None else np.searchsorted(chunk_times, start, "left")
+            hi = count if end is None else np.searchsorted(chunk_times, end, "right")
+            times.append(chunk_times[lo:hi])
+            values.append(chunk_values[lo:hi])
+        if not times:
+            return np.empty(0), np.empty(0, dtype=np.float32)
+        return np.concatenate(times), np.concatenate(values)
+
+
+def bucket_stats(times, values, points, start=None, end=None):
+    """
+    Aggregate points into equal time buckets.
+
+    Args:
+        times: Sorted sample times.
+        values: Sample values.
+        points: Number of buckets.
+        start: Start of the first bucket (default the first sample).
+        end: End of the last bucket (default the last sample).
+
+    Returns:
+        Dictionary of lists t (bucket start), min, max, mean and count for
+        every bucket that holds at least one sample.
+    """
+    import numpy as np
+
+    if not len(times):
+        return {"t": [], "min": [], "max": [], "mean": [], "count": []}
+    start = times[0] if start is None else start
+    end = times[-1] if end is None else end
+    edges = np.linspace(start, end, points + 1)
+    bounds = np.searchsorted(times, edges[:-1], "left")
+    counts = np.diff(np.append(bounds, len(times)))
+    filled = counts > 0
+    first = bounds[filled]
+    counts = counts[filled]
+    values = values.astype(np.float64)
+    return {
+        "t": _times(edges[:-1][filled]),
+        "min": _values(np.minimum.reduceat(values, first)),
+        "max": _values(np.maximum.reduceat(values, first)),
+        "mean": _values(np.add.reduceat(values, first) / counts),
+        "count": counts.tolist(),
+    }
+
+
+def lttb(times, values, points):
+    """
+    Downsample with Largest-Triangle-Three-Buckets.
+
+    Keeps the first and last point and, from each bucket in between, the
+    point forming the largest triangle with the previously kept point and
+    the average of the next bucket, which preserves the visual shape.
+
+    Args:
+        times: Sorted sample times.
+        values: Sample values.
+        points: Number of points to keep (at least 3).
+
+    Returns:
+        Tuple of (times, values) arrays of the kept points.
+    """
+    import numpy as np
+
+    count = len(times)
+    if points >= count or points < 3:
+        return times, values
+
+    x = times - times[0]
+    y = values.astype(np.float64)
+    edges = np.linspace(1, count - 1, points - 1).astype(np.int64)
+    kept = np.empty(points, dtype=np.int64)
+    kept[0] = 0
+    kept[-1] = count - 1
+    previous = 0
+    for bucket in range(points - 2):
+        lo, hi = edges[bucket], max(edges[bucket + 1], edges[bucket] + 1)
+        next_lo = hi
+        next_hi = edges[bucket + 2] if bucket + 2 < len(edges) else count
+        next_hi = max(next_hi, next_lo + 1)
+        mean_x = x[next_lo:next_hi].mean()
+        mean_y = y[next_lo:next_hi].mean()
+        area = np.abs(
+            (x[previous] - mean_x) * (y[lo:hi] - y[previous])
+            - (x[previous] - x[lo:hi]) * (mean_y - y[previous])
+        )
+        previous = lo + int(area.argmax())
+        kept[bucket + 1] = previous
+    return times[kept], values[kept]
+
+
+class TimeSeriesStore:
+    def __init__(self, chunk_size=1024, max_chunks=128):
+        """
+        Per-signal history of decoded messages for charting.
+
+        Each numeric signal is stored as "<message>.<signal>" in its own
+        SeriesBuffer.
+
+        Args:
+            chunk_size: Points per chunk.
+            max_chunks: Maximum number of chunks kept per signal.
+        """
+        self.chunk_size = chunk_size
+        self.max_chunks = max_chunks
+        self.series = {}
+        self.lock = threading.Lock()
+
+    def add_message(self, message):
+        """
+        Record the numeric signals of a decoded message.
+
+        Args:
+            message: Message dictionary with timestamp, message_name and signals.
+        """
+        timestamp = message["timestamp"]
+        prefix = message.get("message_name", "Unknown") + "."
+        with self.lock:
+            for name, value in message.get("signals", {}).items():
+                if not isinstance(value, (int, float)):
+                    continue
+                key = prefix + name
+                buffer = self.series.get(key)
+                if buffer is None:
+                    buffer = self.series[key] = SeriesBuffer(
+                        self.chunk_size, self.max_chunks
+                    )
+                # Receivers append from several threads; keep chunks sorted
+                buffer.append(max(timestamp, buffer.last_time), value)
+
+    def names(self):
+        """Return the names of all recorded signals."""
+        with self.lock:
+            return sorted(self.series)
+
+    def query(self, name, start=None, end=None, points=500, mode="buckets"):
+        """
+        Return a signal's history, downsampled to about the given number of points.
+
+        Args:
+            name: Signal name as "<message>.<signal>".
+            start: Start time in seconds since the epoch.
+            end: End time in seconds since the epoch.
+            points: Number of buckets or points to return.
+            mode: "buckets" for min/max/mean per time bucket, "lttb" for
+                representative points.
+
+        Returns:
+            Dictionary with the mode and its columns, or None for an unknown
+            signal. When there are no more samples than points, the raw
+            samples are returned with mode "raw".
+        """
+        with self.lock:
+            buffer = self.series.get(name)
+            if buffer is None:
+                return None
+            times, values = buffer.range(start, end)
+
+        if len(times) <= points:
+            return {"mode": "raw", "t": _times(times), "v": _values(values)}
+        if mode == "lttb":
+            times, values = lttb(times, values, points)
+            return {"mode": "lttb", "t": _times(times), "v": _values(values)}
+        return dict(mode="buckets", **bucket_stats(times, values, points, start, end))
+
+    def clear(self):
+        """Forget all recorded history."""
+        with self.lock:
+            self.series.clear()
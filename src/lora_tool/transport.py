@@ -0,0 +1,250 @@
+# lora_tool/transport.py
+import abc
+import os
+import select
+import socket
+import time
+import logging
+from urllib.parse import urlsplit, parse_qs
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger("lora_tool.transport")
+
+
+class Transport(abc.ABC):
+    """
+    Byte stream to a LoRa device.
+
+    Transports expose the subset of the pyserial API that LoRaDevice and
+    PacketReader rely on: read(), write(), in_waiting, timeout,
+    reset_input_buffer(), cancel_read() and close(). Like pyserial,
+    read(size) blocks until size bytes arrived or the timeout expired.
+    """
+
+    timeout = 1.0
+    # True for transports that only play recorded traffic back: nothing
+    # answers commands, so there is no status or ACK to wait for
+    passive = False
+
+    @property
+    @abc.abstractmethod
+    def in_waiting(self):
+        """Number of bytes received and not read yet."""
+
+    @abc.abstractmethod
+    def read(self, size=1):
+        """Read up to size bytes, blocking until they arrive or timeout expires."""
+
+    @abc.abstractmethod
+    def write(self, data):
+        """Write data and return the number of bytes written."""
+
+    def reset_input_buffer(self):
+        """Discard any bytes that have been received but not read."""
+        while self.in_waiting:
+            self.read(self.in_waiting)
+
+    def cancel_read(self):
+        """Make a blocking read() return early, if the transport supports it."""
+        pass
+
+    def close(self):
+        pass
+
+
+class SerialTransport(Transport):
+    def __init__(self, ser):
+        """
+        Wrap an open pyserial connection.
+
+        Args:
+            ser: The serial connection.
+        """
+        self.ser = ser
+
+    @property
+    def timeout(self):
+        return self.ser.timeout
+
+    @timeout.setter
+    def timeout(self, value):
+        self.ser.timeout = value
+
+    @property
+    def in_waiting(self):
+        return self.ser.in_waiting
+
+    def read(self, size=1):
+        return self.ser.read(size)
+
+    def write(self, data):
+        return self.ser.write(data)
+
+    def reset_input_buffer(self):
+        self.ser.reset_input_buffer()
+
+    def cancel_read(self):
+        # Only pyserial's POSIX and Windows backends implement cancel_read
+        cancel_read = getattr(self.ser, "cancel_read", None)
+        if cancel_read:
+            cancel_read()
+
+    def close(self):
+        self.ser.close()
+
+
+class SocketTransport(Transport):
+    def __init__(self, host, port, timeout=1.0, connect_timeout=5.0):
+        """
+        Connect to a device exposed over TCP (e.g. ser2net or the simulator).
+
+        Args:
+            host: Host name or address.
+            port: TCP port.
+            timeout: Read timeout in seconds.
+            connect_timeout: Connection timeout in seconds.
+        """
+        self.sock = socket.create_connection((host, port), timeout=connect_timeout)
+        self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.sock.setblocking(False)
+        self.timeout = timeout
+        self._buffer = bytearray()
+        # Writing to this pair wakes a read blocked in select()
+        self._wake_recv, self._wake_send = socket.socketpair()
+        self._wake_recv.setblocking(False)
+        self._cancelled = False
+
+    def _fill(self, timeout):
+        """Receive whatever is available, waiting up to timeout seconds."""
+        ready, _, _ = select.select([self.sock, self._wake_recv], [], [], timeout)
+        if self._wake_recv in ready:
+            try:
+                self._wake_recv.recv(4096)
+            except BlockingIOError:
+                pass
+            self._cancelled = True
+        if self.sock not in ready:
+            return
+        chunk = self.sock.recv(65536)
+        if not chunk:
+            raise ConnectionError("Connection closed by device")
+        self._buffer += chunk
+
+    @property
+    def in_waiting(self):
+        self._fill(0)
+        return len(self._buffer)
+
+    def read(self, size=1):
+        deadline = None if self.timeout is None else time.monotonic() + self.timeout
+        while len(self._buffer) < size and not self._cancelled:
+            remaining = None if deadline is None else deadline - time.monotonic()
+            if remaining is not None and remaining <= 0:
+                break
+            self._fill(remaining)
+        self._cancelled = False
+        data = bytes(self._buffer[:size])
+        del self._buffer[:size]
+        return data
+
+    def write(self, data):
+        self.sock.setblocking(True)
+        try:
+            self.sock.sendall(data)
+        finally:
+            self.sock.setblocking(False)
+        return len(data)
+
+    def reset_input_buffer(self):
+        self._fill(0)
+        self._buffer.clear()
+
+    def cancel_read(self):
+        self._wake_send.send(b"\0")
+
+    def close(self):
+        self.sock.close()
+        self._wake_recv.close()
+        self._wake_send.close()
+
+
+class PtySimulatorTransport(SerialTransport):
+    def __init__(self, messages=None, rate=100.0, timeout=1.0, pack=1):
+        """
+        Start a simulated LoRa device on a pseudo-terminal and open it.
+
+        The host side goes through pyserial exactly like real hardware, so
+        the whole stack can be exercised without a radio (Linux/macOS).
+
+        Args:
+            messages: (frame_id, length) pairs the simulator sends LOG packets for.
+            rate: LOG packets per second while in receiver mode.
+            timeout: Read timeout in seconds.
+            pack: CAN frames per LOG packet (packed format above 1).
+        """
+        import tty
+        import serial
+        from lora_tool.simulator import SimulatedLoRaDevice
+
+        master_fd, slave_fd = os.openpty()
+        tty.setraw(master_fd)
+        tty.setraw(slave_fd)
+        self.simulator = SimulatedLoRaDevice(
+            master_fd, messages=messages, rate=rate, pack=pack
+        )
+        self.simulator.start()
+        self._slave_fd = slave_fd
+        super().__init__(serial.Serial(os.ttyname(slave_fd), timeout=timeout))
+
+    def close(self):
+        super().close()
+        self.simulator.stop()
+        os.close(self._slave_fd)
+
+
+def open_transport(url, decoder=None):
+    """
+    Open a transport from a port name or URL.
+
+    Supported forms:
+        /dev/ttyUSB0, COM3         serial port
+        tcp://host:port            TCP socket
+        replay://path?speed=1.0    raw capture replay (speed 0 = as fast as possible)
+        sim://?rate=100&pack=1     pty-backed simulated device
+
+    Args:
+        url: The port name or URL.
+        decoder: Optional CANDecoder whose messages the simulator sends.
+
+    Returns:
+        An open Transport.
+    """
+    parts = urlsplit(url)
+    query = {key: values[-1] for key, values in parse_qs(parts.query).items()}
+
+    if parts.scheme == "tcp":
+        return SocketTransport(parts.hostname, parts.port)
+
+    if parts.scheme == "replay":
+        from lora_tool.raw_capture import ReplaySerial
+
+        return ReplaySerial(
+            parts.netloc + parts.path,
+            speed=float(query.get("speed", 1.0)),
+            loop=query.get("loop", "0") not in ("0", "false"),
+        )
+
+    if parts.scheme == "sim":
+        messages = None
+        if decoder and decoder.plans:
+            messages = [(plan.frame_id, plan.length) for plan in decoder.plans.values()]
+        return PtySimulatorTransport(
+            messages=messages,
+            rate=float(query.get("rate", 100.0)),
+            pack=int(query.get("pack", 1)),
+        )
+
+    from lora_tool.serial_comm import open_serial_port
+
+    return SerialTransport(open_serial_port(url))
@@ -1,8 +1,6 @@
 # lora_tool/web_app.py
 import sys
 import os
-from flask import Flask
-from flask.cli import main
 
 # Add the directory containing the package to the Python path
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
@@ -8,11 +8,10 @@ import serial
 from serial.tools import list_ports
 from lora_tool.serial_comm import open_serial_port
 from lora_tool.lora_device import LoRaDevice
+from lora_tool.packet_reader import PacketReader
 from lora_tool.can_decoder import CANDecoder
 from lora_tool.json_utils import CustomJSONEncoder, apply_custom_json_encoder
 import proto.packet_pb2 as packet_pb2
-import can
-from can.database import load_file as load_dbc_file
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -26,21 +25,18 @@ apply_custom_json_encoder(app)
 # Global variables
 lora_device = None
 serial_connection = None
-can_db = None
 can_decoder = None
 connected_port = None
 message_queue = []
 lock = threading.Lock()
 
-# Load DBC file
+# Load DBC file once; the decoder's plans are cached by content hash
 try:
     dbc_path = "telemetry.dbc"
-    can_db = load_dbc_file(dbc_path)
     can_decoder = CANDecoder(dbc_path)
     logger.info(f"CAN database loaded from {dbc_path}")
 except Exception as e:
     logger.error(f"Error loading DBC file: {e}")
-    can_db = None
     can_decoder = None
 
 
@@ -191,7 +187,8 @@ def decode_can_message(payload):
     if can_decoder:
         return can_decoder.decode_payload(payload)
     else:
-        # Fallback if CAN decoder is not initialized
+        # Fallback if CAN decoder is not initialized; without a DBC only the
+        # ID and raw data can be reported
         if len(payload) < 4:
             return {"error": "Payload too short"}
 
@@ -203,41 +200,6 @@ def decode_can_message(payload):
 
         result = {"can_id": can_id, "data": data.hex(), "signals": {}}
 
-        # Find the message in the DBC file by ID
-        if can_db:
-            for message in can_db.messages:
-                if message.frame_id == can_id:
-                    result["message_name"] = message.name
-
-                    # Create a CAN message object
-                    msg = can.Message(
-                        arbitration_id=can_id,
-                        data=data,
-                        is_extended_id=(can_id > 0x7FF),
-                    )
-
-                    try:
-                        # Decode the message
-                        decoded = can_db.decode_message(can_id, data)
-
-                        # Process each signal to handle NamedSignalValue objects
-                        for signal_name, signal_value in decoded.items():
-                            # Convert NamedSignalValue to string
-                            if hasattr(signal_value, "name") and hasattr(
-                                signal_value, "value"
-                            ):
-                                result["signals"][signal_name] = (
-                                    f"{signal_value.value} ({signal_value.name})"
-                                )
-                            else:
-                                result["signals"][signal_name] = signal_value
-                    except Exception as e:
-                        logger.error(f"Error decoding CAN message: {str(e)}")
-                        result["decode_error"] = str(e)
-                    break
-            else:
-                result["message_name"] = f"Unknown (0x{can_id:X})"
-
         return result
 
 
@@ -270,13 +232,8 @@ def receive_data_thread(stop_event):
             logger.debug(f"Received message: {message_info['message_name']}")
 
     try:
-        # Process packets until stopped
-        while not stop_event.is_set():
-            if lora_device.ser.in_waiting > 0:
-                lora_device.process_serial_packets(
-                    packet_callback, exit_on_condition=False
-                )
-            time.sleep(0.1)
+        # Process packets as they arrive until stopped
+        PacketReader(lora_device, packet_callback, stop_event).run()
     except Exception as e:
         logger.error(f"Error in receive thread: {e}")
     finally:
@@ -1,15 +1,17 @@
 # lora_tool/webapp.py
 import os
-import threading
-import time
 import logging
-from flask import Flask, request, jsonify, render_template
-from serial.tools import list_ports
-from lora_tool.serial_comm import list_serial_ports, open_serial_port
-from lora_tool.lora_device import LoRaDevice
+from flask import Flask, Response, request, jsonify, render_template
+from lora_tool.serial_comm import list_serial_ports
 from lora_tool.can_decoder import CANDecoder
 from lora_tool.json_utils import CustomJSONEncoder
-import packet_pb2 as packet_pb2
+from lora_tool.message_buffer import MessageRing
+from lora_tool.gateway import DeviceRegistry
+from lora_tool.timeseries import TimeSeriesStore
+from lora_tool.snapshot import SnapshotTable
+from lora_tool.delta import Deadbands, DeltaClients
+from lora_tool.can_packing import pack_payloads
+from lora_tool.metrics import REGISTRY, PACKET_LOG
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -26,24 +28,111 @@ app = Flask(
 app.json_encoder = CustomJSONEncoder
 
 # Global variables
-lora_device = None
 can_decoder = None
-serial_connection = None
-connected_port = None
-message_queue = []
-lock = threading.Lock()
-is_receiving = False
-stop_receive_event = threading.Event()
+# Receive streams of all devices, merged in time order
+message_queue = MessageRing(capacity=10000)
+# Per-signal history for charts
+series_store = TimeSeriesStore()
+# Latest value of every signal for dashboards
+snapshot_table = SnapshotTable()
+# Largest batch of messages sent in one stream event
+STREAM_MAX_BATCH = 500
+# Seconds between keep-alive comments on an idle stream
+STREAM_KEEPALIVE = 15.0
+# Seconds between checks of the DBC file for edits
+DBC_WATCH_INTERVAL = 1.0
+# Recent unknown-ID frames decoded again when a DBC reload defines them
+UNKNOWN_HISTORY = 1000
+# Seconds between full keyframes for clients in delta mode (?delta=1)
+DELTA_KEYFRAME_INTERVAL = 10.0
+# Seconds after which a polling delta client that went quiet is forgotten
+DELTA_CLIENT_TIMEOUT = 60.0
+# Deadbands overriding the DBC "Deadband" signal attribute, keyed by
+# "<message>.<signal>" or "<signal>", e.g. {"Pack_Voltage": 0.5}
+DELTA_DEADBANDS = {}
 
 # Initialize the CAN decoder
 dbc_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), "telemetry.dbc")
 try:
     can_decoder = CANDecoder(dbc_path)
+    # Pick up DBC edits without restarting the receive session
+    can_decoder.start_watching(DBC_WATCH_INTERVAL)
     logger.info(f"CAN decoder initialized with DBC file: {dbc_path}")
 except Exception as e:
     logger.error(f"Failed to initialize CAN decoder: {e}")
     can_decoder = None
 
+# Connected devices, keyed by device ID
+registry = DeviceRegistry(
+    message_queue,
+    can_decoder,
+    sinks=[series_store, snapshot_table],
+    unknown_history=UNKNOWN_HISTORY,
+)
+
+# Per-client state of clients that only want changed signals
+delta_clients = DeltaClients(
+    Deadbands(can_decoder, DELTA_DEADBANDS),
+    DELTA_KEYFRAME_INTERVAL,
+    DELTA_CLIENT_TIMEOUT,
+)
+
+# Values read when /metrics is scraped
+REGISTRY.gauge(
+    "lora_message_queue_depth",
+    "Messages held in the message buffer",
+    lambda: len(message_queue),
+)
+REGISTRY.counter(
+    "lora_message_queue_overwritten_total",
+    "Messages pushed out of the full message buffer, read or not",
+    function=lambda: message_queue.overwritten,
+)
+REGISTRY.counter(
+    "lora_message_queue_missed_total",
+    "Messages clients asked for after they had been overwritten",
+    function=lambda: message_queue.missed,
+)
+REGISTRY.gauge("lora_devices", "Connected devices", lambda: len(registry))
+REGISTRY.gauge(
+    "lora_devices_receiving",
+    "Devices in receiver mode",
+    lambda: sum(session.is_receiving for session in registry),
+)
+if can_decoder:
+    REGISTRY.counter(
+        "lora_decode_cache_hits_total",
+        "Frames answered from the decode result cache",
+        function=lambda: can_decoder.lru_hits,
+    )
+    REGISTRY.counter(
+        "lora_decode_cache_misses_total",
+        "Frames not found in the decode result cache",
+        function=lambda: can_decoder.lru_misses,
+    )
+    REGISTRY.counter(
+        "lora_decode_cache_evictions_total",
+        "Results evicted from the decode result cache",
+        function=lambda: can_decoder.lru_evictions,
+    )
+
+
+def selected_device():
+    """
+    Return the device named by the request's "device" parameter.
+
+    The ID is taken from the query string or the JSON body; without one
+    the last connected device is used.
+
+    Returns:
+        The DeviceSession, or None if there is no such device.
+    """
+    device_id = request.args.get("device")
+    if device_id is None:
+        data = request.get_json(silent=True) or {}
+        device_id = data.get("device")
+    return registry.get(device_id)
+
 
 @app.route("/")
 def index():
@@ -95,8 +184,6 @@ def get_ports():
 
 @app.route("/api/connect", methods=["POST"])
 def connect():
-    global lora_device, serial_connection, connected_port
-
     data = request.get_json()
     port = data.get("port")
 
@@ -104,20 +191,19 @@ def connect():
         return jsonify({"success": False, "error": "No port specified"})
 
     try:
-        serial_connection = open_serial_port(port)
-        lora_device = LoRaDevice(serial_connection)
-        connected_port = port
-
-        result = lora_device.update_status()
+        # Serial port name or transport URL (tcp://, replay://, sim://)
+        session, result = registry.open(port, data.get("device"))
         if result.get("success", False):
             return jsonify(
                 {
                     "success": True,
+                    "device": session.device_id,
                     "settings": result.get("settings", {}),
                     "gps": result.get("gps", {}),
                 }
             )
         else:
+            registry.close(session.device_id)
             return jsonify({"success": False, "error": "Failed to get device status"})
 
     except Exception as e:
@@ -128,8 +214,6 @@ def connect():
 @app.route("/api/autodetect", methods=["POST"])
 def autodetect_device():
     """Attempt to automatically detect and connect to a LoRa device"""
-    global lora_device, serial_connection, connected_port
-
     # Common USB-Serial devices used with LoRa
     KNOWN_VID_PID = [
         # FTDI
@@ -146,6 +230,8 @@ def autodetect_device():
         (0x1A86, 0x5523),  # CH341
     ]
 
+    from serial.tools import list_ports
+
     try:
         # First get all ports
         all_ports = list(list_ports.comports())
@@ -181,15 +267,12 @@ def autodetect_device():
         try:
             port_to_try = matched_ports[0]
             logger.info(f"Attempting to autodetect on port: {port_to_try}")
-            serial_connection = open_serial_port(port_to_try)
-            lora_device = LoRaDevice(serial_connection)
-            connected_port = port_to_try
-
-            result = lora_device.update_status()
+            session, result = registry.open(port_to_try)
             if result.get("success", False):
                 return jsonify(
                     {
                         "success": True,
+                        "device": session.device_id,
                         "port": port_to_try,
                         "settings": result.get("settings", {}),
                         "gps": result.get("gps", {}),
@@ -197,8 +280,7 @@ def autodetect_device():
                 )
             else:
                 # Close connection on failure
-                if serial_connection:
-                    serial_connection.close()
+                registry.close(session.device_id)
                 return jsonify(
                     {"success": False, "error": "Failed to get device status"}
                 )
@@ -214,10 +296,10 @@ def autodetect_device():
 
 @app.route("/api/settings", methods=["GET", "POST"])
 def settings():
-    global lora_device
-
-    if not lora_device or not lora_device.ser:
+    session = selected_device()
+    if not session or not session.device.ser:
         return jsonify({"success": False, "error": "Not connected"})
+    lora_device = session.device
 
     if request.method == "GET":
         return jsonify({"success": True, "settings": lora_device.lora_settings})
@@ -242,7 +324,7 @@ def settings():
 
             from lora_tool.settings import update_settings
 
-            update_settings(
+            ack = update_settings(
                 lora_device,
                 frequency,
                 power,
@@ -253,6 +335,10 @@ def settings():
                 set_crc,
                 sync_word,
             )
+            if lora_device.wait_response(ack) is None:
+                return jsonify(
+                    {"success": False, "error": "Device did not acknowledge settings"}
+                )
 
             # Get updated settings
             lora_device.update_status()
@@ -263,40 +349,85 @@ def settings():
             return jsonify({"success": False, "error": str(e)})
 
 
+@app.route("/api/transmit", methods=["GET", "POST"])
+def transmit():
+    session = selected_device()
+    if not session or not session.device.ser:
+        return jsonify({"success": False, "error": "Not connected"})
+    lora_device = session.device
+
+    if request.method == "GET":
+        return jsonify({"success": True, "stats": lora_device.transmitter.stats()})
+
+    try:
+        data = request.get_json()
+        payload = bytes.fromhex(data.get("payload", ""))
+        count = int(data.get("count", 1))
+        # Several CAN frames ("<4-byte ID><data>" in hex) packed per packet
+        frames = [bytes.fromhex(frame) for frame in data.get("frames", [])]
+        if "duty_cycle" in data:
+            duty_cycle = data["duty_cycle"]
+            lora_device.transmitter.duty_cycle = (
+                float(duty_cycle) if duty_cycle else None
+            )
+
+        # Frames are paced in the background; the request returns at once
+        if frames:
+            payloads = pack_payloads(
+                [(int.from_bytes(frame[:4], "big"), frame[4:]) for frame in frames]
+            )
+            for _ in range(count):
+                for packed in payloads:
+                    lora_device.send_transmission(packed)
+            queued = count * len(payloads)
+            length = len(payloads[0])
+        else:
+            for _ in range(count):
+                lora_device.send_transmission(payload)
+            queued = count
+            length = len(payload)
+
+        return jsonify(
+            {
+                "success": True,
+                "queued": queued,
+                "stats": lora_device.transmitter.stats(length),
+            }
+        )
+    except Exception as e:
+        logger.error(f"Error queuing transmission: {str(e)}")
+        return jsonify({"success": False, "error": str(e)})
+
+
 @app.route("/api/receive", methods=["POST"])
 def receive():
-    global lora_device, is_receiving, stop_receive_event, message_queue
-
-    if not lora_device or not lora_device.ser:
+    session = selected_device()
+    if not session or not session.device.ser:
         return jsonify({"success": False, "error": "Not connected"})
 
-    if is_receiving:
+    if session.is_receiving:
         return jsonify({"success": False, "error": "Already receiving"})
 
     try:
-        # Clear message queue
-        with lock:
-            message_queue = []
-
-        # Reset stop event
-        stop_receive_event.clear()
-
-        # Set to receiver mode
-        success = lora_device.change_state(packet_pb2.State.RECEIVER)
+        # Clear message queue and history, unless other devices are still
+        # feeding them
+        if not any(other.is_receiving for other in registry):
+            message_queue.clear()
+            series_store.clear()
+
+        # Optionally stream the session to Parquet files as it arrives and
+        # record the exact byte stream for later replay
+        data = request.get_json(silent=True) or {}
+        success = session.start_receiving(
+            capture=bool(data.get("capture")),
+            raw_capture=bool(data.get("raw_capture")),
+        )
         if not success:
             return jsonify({"success": False, "error": "Failed to set receiver mode"})
 
-        # Start receiving in a background thread
-        receive_thread = threading.Thread(
-            target=receive_data_thread, args=(stop_receive_event,)
-        )
-        receive_thread.daemon = True
-        receive_thread.start()
+        logger.info(f"Started receiving mode on {session.device_id}")
 
-        is_receiving = True
-        logger.info("Started receiving mode")
-
-        return jsonify({"success": True})
+        return jsonify({"success": True, "device": session.device_id})
     except Exception as e:
         logger.error(f"Error starting receiver: {str(e)}")
         return jsonify({"success": False, "error": str(e)})
@@ -304,39 +435,249 @@ def receive():
 
 @app.route("/api/stop_receive", methods=["POST"])
 def stop_receive():
-    global lora_device, is_receiving, stop_receive_event
-
-    if not lora_device or not lora_device.ser:
+    session = selected_device()
+    if not session or not session.device.ser:
         return jsonify({"success": False, "error": "Not connected"})
 
-    if not is_receiving:
+    if not session.is_receiving:
         return jsonify({"success": False, "error": "Not currently receiving"})
 
     try:
-        # Signal the receive thread to stop
-        stop_receive_event.set()
+        session.stop_receiving()
+        logger.info(f"Stopped receiving mode on {session.device_id}")
 
-        # Set to standby mode
-        lora_device.change_state(packet_pb2.State.STANDBY)
-
-        is_receiving = False
-        logger.info("Stopped receiving mode")
-
-        return jsonify({"success": True})
+        return jsonify({"success": True, "device": session.device_id})
     except Exception as e:
         logger.error(f"Error stopping receiver: {str(e)}")
         return jsonify({"success": False, "error": str(e)})
 
 
+@app.route("/api/devices", methods=["GET"])
+def list_devices():
+    return jsonify(
+        {
+            "success": True,
+            "default": registry.last_id,
+            "devices": [session.status() for session in registry],
+        }
+    )
+
+
+@app.route("/api/disconnect", methods=["POST"])
+def disconnect():
+    session = selected_device()
+    if not session:
+        return jsonify({"success": False, "error": "Not connected"})
+
+    registry.close(session.device_id)
+    logger.info(f"Disconnected {session.device_id}")
+    return jsonify({"success": True, "device": session.device_id})
+
+
+@app.route("/api/diversity", methods=["GET", "POST"])
+def diversity():
+    if request.method == "POST":
+        try:
+            data = request.get_json()
+            window = data.get("window")
+            registry.set_diversity(float(window) if window else None)
+        except Exception as e:
+            logger.error(f"Error configuring diversity merging: {str(e)}")
+            return jsonify({"success": False, "error": str(e)})
+
+    merger = registry.merger
+    return jsonify(
+        {
+            "success": True,
+            "enabled": merger is not None,
+            "stats": merger.stats() if merger else None,
+        }
+    )
+
+
+@app.route("/api/schema", methods=["GET"])
+def schema():
+    """Units, scaling, ranges and choices of every DBC signal."""
+    if not can_decoder:
+        return jsonify({"success": False, "error": "CAN decoder not initialized"})
+
+    # Version and messages from the same tables, even during a reload
+    tables = can_decoder.tables
+    response = jsonify(
+        {
+            "success": True,
+            "dbc_version": tables.version if tables else 0,
+            "messages": can_decoder.schema(tables),
+        }
+    )
+    # The schema only changes with the DBC, so let clients revalidate cheaply
+    response.add_etag()
+    return response.make_conditional(request)
+
+
+def dbc_status():
+    """Summary of the loaded DBC version for the API."""
+    return {
+        "path": can_decoder.dbc_path,
+        "version": can_decoder.version,
+        "sha256": can_decoder.dbc_hash,
+        "messages": len(can_decoder.plans),
+        "from_cache": can_decoder.from_cache,
+        "watching": can_decoder.watch_thread is not None,
+        "error": can_decoder.reload_error,
+        "unknown_held": len(registry.unknown) if registry.unknown is not None else None,
+        "redecoded": registry.redecoded,
+    }
+
+
+@app.route("/api/dbc", methods=["GET"])
+def get_dbc():
+    """Version and reload state of the DBC."""
+    if not can_decoder:
+        return jsonify({"success": False, "error": "CAN decoder not initialized"})
+    return jsonify({"success": True, "dbc": dbc_status()})
+
+
+@app.route("/api/dbc/reload", methods=["POST"])
+def reload_dbc():
+    """Reload the DBC now instead of waiting for the file watcher."""
+    if not can_decoder:
+        return jsonify({"success": False, "error": "CAN decoder not initialized"})
+
+    data = request.get_json(silent=True) or {}
+    reloaded = can_decoder.reload(force=bool(data.get("force", False)))
+    if not reloaded and can_decoder.reload_error:
+        return jsonify({"success": False, "error": can_decoder.reload_error})
+    return jsonify({"success": True, "reloaded": reloaded, "dbc": dbc_status()})
+
+
 @app.route("/api/messages", methods=["GET"])
 def get_messages():
-    global message_queue
+    # Each client passes the last sequence number it has seen, so several
+    # clients can follow the same stream without consuming each other's data
+    since = request.args.get("since", default=0, type=int)
+    # With ?delta=1&client=<id>, signals that did not change since the
+    # client's previous poll are left out
+    delta = request.args.get("delta", default=0, type=int)
+    client_id = request.args.get("client")
+    if delta and not client_id:
+        return jsonify({"success": False, "error": "Delta mode needs a client ID"})
+
+    messages, last_seq, missed = message_queue.since(since)
+    response = {
+        "messages": messages,
+        "last_seq": last_seq,
+        "missed": missed,
+        "overwritten": message_queue.overwritten,
+    }
+    if delta:
+        messages, keyframe = delta_clients.encode(client_id, since, messages, last_seq)
+        response["messages"] = messages
+        response["keyframe"] = keyframe
+    return jsonify(response)
+
+
+@app.route("/api/stream", methods=["GET"])
+def stream_messages():
+    """Push new messages to the client as Server-Sent Events."""
+    # EventSource sends Last-Event-ID when it reconnects after a drop
+    since = request.headers.get("Last-Event-ID", type=int)
+    if since is None:
+        since = request.args.get("since", default=message_queue.last_seq, type=int)
+    # With ?delta=1 only signals that changed are sent; every (re)connection
+    # starts with a keyframe
+    encoder = delta_clients.encoder() if request.args.get("delta", type=int) else None
+
+    def generate(last_seq):
+        # Tell the browser how quickly to reconnect if the stream drops
+        yield "retry: 1000\n\n"
+        while True:
+            if not message_queue.wait(last_seq, STREAM_KEEPALIVE):
+                yield ": keep-alive\n\n"
+                continue
+
+            # Everything that arrived since the last event goes out as one
+            # batch. A slow client only falls behind in the ring buffer (and
+            # is told how many messages it missed); it never blocks the
+            # receive thread.
+            messages, last_seq, missed = message_queue.since(
+                last_seq, limit=STREAM_MAX_BATCH
+            )
+            event = {"messages": messages, "last_seq": last_seq, "missed": missed}
+            if encoder:
+                event["messages"], event["keyframe"] = encoder.encode(messages)
+            data = app.json.dumps(event)
+            yield f"id: {last_seq}\nevent: messages\ndata: {data}\n\n"
+
+    return Response(
+        generate(since),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@app.route("/api/series", methods=["GET"])
+def list_series():
+    return jsonify({"success": True, "signals": series_store.names()})
+
+
+@app.route("/api/series/<path:signal>", methods=["GET"])
+def get_series(signal):
+    """History of one signal ("<message>.<signal>"), downsampled for charting."""
+    start = request.args.get("from", type=float)
+    end = request.args.get("to", type=float)
+    points = max(3, min(request.args.get("points", default=500, type=int), 10000))
+    mode = request.args.get("mode", default="buckets")
+
+    result = series_store.query(signal, start, end, points, mode)
+    if result is None:
+        return jsonify({"success": False, "error": f"Unknown signal: {signal}"})
+    return jsonify(dict(success=True, signal=signal, **result))
+
+
+@app.route("/api/snapshot", methods=["GET"])
+def get_snapshot():
+    """
+    Latest value of each signal, optionally filtered with ?signals=a,b.
 
-    with lock:
-        messages = message_queue.copy()
-        message_queue = []
+    Timestamps and ages are accurate to SnapshotTable.refresh_interval:
+    a poll revalidated with If-None-Match gets 304 until a value changes
+    or that interval has passed.
+    """
+    signals = request.args.get("signals")
+    keys = snapshot_table.select(signals.split(",") if signals else None)
+
+    # Answer unchanged polls before building the table
+    etag = snapshot_table.etag(keys)
+    if request.if_none_match.contains(etag):
+        response = Response(status=304)
+        response.set_etag(etag)
+        return response
+
+    response = jsonify({"success": True, "signals": snapshot_table.snapshot(keys)})
+    response.set_etag(etag)
+    response.cache_control.no_cache = True
+    return response
+
+
+@app.route("/metrics", methods=["GET"])
+def metrics():
+    """Counters, gauges and latency histograms in Prometheus text format."""
+    return Response(REGISTRY.render(), mimetype="text/plain; version=0.0.4")
+
+
+@app.route("/api/debug/packet_log", methods=["POST"])
+def packet_log():
+    """Log one in every N packets at debug level (0 turns packet logging off)."""
+    try:
+        data = request.get_json()
+        every = max(0, int(data.get("every", 0)))
+    except Exception as e:
+        return jsonify({"success": False, "error": str(e)})
 
-    return jsonify({"messages": messages})
+    PACKET_LOG.every = every
+    logging.getLogger("lora_tool").setLevel(logging.DEBUG if every else logging.NOTSET)
+    return jsonify({"success": True, "every": every})
 
 
 @app.route("/api/debug", methods=["GET"])
@@ -345,6 +686,7 @@ def debug_info():
     import sys
     import platform
     import serial
+    from serial.tools import list_ports
     import os
 
     # Get all serial ports with extra information
@@ -411,12 +753,21 @@ def debug_info():
 
     # Get CAN decoder info
     can_decoder_info = {}
-    if can_decoder and can_decoder.db:
+    if can_decoder and can_decoder.loaded:
+        plans = list(can_decoder.plans.values())
         can_decoder_info["dbc_path"] = dbc_path
-        can_decoder_info["message_count"] = len(can_decoder.db.messages)
+        can_decoder_info["dbc_sha256"] = can_decoder.dbc_hash
+        can_decoder_info["dbc_version"] = can_decoder.version
+        can_decoder_info["decode_cache"] = can_decoder.cache_stats()
+        can_decoder_info["from_cache"] = can_decoder.from_cache
+        can_decoder_info["message_count"] = len(plans)
         can_decoder_info["messages"] = [
-            {"name": msg.name, "frame_id": f"0x{msg.frame_id:X}", "length": msg.length}
-            for msg in can_decoder.db.messages[:5]  # Limit to first 5 messages
+            {
+                "name": plan.name,
+                "frame_id": f"0x{plan.frame_id:X}",
+                "length": plan.length,
+            }
+            for plan in plans[:5]  # Limit to first 5 messages
         ]
 
     return jsonify(
@@ -433,66 +784,17 @@ def debug_info():
             "permissions": permissions_info,
             "can_decoder": can_decoder_info,
             "lora_status": {
-                "connected": lora_device is not None
-                and hasattr(lora_device, "ser")
-                and lora_device.ser is not None,
-                "port": connected_port,
-                "is_receiving": is_receiving,
+                "connected": len(registry) > 0,
+                "default_device": registry.last_id,
+                "devices": [session.status() for session in registry],
+                "diversity": registry.merger.stats() if registry.merger else None,
+                "message_queue": message_queue.stats(),
+                "delta_clients": len(delta_clients),
             },
         }
     )
 
 
-def receive_data_thread(stop_event):
-    """Background thread for receiving data."""
-    global lora_device, message_queue, can_decoder, is_receiving
-
-    try:
-
-        def packet_callback(packet):
-            if packet.type == packet_pb2.PacketType.LOG:
-                log = packet.log
-
-                # Process the CAN message from the payload
-                if can_decoder:
-                    can_data = can_decoder.decode_payload(log.payload)
-                else:
-                    can_data = {"error": "CAN decoder not initialized"}
-
-                message_info = {
-                    "timestamp": time.time(),
-                    "rssi": log.rssi_avg,
-                    "snr": log.snr,
-                    "crc_error": log.crc_error,
-                    "general_error": log.general_error,
-                    "can_id": can_data.get("can_id"),
-                    "message_name": can_data.get("message_name", "Unknown"),
-                    "signals": can_data.get("signals", {}),
-                    "raw_data": can_data.get("data"),
-                }
-
-                with lock:
-                    message_queue.append(message_info)
-
-                logger.debug(f"Received message: {message_info['message_name']}")
-            return False  # Continue processing
-
-        # Process packets until stopped
-        while not stop_event.is_set():
-            if lora_device and lora_device.ser and lora_device.ser.in_waiting > 0:
-                lora_device.process_serial_packets(
-                    packet_callback, exit_on_condition=False
-                )
-            time.sleep(0.1)
-    except Exception as e:
-        logger.error(f"Error in receive thread: {e}")
-    finally:
-        if lora_device and lora_device.ser:
-            lora_device.change_state(packet_pb2.State.STANDBY)
-        is_receiving = False
-        logger.info("Receive thread stopped")
-
-
 def create_folders():
     """Create necessary folders for the application."""
     # Create templates folder if it doesn't exist
@@ -640,6 +942,10 @@ def run_app():
                             <button id="start-receive" class="btn btn-success btn-sm">Start Receiving</button>
                             <button id="stop-receive" class="btn btn-danger btn-sm">Stop</button>
                             <button id="clear-messages" class="btn btn-secondary btn-sm">Clear</button>
+                            <input type="checkbox" id="capture-toggle" class="form-check-input ms-2">
+                            <label class="form-check-label small" for="capture-toggle">Record</label>
+                            <input type="checkbox" id="raw-capture-toggle" class="form-check-input ms-2">
+                            <label class="form-check-label small" for="raw-capture-toggle">Raw</label>
                         </div>
                     </div>
                     <div class="card-body">
@@ -672,8 +978,16 @@ def run_app():
         let isConnected = false;
         let isReceiving = false;
         let messagePollingInterval = null;
+        let messageStream = null;
         let messagesCount = 0;
+        let lastSeq = 0;
         let crcErrorsCount = 0;
+        // Units, scaling and choices per message and signal, from /api/schema
+        let signalSchema = {};
+        // DBC version the schema was loaded for
+        let schemaVersion = null;
+        // Identifies this page when polling for changed signals only
+        const clientId = Math.random().toString(36).slice(2);
         
         // DOM Elements
         const portSelect = document.getElementById('port-select');
@@ -696,6 +1010,7 @@ def run_app():
         // Initialize
         document.addEventListener('DOMContentLoaded', function() {
             loadPorts();
+            loadSchema();
             updateButtons();
             
             refreshPortsButton.addEventListener('click', loadPorts);
@@ -709,6 +1024,35 @@ def run_app():
         });
         
         // Functions
+        async function loadSchema() {
+            try {
+                const response = await fetch('/api/schema');
+                const data = await response.json();
+                if (data.success) {
+                    signalSchema = data.messages;
+                    schemaVersion = data.dbc_version;
+                }
+            } catch (error) {
+                console.error('Error loading signal schema:', error);
+            }
+        }
+        
+        function formatSignal(messageName, signalName, value) {
+            // Signals arrive as plain numbers; units and choice names come from the schema
+            const message = signalSchema[messageName];
+            const signal = message ? message.signals[signalName] : null;
+            if (!signal) {
+                return { value: value, unit: '' };
+            }
+            if (signal.choices && signal.choices[value] !== undefined) {
+                return { value: `${value} (${signal.choices[value]})`, unit: signal.unit };
+            }
+            if (typeof value === 'number' && !Number.isInteger(value)) {
+                value = Math.round(value * 100) / 100;
+            }
+            return { value: value, unit: signal.unit };
+        }
+        
         async function loadPorts() {
             try {
                 // Update UI to show loading state
@@ -971,6 +1315,13 @@ def run_app():
             try {
                 const response = await fetch('/api/receive', {
                     method: 'POST',
+                    headers: {
+                        'Content-Type': 'application/json',
+                    },
+                    body: JSON.stringify({
+                        capture: document.getElementById('capture-toggle').checked,
+                        raw_capture: document.getElementById('raw-capture-toggle').checked,
+                    }),
                 });
                 
                 const data = await response.json();
@@ -978,8 +1329,8 @@ def run_app():
                 if (data.success) {
                     isReceiving = true;
                     
-                    // Start polling for messages
-                    messagePollingInterval = setInterval(fetchMessages, 500);
+                    // Start receiving pushed messages
+                    startMessageStream();
                     
                     updateButtons();
                 } else {
@@ -995,11 +1346,8 @@ def run_app():
             if (!isReceiving) return;
             
             try {
-                // Clear polling interval
-                if (messagePollingInterval) {
-                    clearInterval(messagePollingInterval);
-                    messagePollingInterval = null;
-                }
+                // Close the message stream
+                stopMessageStream();
                 
                 const response = await fetch('/api/stop_receive', {
                     method: 'POST',
@@ -1019,39 +1367,80 @@ def run_app():
             }
         }
         
+        function startMessageStream() {
+            if (!window.EventSource) {
+                // Fall back to polling on browsers without Server-Sent Events
+                messagePollingInterval = setInterval(fetchMessages, 500);
+                return;
+            }
+            
+            messageStream = new EventSource(`/api/stream?since=${lastSeq}&delta=1`);
+            messageStream.addEventListener('messages', event => {
+                handleMessages(JSON.parse(event.data));
+            });
+            messageStream.onerror = error => {
+                // The browser reconnects on its own and resumes from the last event id
+                console.error('Message stream error:', error);
+            };
+        }
+        
+        function stopMessageStream() {
+            if (messageStream) {
+                messageStream.close();
+                messageStream = null;
+            }
+            if (messagePollingInterval) {
+                clearInterval(messagePollingInterval);
+                messagePollingInterval = null;
+            }
+        }
+        
         async function fetchMessages() {
             try {
-                const response = await fetch('/api/messages');
+                const response = await fetch(`/api/messages?since=${lastSeq}&delta=1&client=${clientId}`);
                 const data = await response.json();
                 
-                if (data.messages && data.messages.length > 0) {
-                    data.messages.forEach(message => {
-                        displayMessage(message);
-                        
-                        messagesCount++;
-                        if (message.crc_error) {
-                            crcErrorsCount++;
-                        }
-                        
-                        // Update stats
-                        messagesCountElement.textContent = messagesCount;
-                        crcErrorsElement.textContent = crcErrorsCount;
-                        lastRssiElement.textContent = message.rssi.toFixed(2);
-                        lastSnrElement.textContent = message.snr.toFixed(2);
-                    });
-                }
+                handleMessages(data);
             } catch (error) {
                 console.error('Error fetching messages:', error);
             }
         }
         
+        function handleMessages(data) {
+            lastSeq = data.last_seq;
+            
+            if (data.messages && data.messages.length > 0) {
+                data.messages.forEach(message => {
+                    displayMessage(message);
+                    
+                    messagesCount++;
+                    if (message.crc_error) {
+                        crcErrorsCount++;
+                    }
+                    
+                    // Update stats
+                    messagesCountElement.textContent = messagesCount;
+                    crcErrorsElement.textContent = crcErrorsCount;
+                    lastRssiElement.textContent = message.rssi.toFixed(2);
+                    lastSnrElement.textContent = message.snr.toFixed(2);
+                });
+            }
+        }
+        
         function displayMessage(message) {
+            // Refetch the schema when the server has reloaded the DBC
+            if (message.dbc_version && message.dbc_version !== schemaVersion) {
+                schemaVersion = message.dbc_version;
+                loadSchema();
+            }
+            
             const messageElement = document.createElement('div');
             messageElement.className = 'message-item';
             
             // Message header
             const header = document.createElement('div');
             header.innerHTML = `
+                ${message.device ? `<span class="badge bg-secondary">${message.device}</span>` : ''}
                 <strong>Message: ${message.message_name}</strong> (ID: 0x${message.can_id.toString(16)})
                 <span class="float-end">
                     RSSI: ${message.rssi.toFixed(2)} dBm | 
@@ -1067,7 +1456,7 @@ def run_app():
             rawData.textContent = `Raw Data: ${message.raw_data}`;
             messageElement.appendChild(rawData);
             
-            // Signal table
+            // Signal table; for delta messages only the changed signals
             if (Object.keys(message.signals).length > 0) {
                 const table = document.createElement('table');
                 table.className = 'table table-sm signal-table';
@@ -1087,15 +1476,9 @@ def run_app():
                 const tbody = document.createElement('tbody');
                 
                 Object.entries(message.signals).forEach(([name, value]) => {
-                    // Check if the value has a unit (indicated by a string with format "123 unit")
-                    let displayValue = value;
-                    let unit = '';
-                    
-                    if (typeof value === 'string' && value.includes(' ')) {
-                        const parts = value.split(' ');
-                        displayValue = parts[0];
-                        unit = parts.slice(1).join(' ');
-                    }
+                    const formatted = formatSignal(message.message_name, name, value);
+                    const displayValue = formatted.value;
+                    const unit = formatted.unit;
                     
                     const row = document.createElement('tr');
                     row.innerHTML = `
@@ -1111,7 +1494,8 @@ def run_app():
             } else {
                 const noSignals = document.createElement('div');
                 noSignals.className = 'small text-muted';
-                noSignals.textContent = 'No signals decoded';
+                // Delta messages only carry the signals that changed
+                noSignals.textContent = message.delta ? 'No signals changed' : 'No signals decoded';
                 messageElement.appendChild(noSignals);
             }
             